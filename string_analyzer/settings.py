@@ -148,10 +148,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # Same output as JSONRenderer; uses orjson when it is installed
+        'strings_app.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
+        'strings_app.parsers.PlainTextParser',
+        'strings_app.parsers.OctetStreamParser',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [],
     'DEFAULT_PERMISSION_CLASSES': [],
@@ -175,6 +178,85 @@ if DEBUG:
     )
 
 
+# Largest page a client may request with ?limit= on the list endpoints
+STRINGS_MAX_PAGE_SIZE = config('STRINGS_MAX_PAGE_SIZE', default=1000, cast=int)
+
+# Rows fetched per database round trip (and per output chunk) by ?stream=1
+STRINGS_STREAM_CHUNK_SIZE = config('STRINGS_STREAM_CHUNK_SIZE', default=2000, cast=int)
+
+# Per-process cache of list and natural language filter responses: total
+# size in bytes (0 disables it) and largest body cached
+STRINGS_LIST_CACHE_BYTES = config('STRINGS_LIST_CACHE_BYTES', default=64 * 1024 * 1024, cast=int)
+STRINGS_LIST_CACHE_MAX_ENTRY_BYTES = config('STRINGS_LIST_CACHE_MAX_ENTRY_BYTES', default=4 * 1024 * 1024, cast=int)
+
+# Per-process cache of detail responses of frequently requested strings:
+# total size in bytes (0 disables it), largest entry, and lifetime in
+# seconds (deletions are recorded for that long, so it must be positive)
+STRINGS_DETAIL_CACHE_BYTES = config('STRINGS_DETAIL_CACHE_BYTES', default=32 * 1024 * 1024, cast=int)
+STRINGS_DETAIL_CACHE_MAX_ENTRY_BYTES = config('STRINGS_DETAIL_CACHE_MAX_ENTRY_BYTES', default=256 * 1024, cast=int)
+STRINGS_DETAIL_CACHE_TTL = config('STRINGS_DETAIL_CACHE_TTL', default=300, cast=int)
+
+# How often, in seconds, each process polls for strings stored or deleted
+# by other processes: the Bloom filter for new ids, the detail cache for
+# deleted ones (see strings_app/stats.py, changed_since)
+STRINGS_SYNC_INTERVAL = config('STRINGS_SYNC_INTERVAL', default=1.0, cast=float)
+
+# Evaluate list filters in memory with NumPy (when it is installed) and
+# fetch the matching rows by primary key. Results with more matches than
+# STRINGS_COLUMNAR_MAX_MATCHES are filtered in SQL instead. The index drops
+# deleted rows when it is rebuilt, every STRINGS_COLUMNAR_REBUILD_INTERVAL
+# seconds
+STRINGS_COLUMNAR_INDEX = config('STRINGS_COLUMNAR_INDEX', default=False, cast=bool)
+STRINGS_COLUMNAR_MAX_MATCHES = config('STRINGS_COLUMNAR_MAX_MATCHES', default=2000, cast=int)
+STRINGS_COLUMNAR_REBUILD_INTERVAL = config('STRINGS_COLUMNAR_REBUILD_INTERVAL', default=600, cast=int)
+
+# Run list filters through SQL compiled once per shape of filters (see
+# strings_app/precompiled.py) instead of the ORM
+STRINGS_PRECOMPILED_QUERIES = config('STRINGS_PRECOMPILED_QUERIES', default=True, cast=bool)
+# Shapes each thread keeps compiled; the least recently used are dropped
+STRINGS_PRECOMPILED_MAX_SHAPES = config('STRINGS_PRECOMPILED_MAX_SHAPES', default=256, cast=int)
+
+# Serve GET requests from a snapshot written by `manage.py export_snapshot`
+# instead of the database, and refuse writes. Empty: serve from the database
+STRINGS_SNAPSHOT_PATH = config('STRINGS_SNAPSHOT_PATH', default='')
+
+# Most values accepted by one multi-valued list filter (word_count__in,
+# length_buckets, repeated contains_character)
+STRINGS_MAX_FILTER_VALUES = config('STRINGS_MAX_FILTER_VALUES', default=50, cast=int)
+
+# Most values or ids accepted by one POST /strings/lookup
+STRINGS_MAX_LOOKUP_SIZE = config('STRINGS_MAX_LOOKUP_SIZE', default=1000, cast=int)
+
+
+# Per-process Bloom filter of stored ids (see strings_app/bloom.py), which
+# answers most lookups of values that were never stored without a query.
+# Strings stored by another process are picked up within
+# STRINGS_SYNC_INTERVAL seconds. Deleted ids are dropped at the next rebuild.
+STRINGS_BLOOM_FILTER = config('STRINGS_BLOOM_FILTER', default=True, cast=bool)
+STRINGS_BLOOM_ERROR_RATE = config('STRINGS_BLOOM_ERROR_RATE', default=0.01, cast=float)
+STRINGS_BLOOM_REBUILD_INTERVAL = config('STRINGS_BLOOM_REBUILD_INTERVAL', default=600, cast=int)
+
+
+# Storage of large strings
+# Values larger than this many UTF-8 bytes are stored zlib-compressed, with
+# only the first STRING_INLINE_PREFIX_LENGTH characters kept in the value column.
+STRING_COMPRESSION_THRESHOLD = config('STRING_COMPRESSION_THRESHOLD', default=8192, cast=int)
+STRING_INLINE_PREFIX_LENGTH = config('STRING_INLINE_PREFIX_LENGTH', default=256, cast=int)
+
+# Detail response bodies at least this many bytes are gzipped for clients
+# that accept it, and kept only gzipped in the detail cache and snapshots
+STRING_DETAIL_GZIP_MIN_SIZE = config('STRING_DETAIL_GZIP_MIN_SIZE', default=1024, cast=int)
+
+
+# Asynchronous analysis jobs (POST /strings?async=1)
+# Number of in-process worker threads per web process. Set to 0 to leave
+# jobs to dedicated `manage.py run_analysis_jobs` processes.
+ANALYSIS_JOB_WORKERS = config('ANALYSIS_JOB_WORKERS', default=2, cast=int)
+# Seconds a worker holds a claimed job. A job still running after that, or
+# still pending, is presumed abandoned and can be claimed again.
+ANALYSIS_JOB_LEASE = config('ANALYSIS_JOB_LEASE', default=300, cast=int)
+
+
 # CORS settings
 CORS_ALLOWED_ORIGINS_STR = config(
     'CORS_ALLOWED_ORIGINS',
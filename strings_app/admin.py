@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import StringAnalysis
+from .models import AnalysisJob, StringAnalysis
 
 
 @admin.register(StringAnalysis)
@@ -20,3 +20,14 @@ class StringAnalysisAdmin(admin.ModelAdmin):
         return obj.value[:50] + ('...' if len(obj.value) > 50 else '')
     
     value_preview.short_description = 'String Value'
+
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    """
+    Admin interface for AnalysisJob model.
+    """
+    list_display = ['id', 'status', 'string_id', 'created_at', 'updated_at']
+    list_filter = ['status']
+    search_fields = ['id', 'value_hash', 'string_id']
+    readonly_fields = ['id', 'value_hash', 'string_id', 'error', 'created_at', 'updated_at']
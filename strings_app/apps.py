@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class StringsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'strings_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
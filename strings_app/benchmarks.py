@@ -0,0 +1,723 @@
+"""
+Benchmark suites for the strings_app application.
+
+Run with `python manage.py benchmark [suite ...]`. Every run uses a throwaway
+test database built from the configured one, so the real data is never
+touched; the engine (SQLite or PostgreSQL) matches the deployment.
+"""
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from django.db import connection
+from django.db.models import ExpressionWrapper, F, Func, IntegerField
+from django.test import Client, RequestFactory, override_settings
+from rest_framework.renderers import JSONRenderer
+from urllib.parse import quote
+
+from . import bloom, columnar, facets, precompiled, snapshot, stats
+from .filters import filter_queryset
+from .models import CorpusStats, StringAnalysis, StringDeletion
+from .pagination import ORDERINGS, KeysetPaginator
+from .renderers import FastJSONRenderer
+from .serializers import FAST_FIELDS, StringAnalysisSerializer, fast_serialize
+from .utils import analyze_string, compute_sha256, pack_counts, unpack_counts
+from .views import string_detail
+
+SUITES = {}
+
+WORDS = (
+    "level noon racecar stats civic radar refer hello world string analyzer "
+    "django python palindrome character frequency service query filter "
+    "alpha beta gamma delta epsilon zeta theta lambda sigma omega"
+).split()
+
+
+def suite(name):
+    """Register a benchmark function under `name`."""
+    def register(func):
+        SUITES[name] = func
+        return func
+    return register
+
+
+def generate_corpus(rows, seed=0, large_fraction=0.02, large_size=(64 * 1024, 512 * 1024), start=0):
+    """
+    Yield `rows` distinct strings with a heavy tail of large values.
+
+    Most values are a few words long; a `large_fraction` of them are made of
+    space-separated words up to a length drawn from the `large_size` range.
+    Each value ends in its sequence number (counting from `start`), which
+    keeps values unique across calls.
+    """
+    rng = random.Random(seed)
+    for i in range(rows):
+        if rng.random() < large_fraction:
+            target = rng.randint(*large_size)
+            parts, size = [], 0
+            while size < target:
+                word = rng.choice(WORDS)
+                parts.append(word)
+                size += len(word) + 1
+            value = ' '.join(parts)
+        else:
+            value = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+        yield f"{value} {start + i}"
+
+
+def generate_unicode_corpus(rows, seed=0, length=(50, 2000)):
+    """
+    Yield `rows` distinct strings drawn from several scripts, so that
+    character frequency maps have many (multi-byte) keys.
+    """
+    rng = random.Random(seed)
+    alphabets = [
+        [chr(c) for c in range(0x20, 0x7F)],
+        [chr(c) for c in range(0x0400, 0x0450)],
+        [chr(c) for c in range(0x3041, 0x3097)],
+        [chr(c) for c in range(0x4E00, 0x4E00 + 500)],
+    ]
+    for i in range(rows):
+        alphabet = rng.choice(alphabets) + alphabets[0]
+        yield ''.join(rng.choice(alphabet) for _ in range(rng.randint(*length))) + str(i)
+
+
+def load_corpus(values, batch_size=1000):
+    """Insert values in batches, populating all derived columns like save() does."""
+    objs = []
+    for value in values:
+        obj = StringAnalysis(value=value)
+        obj.populate_properties()
+        objs.append(obj)
+        if len(objs) >= batch_size:
+            StringAnalysis.objects.bulk_create(objs)
+            objs = []
+    if objs:
+        StringAnalysis.objects.bulk_create(objs)
+    # bulk_create() sends no signals, so rebuild the maintained statistics
+    stats.rebuild(workers=1)
+    CorpusStats.objects.filter(pk=1).update(generation=F('generation') + 1)
+    bloom.stored_ids.invalidate()
+
+
+def table_bytes(table=StringAnalysis._meta.db_table):
+    """Return the on-disk size of a table and its indexes in bytes."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            return cursor.fetchone()[0]
+
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+                    [table],
+                )
+                return cursor.fetchone()[0] or 0
+            except Exception:
+                cursor.execute("PRAGMA page_count")
+                page_count = cursor.fetchone()[0]
+                cursor.execute("PRAGMA page_size")
+                return page_count * cursor.fetchone()[0]
+
+    raise NotImplementedError(f"table_bytes() does not support {connection.vendor}")
+
+
+def index_bytes(table=StringAnalysis._meta.db_table):
+    """Return the on-disk size of a table's indexes (primary key included) in bytes."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT pg_indexes_size(%s)", [table])
+            return cursor.fetchone()[0]
+
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                [table],
+            )
+            return cursor.fetchone()[0] or 0
+
+    raise NotImplementedError(f"index_bytes() does not support {connection.vendor}")
+
+
+def reset_table():
+    """Remove all rows and reclaim their space."""
+    StringAnalysis.objects.all().delete()
+    StringDeletion.objects.all().delete()
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM")
+
+
+def timed(func, repeat):
+    """Call func `repeat` times and return per-call latencies in milliseconds."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(latencies):
+    """Format latencies as 'p50 / p99 ms'."""
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {statistics.median(ordered):.2f} ms / p99 {p99:.2f} ms"
+
+
+class _CheckedClient(Client):
+    """
+    A test client that speaks HTTPS (so production settings don't redirect)
+    and fails loudly instead of timing error responses, except for the
+    status codes in `allow`.
+    """
+
+    def __init__(self, allow=(), **defaults):
+        super().__init__(**defaults)
+        self.allow = allow
+
+    def request(self, **request):
+        request.update({'wsgi.url_scheme': 'https', 'SERVER_PORT': '443'})
+        response = super().request(**request)
+        if response.status_code >= 300 and response.status_code not in self.allow:
+            raise AssertionError(
+                f"{request.get('PATH_INFO', '')[:80]} returned {response.status_code}"
+            )
+        return response
+
+
+def client(allow=()):
+    """Return a test client for timing requests that succeed (or return a status in `allow`)."""
+    return _CheckedClient(allow)
+
+
+@suite('storage')
+def storage(rows, stdout, seed=0, **options):
+    """Disk footprint and read latency with and without value compression."""
+    values = list(generate_corpus(rows, seed=seed))
+    rng = random.Random(seed)
+    sample = rng.sample(values, min(200, len(values)))
+    large = [v for v in values if len(v) > 8192][:50]
+    http = client()
+
+    variants = [
+        ('uncompressed', {'STRING_COMPRESSION_THRESHOLD': 2 ** 62}),
+        ('compressed', {}),
+    ]
+    for label, overrides in variants:
+        with override_settings(**overrides):
+            reset_table()
+            load_corpus(values)
+        size = table_bytes()
+        detail = timed(lambda: http.get('/strings/' + quote(rng.choice(sample))), 200)
+        detail_large = timed(lambda: http.get('/strings/' + quote(rng.choice(large))), 50) if large else []
+        listing = timed(lambda: http.get('/strings/?word_count=2'), 20)
+
+        stdout.write(f"[{label}] rows={rows} table+indexes={size / 2 ** 20:.1f} MiB")
+        stdout.write(f"  detail (all):   {summarize(detail)}")
+        if detail_large:
+            stdout.write(f"  detail (large): {summarize(detail_large)}")
+        stdout.write(f"  list word_count=2: {summarize(listing)}")
+    reset_table()
+
+
+@suite('encoding')
+def encoding(rows, stdout, seed=0, **options):
+    """Row size and decode/list throughput of the character frequency encoding."""
+    maps = [analyze_string(v)['character_frequency_map'] for v in generate_unicode_corpus(rows, seed=seed)]
+
+    json_docs = [json.dumps(m) for m in maps]
+    packed = [(''.join(m), pack_counts(m.values())) for m in maps]
+    json_bytes = sum(len(d.encode()) for d in json_docs)
+    packed_bytes = sum(len(c.encode()) + len(p) for c, p in packed)
+    stdout.write(
+        f"rows={rows} keys/row={sum(map(len, maps)) / rows:.0f} "
+        f"json={json_bytes / rows:.0f} B/row packed={packed_bytes / rows:.0f} B/row "
+        f"({packed_bytes / json_bytes:.0%})"
+    )
+
+    start = time.perf_counter()
+    for doc in json_docs:
+        json.loads(doc)
+    json_rate = rows / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for chars, counts in packed:
+        dict(zip(chars, unpack_counts(counts)))
+    packed_rate = rows / (time.perf_counter() - start)
+    stdout.write(f"decode: json {json_rate:,.0f} rows/s, packed {packed_rate:,.0f} rows/s")
+
+    reset_table()
+    load_corpus(generate_unicode_corpus(rows, seed=seed))
+    http = client()
+    start = time.perf_counter()
+    http.get('/strings/')
+    elapsed = time.perf_counter() - start
+    stdout.write(f"GET /strings/ (all rows): {elapsed * 1000:.0f} ms, {rows / elapsed:,.0f} rows/s")
+    stdout.write(f"table+indexes={table_bytes() / 2 ** 20:.1f} MiB")
+    reset_table()
+
+
+@suite('streaming')
+def streaming(rows, stdout, seed=0, **options):
+    """Peak Python memory of buffered vs streamed GET /strings/."""
+    http = client()
+    reset_table()
+    loaded = 0
+    for size in (rows // 4, rows // 2, rows):
+        load_corpus(generate_corpus(size - loaded, seed=seed, large_fraction=0, start=loaded))
+        loaded = size
+        results = []
+        for label, url in (('buffered', '/strings/'), ('streamed', '/strings/?stream=1')):
+            tracemalloc.start()
+            start = time.perf_counter()
+            response = http.get(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append(f"{label} peak {peak / 2 ** 20:6.1f} MiB in {elapsed * 1000:6.0f} ms")
+        stdout.write(f"rows={size:>7}: " + " | ".join(results))
+    reset_table()
+
+
+@suite('serialization')
+def serialization(rows, stdout, seed=0, **options):
+    """Rows/s of StringAnalysisSerializer vs the values_list() fast path."""
+    reset_table()
+    # Small values only, so decompression does not mask serialization cost
+    load_corpus(generate_corpus(rows, seed=seed, large_fraction=0))
+    queryset = StringAnalysis.objects.all()
+    variants = [
+        ('ModelSerializer', lambda: StringAnalysisSerializer(queryset.all(), many=True).data),
+        ('fast path', lambda: fast_serialize(queryset.all())),
+    ]
+    for label, func in variants:
+        latencies = timed(func, 5)
+        stdout.write(
+            f"[{label}] rows={rows} {summarize(latencies)} "
+            f"({rows / (statistics.median(latencies) / 1000):,.0f} rows/s)"
+        )
+
+    http = client()
+    latencies = timed(lambda: http.get('/strings/'), 5)
+    stdout.write(f"GET /strings/ (all rows): {summarize(latencies)}")
+    reset_table()
+
+
+@suite('rendering')
+def rendering(rows, stdout, seed=0, **options):
+    """Render time per MB of a full list response, stdlib vs FastJSONRenderer."""
+    reset_table()
+    load_corpus(generate_unicode_corpus(rows, seed=seed))
+    data = {'data': fast_serialize(StringAnalysis.objects.all()), 'count': rows}
+    reset_table()
+
+    expected = JSONRenderer().render(data)
+    megabytes = len(expected) / 2 ** 20
+    stdout.write(f"rows={rows} body={megabytes:.1f} MiB")
+    for label, renderer in (('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())):
+        if renderer.render(data) != expected:
+            raise AssertionError(f"{label} output differs from JSONRenderer")
+        latencies = timed(lambda: renderer.render(data), 5)
+        stdout.write(
+            f"[{label}] {summarize(latencies)} "
+            f"({statistics.median(latencies) / megabytes:.2f} ms/MiB)"
+        )
+
+
+@suite('detail')
+def detail(rows, stdout, seed=0, **options):
+    """Server-side GET /strings/<value> latency: serializer vs the detail view."""
+    values = list(generate_corpus(rows, seed=seed))
+    reset_table()
+    load_corpus(values)
+    rng = random.Random(seed)
+    samples = {
+        'small': rng.sample([v for v in values if len(v) <= 8192], min(200, len(values))),
+        'large': [v for v in values if len(v) > 8192][:50],
+    }
+    renderer = FastJSONRenderer()
+    factory = RequestFactory()
+
+    def serialize(value):
+        instance = StringAnalysis.objects.get(pk=compute_sha256(value))
+        return renderer.render(StringAnalysisSerializer(instance).data)
+
+    def view(value, request):
+        response = string_detail(request, value)
+        response.render()
+        return response.content
+
+    for label, sample in samples.items():
+        if not sample:
+            continue
+        # Build requests up front: the test client's URL handling would
+        # dominate the timings for large values
+        plain = {v: factory.get('/', secure=True) for v in sample}
+        gzipped = {v: factory.get('/', secure=True, HTTP_ACCEPT_ENCODING='gzip') for v in sample}
+        variants = [
+            ('serializer', lambda: serialize(rng.choice(sample))),
+            ('view', lambda: view(*rng.choice(list(plain.items())))),
+            ('view gzip', lambda: view(*rng.choice(list(gzipped.items())))),
+        ]
+        for name, func in variants:
+            stdout.write(f"[{label}] {name:<12} {summarize(timed(func, 200))}")
+    reset_table()
+
+
+@suite('insert')
+def insert(rows, stdout, seed=0, **options):
+    """Insert throughput and index size of StringAnalysis."""
+    corpora = [
+        ('mixed', list(generate_corpus(rows, seed=seed))),
+        # Index maintenance is a larger share of the cost for small values
+        ('small', list(generate_corpus(rows, seed=seed, large_fraction=0))),
+    ]
+    for label, values in corpora:
+        single = values[:min(2000, rows)]
+        reset_table()
+
+        start = time.perf_counter()
+        for value in single:
+            StringAnalysis.objects.create(value=value)
+        create_rate = len(single) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        load_corpus(values[len(single):])
+        bulk_rate = (rows - len(single)) / (time.perf_counter() - start)
+
+        stdout.write(
+            f"[{label}] rows={rows} create() {create_rate:,.0f} rows/s, "
+            f"bulk_create() {bulk_rate:,.0f} rows/s, "
+            f"table+indexes={table_bytes() / 2 ** 20:.1f} MiB "
+            f"indexes={index_bytes() / 2 ** 20:.1f} MiB"
+        )
+    reset_table()
+
+
+@suite('lookup')
+def lookup(rows, stdout, seed=0, **options):
+    """N x GET /strings/<value> vs one POST /strings/lookup."""
+    values = list(generate_corpus(rows, seed=seed, large_fraction=0))
+    reset_table()
+    load_corpus(values)
+    rng = random.Random(seed)
+    http = client()
+    for size in (10, 100, 1000):
+        batch = rng.sample(values, min(size, len(values)))
+        one_by_one = timed(lambda: [http.get('/strings/' + quote(v)) for v in batch], 5)
+        batched = timed(
+            lambda: http.post('/strings/lookup', {'values': batch}, content_type='application/json'), 5
+        )
+        stdout.write(
+            f"values={len(batch):>5}: {len(batch)} x GET {summarize(one_by_one)} | "
+            f"POST /strings/lookup {summarize(batched)}"
+        )
+    reset_table()
+
+
+@suite('bloom')
+def bloom_filter(rows, stdout, seed=0, **options):
+    """Bloom filter build cost, and latency of misses and HEAD with and without it."""
+    values = list(generate_corpus(rows, seed=seed, large_fraction=0))
+    reset_table()
+    load_corpus(values)
+
+    start = time.perf_counter()
+    bloom.might_exist('0' * 64)
+    elapsed = time.perf_counter() - start
+    current = bloom.stored_ids._filter
+    stdout.write(
+        f"rows={rows} build {elapsed * 1000:.0f} ms, {len(current.bits) / 2 ** 20:.2f} MiB, "
+        f"{current.hash_count} hashes"
+    )
+
+    rng = random.Random(seed)
+    misses = [f"missing {i}" for i in range(1000)]
+    hits = rng.sample(values, min(1000, len(values)))
+    fp = sum(bloom.might_exist(compute_sha256(v)) for v in misses)
+    stdout.write(f"false positives: {fp}/{len(misses)}")
+
+    http = client(allow=(404,))
+    for enabled in (False, True):
+        with override_settings(STRINGS_BLOOM_FILTER=enabled):
+            miss = timed(lambda: http.get('/strings/' + quote(rng.choice(misses))), 500)
+            head = timed(lambda: http.head('/strings/' + quote(rng.choice(hits))), 500)
+        label = 'on ' if enabled else 'off'
+        stdout.write(f"[filter {label}] GET miss: {summarize(miss)} | HEAD hit: {summarize(head)}")
+    reset_table()
+
+
+@suite('response_cache')
+def response_cache(rows, stdout, seed=0, **options):
+    """Latency of repeated list and natural language queries with and without the cache."""
+    reset_table()
+    load_corpus(generate_corpus(rows, seed=seed, large_fraction=0))
+    http = client()
+    queries = (
+        ('list palindromes', '/strings/?is_palindrome=true'),
+        ('list one page', '/strings/?limit=100&min_length=20'),
+        ('NL single word', '/strings/filter-by-natural-language?query=single%20word'),
+    )
+    for label, url in queries:
+        with override_settings(STRINGS_LIST_CACHE_BYTES=0):
+            uncached = timed(lambda: http.get(url), 20)
+        with override_settings(STRINGS_LIST_CACHE_BYTES=256 * 1024 * 1024):
+            http.get(url)
+            cached = timed(lambda: http.get(url), 20)
+        stdout.write(f"{label:<16}: cache off {summarize(uncached)} | warm {summarize(cached)}")
+    reset_table()
+
+
+@suite('detail_cache')
+def detail_cache(rows, stdout, seed=0, **options):
+    """GET /strings/<value> latency under skewed traffic with and without the detail cache."""
+    values = list(generate_corpus(rows, seed=seed, large_fraction=0.01))
+    reset_table()
+    load_corpus(values)
+    rng = random.Random(seed)
+    # Zipf-like popularity: a few hundred strings get most requests
+    hot = rng.sample(values, min(500, len(values)))
+    weights = [1 / (rank + 1) for rank in range(len(hot))]
+    requests = ['/strings/' + quote(v) for v in rng.choices(hot, weights, k=2000)]
+    http = client()
+    for size in (0, 32 * 1024 * 1024):
+        by_status = {'HIT': [], 'MISS': []}
+        names = {'HIT': 'hits', 'MISS': 'misses'}
+        with override_settings(STRINGS_DETAIL_CACHE_BYTES=size):
+            for url in requests:
+                start = time.perf_counter()
+                response = http.get(url)
+                by_status[response['X-Cache']].append((time.perf_counter() - start) * 1000)
+        label = f"cache {size // 2 ** 20} MiB" if size else "cache off"
+        stdout.write(
+            f"{label:<13}: all {summarize(by_status['HIT'] + by_status['MISS'])}"
+            + ''.join(
+                f" | {len(latencies)} {names[key]} {summarize(latencies)}"
+                for key, latencies in by_status.items() if latencies and size
+            )
+        )
+    reset_table()
+
+
+@suite('columnar')
+def columnar_index(rows, stdout, seed=0, **options):
+    """Columnar index build cost, and list filter latency with and without it."""
+    if columnar.np is None:
+        stdout.write("NumPy is not installed; the columnar index is unavailable")
+        return
+    reset_table()
+    load_corpus(generate_corpus(rows, seed=seed, large_fraction=0))
+
+    columnar.index.invalidate()
+    start = time.perf_counter()
+    columnar.index.match({}, stats.generation())
+    elapsed = time.perf_counter() - start
+    columns = columnar.index._columns
+    size = sum(getattr(columns, name).nbytes for name in (
+        'ids', 'length', 'word_count', 'is_palindrome', 'chars_low', 'chars_high'))
+    stdout.write(f"rows={rows} build {elapsed * 1000:.0f} ms, {size / 2 ** 20:.1f} MiB")
+
+    http = client()
+    queries = (
+        '/strings/?is_palindrome=true',
+        '/strings/?word_count=3&contains_character=q',
+        '/strings/?min_length=40&max_length=41',
+        '/strings/?limit=50&word_count=2&contains_character=x',
+    )
+    with override_settings(STRINGS_LIST_CACHE_BYTES=0):
+        for url in queries:
+            results = {}
+            for enabled in (False, True):
+                with override_settings(STRINGS_COLUMNAR_INDEX=enabled):
+                    results[enabled] = timed(lambda: http.get(url), 20)
+            count = http.get(url).json()['count']
+            stdout.write(
+                f"{url[9:]:<42} ({count:>5} rows): SQL {summarize(results[False])} | "
+                f"index {summarize(results[True])}"
+            )
+    reset_table()
+
+
+@suite('precompiled')
+def precompiled_queries(rows, stdout, seed=0, **options):
+    """Per-request overhead of list queries through the ORM vs precompiled SQL."""
+    reset_table()
+    load_corpus(generate_corpus(rows, seed=seed, large_fraction=0))
+
+    filters = {'is_palindrome': True, 'min_length': 5}
+    start = time.perf_counter()
+    precompiled.FilterQuery(precompiled._split(filters)[0])
+    stdout.write(f"rows={rows} compiling one shape: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # Index-backed queries, whose execution is cheap: the query alone,
+    # building and compiling it vs binding the parameters
+    key = lambda row: [row[FAST_FIELDS.index('created_at')], row[FAST_FIELDS.index('id')]]
+    for filters in ({}, {'word_count': 1}, {'min_length': 10, 'max_length': 30}):
+        query = precompiled.get(filters)
+        orm = timed(lambda: KeysetPaginator().paginate(
+            filter_queryset(filters).values_list(*FAST_FIELDS), 20, key=key), 500)
+        bound = timed(lambda: query.page(filters, 20, key=key), 500)
+        stdout.write(
+            f"page of 20 {json.dumps(filters):<36} query only: "
+            f"ORM {summarize(orm)} | precompiled {summarize(bound)}"
+        )
+
+    http = client()
+    first = http.get('/strings/?limit=20&count=none').json()
+    queries = (
+        '/strings/?limit=20&count=none',
+        '/strings/?limit=20&count=none&cursor=' + first['next'],
+        '/strings/?limit=20&count=none&word_count=1',
+        '/strings/?limit=20&count=none&min_length=10&max_length=30',
+    )
+    with override_settings(STRINGS_LIST_CACHE_BYTES=0, STRINGS_COLUMNAR_INDEX=False):
+        for url in queries:
+            results = {}
+            for enabled in (False, True):
+                with override_settings(STRINGS_PRECOMPILED_QUERIES=enabled):
+                    http.get(url)
+                    results[enabled] = timed(lambda: http.get(url), 200)
+            count = http.get(url).json()['count']
+            stdout.write(
+                f"{url[9:50]:<42} ({count if count is not None else '-':>5} rows): "
+                f"ORM {summarize(results[False])} | precompiled {summarize(results[True])}"
+            )
+    reset_table()
+
+
+@suite('ordering')
+def ordering(rows, stdout, seed=0, **options):
+    """Top-K pages read off the ordering indexes vs a sort of the whole table."""
+    reset_table()
+    load_corpus(generate_corpus(rows, seed=seed, large_fraction=0))
+
+    for name, fields in ORDERINGS.items():
+        column, descending = fields[0].lstrip('-'), fields[0].startswith('-')
+        # `column + 0` (or `column || ''`: SQLite stores timestamps as text)
+        # keeps the database from using the index
+        if column == 'created_at':
+            unindexed = Func(F(column), template="(%(expressions)s || '')")
+        else:
+            unindexed = ExpressionWrapper(F(column) + 0, output_field=IntegerField())
+        unindexed = unindexed.desc() if descending else unindexed.asc()
+        tie_break = '-id' if descending else 'id'
+        indexed = timed(lambda: list(StringAnalysis.objects.order_by(*fields).values_list('id')[:10]), 50)
+        sorted_ = timed(
+            lambda: list(StringAnalysis.objects.order_by(unindexed, tie_break).values_list('id')[:10]), 10
+        )
+        stdout.write(f"top 10 by {name:<19} index {summarize(indexed)} | sort {summarize(sorted_)}")
+
+    http = client()
+    with override_settings(STRINGS_LIST_CACHE_BYTES=0, STRINGS_COLUMNAR_INDEX=False):
+        for url in (
+            '/strings/?ordering=-length&limit=10&count=none',
+            '/strings/filter-by-natural-language?query=longest%2010&count=none',
+            '/strings/?ordering=-unique_characters&limit=10&count=none&word_count=2',
+        ):
+            stdout.write(f"{url[9:]:<64} {summarize(timed(lambda: http.get(url), 50))}")
+    reset_table()
+
+
+@suite('facets')
+def facet_counts(rows, stdout, seed=0, **options):
+    """Facet counts in one request vs one counting list call per facet value."""
+    reset_table()
+    load_corpus(generate_corpus(rows, seed=seed, large_fraction=0))
+    http = client()
+    word_counts = sorted(set(StringAnalysis.objects.values_list('word_count', flat=True)))
+    for label, filters in (('all strings', ''), ('min_length=20', '&min_length=20')):
+        # What a client without facets does: count each facet value separately
+        urls = [f'/strings/?limit=1&word_count={n}{filters}' for n in word_counts]
+        urls += [
+            f"/strings/?limit=1&length_buckets={low}-{'' if high is None else high}{filters}"
+            for low, high in facets.LENGTH_BUCKETS
+        ]
+        urls += [f'/strings/?limit=1&is_palindrome={value}{filters}' for value in ('true', 'false')]
+        faceted = f'/strings/?limit=1&facets=word_count,length_bucket,is_palindrome{filters}'
+        with override_settings(STRINGS_LIST_CACHE_BYTES=0, STRINGS_COLUMNAR_INDEX=False):
+            separate = timed(lambda: [http.get(url) for url in urls], 10)
+            one = timed(lambda: http.get(faceted), 20)
+        with override_settings(STRINGS_LIST_CACHE_BYTES=256 * 1024 * 1024, STRINGS_COLUMNAR_INDEX=False):
+            http.get(faceted)
+            cached = timed(lambda: http.get(faceted), 20)
+        stdout.write(
+            f"{label:<14} {len(urls)} list calls {summarize(separate)} | facets {summarize(one)}"
+            f" | cached {summarize(cached)}"
+        )
+    reset_table()
+
+
+@suite('corpus_stats')
+def corpus_statistics(rows, stdout, seed=0, **options):
+    """GET /corpus/stats from the rollup vs a scan of every row, and rebuild time."""
+    reset_table()
+    load_corpus(generate_corpus(rows, seed=seed, large_fraction=0))
+    http = client()
+
+    def scan():
+        occurrences = {}
+        for characters, packed in StringAnalysis.objects.values_list('characters', 'character_counts').iterator():
+            for character, count in zip(characters, unpack_counts(packed)):
+                occurrences[character] = occurrences.get(character, 0) + count
+        return occurrences
+
+    stdout.write(f"rows={rows} GET /corpus/stats {summarize(timed(lambda: http.get('/corpus/stats'), 50))}")
+    stdout.write(f"rows={rows} scan of character_counts {summarize(timed(scan, 3))}")
+    for workers in (1, 4):
+        latencies = timed(lambda: stats.rebuild(chunks=16, workers=workers), 3)
+        stdout.write(f"rebuild, 16 chunks, {workers} worker(s): {summarize(latencies)}")
+    reset_table()
+
+
+@suite('snapshot')
+def snapshot_serving(rows, stdout, seed=0, **options):
+    """Snapshot export cost, and detail and list latency from the database vs the snapshot."""
+    values = list(generate_corpus(rows, seed=seed, large_fraction=0.01))
+    reset_table()
+    load_corpus(values)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'corpus.snapshot')
+        start = time.perf_counter()
+        snapshot.export(path)
+        elapsed = time.perf_counter() - start
+        open_time = timed(lambda: snapshot.Snapshot(path), 20)
+        stdout.write(
+            f"rows={rows} export {elapsed:.1f} s, {os.path.getsize(path) / 2 ** 20:.1f} MiB "
+            f"(table {table_bytes() / 2 ** 20:.1f} MiB), open {summarize(open_time)}"
+        )
+
+        rng = random.Random(seed)
+        details = ['/strings/' + quote(v) for v in rng.sample(values, min(500, len(values)))]
+        queries = (
+            '/strings/?word_count=2&contains_character=x',
+            '/strings/?limit=100&min_length=20',
+            '/strings/?limit=100&is_palindrome=false&cursor=',
+        )
+        http = client()
+        with override_settings(STRINGS_LIST_CACHE_BYTES=0, STRINGS_DETAIL_CACHE_BYTES=0,
+                               STRINGS_COLUMNAR_INDEX=False):
+            # A cursor a few pages deep, the same for both sources
+            page = http.get(queries[2][:-8]).json()
+            for _ in range(5):
+                page = http.get(queries[2] + page['next']).json()
+            queries = queries[:2] + (queries[2] + page['previous'],)
+
+            for source, path_setting in (('database', ''), ('snapshot', path)):
+                with override_settings(STRINGS_SNAPSHOT_PATH=path_setting):
+                    urls = iter(details * 2)
+                    detail = timed(lambda: http.get(next(urls)), len(details) * 2)
+                    stdout.write(f"[{source}] GET /strings/<value>: {summarize(detail)}")
+                    for url in queries:
+                        latencies = timed(lambda: http.get(url), 20)
+                        stdout.write(f"[{source}] {url[9:55]:<46}: {summarize(latencies)}")
+    reset_table()
@@ -0,0 +1,180 @@
+"""
+Per-process Bloom filter of stored StringAnalysis ids.
+
+Most lookups of values that were never stored (404s, and the duplicate
+check of every create) are answered from memory: a Bloom filter has no
+false negatives, so "not in the filter" means "not in the table".
+
+The filter is built from the primary key column on first use. Each process
+adds the strings it stores itself, and picks up those stored by other
+processes by polling for rows stamped with a later generation than it has
+read (see stats.changed_since), at most every STRINGS_SYNC_INTERVAL
+seconds. Deleted ids are only dropped when the
+filter is rebuilt, every STRINGS_BLOOM_REBUILD_INTERVAL seconds; until then
+they are false positives, which only cost the query they would have cost
+anyway.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import stats
+from .models import StringAnalysis
+
+# Filters are sized for twice the current row count, and at least this many
+MIN_CAPACITY = 100_000
+
+
+class BloomFilter:
+    """
+    A Bloom filter of SHA-256 hex digests.
+
+    The digests are already uniformly distributed, so the bit positions are
+    derived from the digest itself (double hashing) instead of hashing again.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, digest):
+        """Add a digest. `count` only grows for digests not already present."""
+        bits, size = self.bits, self.size
+        h = int(digest[:32], 16)
+        position, step = h >> 64, (h & 0xFFFFFFFFFFFFFFFF) | 1
+        added = False
+        for _ in range(self.hash_count):
+            position %= size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+            position += step
+        if added:
+            self.count += 1
+
+    def __contains__(self, digest):
+        bits, size = self.bits, self.size
+        h = int(digest[:32], 16)
+        position, step = h >> 64, (h & 0xFFFFFFFFFFFFFFFF) | 1
+        for _ in range(self.hash_count):
+            position %= size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            position += step
+        return True
+
+
+class StoredIdFilter:
+    """A BloomFilter of the stored ids, kept in sync with the table."""
+
+    def __init__(self):
+        self._filter = None
+        # Serializes changes to the current filter; held only briefly
+        self._lock = threading.Lock()
+        # Held while a new filter is built, so only one thread builds
+        self._build_lock = threading.Lock()
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        # Latest generation of the rows added
+        self._generation = 0
+
+    def might_contain(self, pk):
+        """Return False only if no StringAnalysis with this id exists."""
+        return pk in self._refresh()
+
+    def add(self, pk):
+        """Record a stored id."""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(pk)
+
+    def invalidate(self):
+        """Discard the filter; it is rebuilt on next use."""
+        with self._lock:
+            self._filter = None
+
+    def _refresh(self):
+        """Build, rebuild or sync the filter as due, and return it."""
+        now = time.monotonic()
+        current = self._filter
+        if current is None:
+            with self._build_lock:
+                current = self._filter
+                if current is None:
+                    current = self._rebuild()
+            return current
+
+        if (now - self._built_at >= settings.STRINGS_BLOOM_REBUILD_INTERVAL
+                or current.count > current.capacity):
+            # Other threads keep using the current filter meanwhile
+            if self._build_lock.acquire(blocking=False):
+                try:
+                    return self._rebuild()
+                finally:
+                    self._build_lock.release()
+
+        if now - self._synced_at >= settings.STRINGS_SYNC_INTERVAL:
+            with self._lock:
+                if now - self._synced_at >= settings.STRINGS_SYNC_INTERVAL:
+                    self._sync(current)
+        return current
+
+    def _rebuild(self):
+        started = stats.generation()
+        new = BloomFilter(
+            max(stats.row_count() * 2, MIN_CAPACITY), settings.STRINGS_BLOOM_ERROR_RATE
+        )
+        # A plain cursor: the ORM's per-row overhead would dominate the build
+        table = connection.ops.quote_name(StringAnalysis._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id FROM {table}")
+            add = new.add
+            while rows := cursor.fetchmany(10000):
+                for (pk,) in rows:
+                    add(pk)
+
+        # Catch up with rows committed during the scan, and swap the filter
+        # in while holding the lock so no add() can be lost in between
+        with self._lock:
+            self._generation = started
+            self._sync(new)
+            self._filter = new
+            self._built_at = time.monotonic()
+        return new
+
+    def _sync(self, bloom):
+        """Add rows stored since the last sync. Called with _lock held."""
+        created, self._generation = stats.changed_since(
+            StringAnalysis.objects.all(), self._generation, 'pk'
+        )
+        for (pk,) in created:
+            bloom.add(pk)
+        self._synced_at = time.monotonic()
+
+
+stored_ids = StoredIdFilter()
+
+
+def might_exist(pk):
+    """
+    Return False if no StringAnalysis with this id exists.
+
+    True means the row may exist and the database has to be asked. Always
+    True when STRINGS_BLOOM_FILTER is off.
+    """
+    if not settings.STRINGS_BLOOM_FILTER:
+        return True
+    return stored_ids.might_contain(pk)
+
+
+def record_created(pk):
+    """Add an id stored by this process."""
+    if settings.STRINGS_BLOOM_FILTER:
+        stored_ids.add(pk)
@@ -0,0 +1,241 @@
+"""
+In-process caches of rendered response bodies.
+
+Each process keeps its own bounded LRU caches. List response keys include
+everything a body depends on, including the corpus generation from
+CorpusStats, so a write invalidates them by changing the key: nothing is
+purged, old entries simply age out.
+
+Detail responses are keyed by id alone. Deleting a string evicts it from
+the deleting process's cache and records the id in StringDeletion, stamped
+with the generation of the deletion; other processes poll that table for
+later generations at most every STRINGS_SYNC_INTERVAL seconds, the way the
+Bloom filter polls for new rows.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import stats
+from .models import StringDeletion
+
+# Caches reported by GET /cache/stats
+CACHE_NAMES = ('list', 'detail')
+
+
+class LRUCache:
+    """
+    A thread-safe LRU cache of bytes values, bounded by their total size.
+
+    Other values can be stored with an explicit `size`. Values larger than
+    `max_entry_bytes` are not stored. With `ttl`, entries
+    expire that many seconds after they were stored. Hits and misses are
+    counted per label, so one cache can serve several endpoints.
+    """
+
+    def __init__(self, max_bytes, max_entry_bytes=None, ttl=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes or max_bytes, max_bytes)
+        self.ttl = ttl
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, label='default'):
+        """Return the value stored under `key`, or None."""
+        with self._lock:
+            counters = self._counters.setdefault(label, [0, 0])
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                counters[1] += 1
+                return None
+            self._entries.move_to_end(key)
+            counters[0] += 1
+            return entry[0]
+
+    def set(self, key, value, size=None):
+        """Store `value`, evicting least recently used entries as needed."""
+        if size is None:
+            size = len(value)
+        if size > self.max_entry_bytes:
+            return False
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return True
+
+    def delete(self, key):
+        """Remove `key`. Returns True if it was present."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+            self.bytes = 0
+            self.evictions = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self):
+        """Return size and per-label hit rate figures."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'endpoints': {
+                    label: {
+                        'hits': hits,
+                        'misses': misses,
+                        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+                    }
+                    for label, (hits, misses) in self._counters.items()
+                },
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name):
+    """
+    Return the process-wide cache `name`, or None if it is disabled.
+
+    Created on first use from the STRINGS_<NAME>_CACHE_BYTES (0 disables
+    the cache), STRINGS_<NAME>_CACHE_MAX_ENTRY_BYTES and, if defined,
+    STRINGS_<NAME>_CACHE_TTL settings.
+    """
+    cache = _caches.get(name)
+    if cache is not None:
+        return cache
+    prefix = f'STRINGS_{name.upper()}_CACHE'
+    max_bytes = getattr(settings, f'{prefix}_BYTES')
+    if max_bytes <= 0:
+        return None
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = LRUCache(
+                max_bytes,
+                getattr(settings, f'{prefix}_MAX_ENTRY_BYTES', None),
+                getattr(settings, f'{prefix}_TTL', None),
+            )
+        return _caches[name]
+
+
+@receiver(setting_changed)
+def _reset_caches(setting, **kwargs):
+    """Recreate the caches when their settings change (in tests)."""
+    if setting.startswith('STRINGS_') and '_CACHE_' in setting:
+        with _caches_lock:
+            _caches.clear()
+
+
+class DeletionFeed:
+    """
+    Evicts cached detail responses of strings deleted by other processes.
+    
+    StringDeletion rows are kept for STRINGS_DETAIL_CACHE_TTL seconds plus
+    STRINGS_SYNC_INTERVAL: by then every entry cached before the deletion
+    has expired, even in a process that has not synced since.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._synced_at = None
+        self._pruned_at = None
+        # Latest generation of the deletions read
+        self._generation = None
+    
+    def sync(self, detail_cache):
+        """Evict ids deleted since the last sync, if one is due."""
+        interval = settings.STRINGS_SYNC_INTERVAL
+        if self._synced_at is not None and time.monotonic() - self._synced_at < interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._synced_at is not None and now - self._synced_at < interval:
+                return
+            if self._generation is None:
+                # Nothing is cached before the first sync
+                self._generation = stats.generation()
+            deleted, self._generation = stats.changed_since(
+                StringDeletion.objects.all(), self._generation, 'string_id'
+            )
+            for (pk,) in deleted:
+                detail_cache.delete(pk)
+            self._synced_at = now
+    
+    def record(self, pk, generation):
+        """Publish the deletion of `pk`, and prune expired records now and then."""
+        StringDeletion.objects.create(string_id=pk, generation=generation)
+        ttl = settings.STRINGS_DETAIL_CACHE_TTL
+        now = time.monotonic()
+        if self._pruned_at is None or now - self._pruned_at >= ttl:
+            self._pruned_at = now
+            retention = timedelta(seconds=ttl + settings.STRINGS_SYNC_INTERVAL)
+            StringDeletion.objects.filter(deleted_at__lt=timezone.now() - retention).delete()
+
+
+deletions = DeletionFeed()
+
+
+def get_detail(pk):
+    """Return the cached (json, gzip) detail bodies of `pk`, or None."""
+    detail_cache = get_cache('detail')
+    if detail_cache is None:
+        return None
+    deletions.sync(detail_cache)
+    return detail_cache.get(pk, 'detail')
+
+
+def set_detail(pk, content, gzip_content):
+    """Cache the detail bodies of `pk`; either may be None."""
+    detail_cache = get_cache('detail')
+    if detail_cache is None:
+        return
+    content = bytes(content) if content is not None else None
+    gzip_content = bytes(gzip_content) if gzip_content is not None else None
+    size = len(content or b'') + len(gzip_content or b'')
+    detail_cache.set(pk, (content, gzip_content), size)
+
+
+def record_deletion(pk, generation):
+    """
+    Evict a deleted string here and tell the other processes to.
+    `generation` is the corpus generation the deletion produced.
+
+    The deletion is recorded even if this process caches no details: other
+    processes may.
+    """
+    detail_cache = get_cache('detail')
+    if detail_cache is not None:
+        detail_cache.delete(pk)
+    deletions.record(pk, generation)
@@ -0,0 +1,306 @@
+"""
+Per-process columnar index of the filterable StringAnalysis attributes.
+
+List filters (length ranges, word counts, palindrome flag, contained
+characters) are evaluated with NumPy over in-memory columns, and only the
+matching rows are then fetched from the database, by primary key. Without
+NumPy, or with STRINGS_COLUMNAR_INDEX off, the filters run in SQL as
+before.
+
+The index is built from the table on first use. It is brought up to date
+whenever the corpus generation (see stats.py) has changed since its last
+sync, by reading the rows stamped with a later generation (see
+stats.changed_since), so it never misses a row a query at the same
+generation could see. Deleted rows are left in place
+until the next rebuild, every STRINGS_COLUMNAR_REBUILD_INTERVAL seconds:
+the database only returns rows that still exist. Rebuilds run in one
+request thread while the others keep using the current columns.
+
+Snapshots (snapshot.py) evaluate filters over their mapped columns with the
+same helpers: char_bits(), split_character_filters(), column_mask() and,
+without NumPy, row_predicate().
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import stats
+from .filters import FIELDS, character_filters
+from .models import StringAnalysis
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# Filters the index can evaluate
+FILTERS = frozenset(FIELDS)
+
+# Rows read per fetchmany() while building
+_BUILD_BATCH_SIZE = 10000
+
+
+def char_bits(characters):
+    """Return the ASCII characters of `characters` as a 128-bit mask (low, high)."""
+    mask = 0
+    for ch in characters:
+        code = ord(ch)
+        if code < 128:
+            mask |= 1 << code
+    return mask & 0xFFFFFFFFFFFFFFFF, mask >> 64
+
+
+def split_character_filters(filters):
+    """
+    Split the character filters of `filters` into those evaluated on the
+    ASCII masks, as ((low, high), all_required), and the (characters,
+    all_required) checks left for characters outside ASCII.
+    """
+    masked, unmasked = [], []
+    for characters, all_required in character_filters(filters):
+        others = [ch for ch in characters if ord(ch) >= 128]
+        if all_required or not others:
+            masked.append((char_bits(characters), all_required))
+        if others:
+            unmasked.append((others if all_required else characters, all_required))
+    return masked, unmasked
+
+
+def column_mask(filters, masked, length, word_count, is_palindrome, chars_low, chars_high):
+    """
+    Return the NumPy mask of the rows of the given columns matching
+    `filters`, with the character filters `masked` by split_character_filters().
+    """
+    mask = np.ones(len(length), dtype=np.bool_)
+    if 'is_palindrome' in filters:
+        mask &= is_palindrome == filters['is_palindrome']
+    if 'min_length' in filters:
+        mask &= length >= filters['min_length']
+    if 'max_length' in filters:
+        mask &= length <= filters['max_length']
+    if 'word_count' in filters:
+        mask &= word_count == filters['word_count']
+    if 'word_count__in' in filters:
+        mask &= np.isin(word_count, filters['word_count__in'])
+    if 'length_buckets' in filters:
+        in_buckets = np.zeros(len(length), dtype=np.bool_)
+        for low, high in filters['length_buckets']:
+            in_bucket = np.ones(len(length), dtype=np.bool_)
+            if low is not None:
+                in_bucket &= length >= low
+            if high is not None:
+                in_bucket &= length <= high
+            in_buckets |= in_bucket
+        mask &= in_buckets
+    for (low, high), all_required in masked:
+        low, high = np.uint64(low), np.uint64(high)
+        if all_required:
+            mask &= ((chars_low & low) == low) & ((chars_high & high) == high)
+        else:
+            mask &= ((chars_low & low) | (chars_high & high)) != 0
+    return mask
+
+
+def row_predicate(filters, masked):
+    """
+    Return a function of (length, word_count, is_palindrome, chars_low,
+    chars_high) telling whether one row matches, like column_mask().
+    """
+    checks = []
+    if 'is_palindrome' in filters:
+        checks.append(lambda row, v=filters['is_palindrome']: bool(row[2]) == v)
+    if 'min_length' in filters:
+        checks.append(lambda row, v=filters['min_length']: row[0] >= v)
+    if 'max_length' in filters:
+        checks.append(lambda row, v=filters['max_length']: row[0] <= v)
+    if 'word_count' in filters:
+        checks.append(lambda row, v=filters['word_count']: row[1] == v)
+    if 'word_count__in' in filters:
+        checks.append(lambda row, v=set(filters['word_count__in']): row[1] in v)
+    if 'length_buckets' in filters:
+        checks.append(lambda row, buckets=filters['length_buckets']: any(
+            (low is None or row[0] >= low) and (high is None or row[0] <= high)
+            for low, high in buckets
+        ))
+    for (low, high), all_required in masked:
+        if all_required:
+            checks.append(lambda row, low=low, high=high: row[3] & low == low and row[4] & high == high)
+        else:
+            checks.append(lambda row, low=low, high=high: bool(row[3] & low or row[4] & high))
+    return lambda *row: all(check(row) for check in checks)
+
+
+class _Columns:
+    """
+    Growable column arrays. Rows are appended in place; readers take
+    `snapshot()` and never see a partially appended row.
+    """
+
+    def __init__(self, capacity):
+        capacity = max(capacity, 1024)
+        self.ids = np.empty(capacity, dtype='S64')
+        self.length = np.empty(capacity, dtype=np.int64)
+        self.word_count = np.empty(capacity, dtype=np.int64)
+        self.is_palindrome = np.empty(capacity, dtype=np.bool_)
+        # One bit per ASCII character: codes 0-63 in chars_low, 64-127 in chars_high
+        self.chars_low = np.empty(capacity, dtype=np.uint64)
+        self.chars_high = np.empty(capacity, dtype=np.uint64)
+        self.size = 0
+
+    def append(self, rows):
+        """Append (id, length, word_count, is_palindrome, characters) rows."""
+        if not rows:
+            return
+        start, end = self.size, self.size + len(rows)
+        if end > len(self.ids):
+            self._grow(max(end, len(self.ids) * 2))
+        ids, length, word_count, is_palindrome, characters = zip(*rows)
+        self.ids[start:end] = ids
+        self.length[start:end] = length
+        self.word_count[start:end] = word_count
+        self.is_palindrome[start:end] = is_palindrome
+        self.chars_low[start:end], self.chars_high[start:end] = zip(*map(char_bits, characters))
+        # Publish the rows only once they are complete
+        self.size = end
+
+    def _grow(self, capacity):
+        for name in ('ids', 'length', 'word_count', 'is_palindrome', 'chars_low', 'chars_high'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def snapshot(self):
+        size = self.size
+        return (
+            self.ids[:size], self.length[:size], self.word_count[:size],
+            self.is_palindrome[:size], self.chars_low[:size], self.chars_high[:size],
+        )
+
+
+class ColumnarIndex:
+    """The filterable columns of every stored row, kept in sync with the table."""
+
+    def __init__(self):
+        self._columns = None
+        # Serializes syncs and the swap of rebuilt columns; held only briefly
+        self._lock = threading.Lock()
+        # Held while new columns are built, so only one thread builds
+        self._build_lock = threading.Lock()
+        # Generation up to which every stored row has been read
+        self._generation = None
+        self._built_at = 0.0
+
+    def match(self, filters, generation):
+        """
+        Return the ids of the rows matching `filters`, or None if the index
+        cannot evaluate them (or would match more than
+        STRINGS_COLUMNAR_MAX_MATCHES rows, which SQL handles better).
+
+        `generation` is the corpus generation read before the query.
+        """
+        if not filters.keys() <= FILTERS:
+            return None
+        masked, unmasked = split_character_filters(filters)
+        if unmasked:
+            return None
+
+        columns = self._refresh(generation)
+        ids, *rest = columns.snapshot()
+        mask = column_mask(filters, masked, *rest)
+        matched = ids[mask]
+        if len(matched) > settings.STRINGS_COLUMNAR_MAX_MATCHES:
+            return None
+        return [pk.decode() for pk in matched]
+
+    def invalidate(self):
+        """Discard the index; it is rebuilt on next use."""
+        with self._lock:
+            self._columns = None
+
+    def _refresh(self, generation):
+        """
+        Build, rebuild or sync the index as due, and return its columns.
+
+        A `generation` older than the index's is already covered: it was
+        read before a write the index has synced since.
+        """
+        if self._columns is None:
+            with self._build_lock:
+                if self._columns is None:
+                    self._rebuild(generation)
+        elif (time.monotonic() - self._built_at >= settings.STRINGS_COLUMNAR_REBUILD_INTERVAL
+              or self._regressed(generation)):
+            # Other threads keep using the current columns meanwhile
+            if self._build_lock.acquire(blocking=False):
+                try:
+                    self._rebuild(generation)
+                finally:
+                    self._build_lock.release()
+
+        columns = self._columns
+        if columns is not None and generation > self._generation:
+            with self._lock:
+                if generation > self._generation:
+                    self._generation = self._sync(self._columns, self._generation, generation)
+                columns = self._columns
+        return columns
+
+    def _regressed(self, generation):
+        """
+        Whether the corpus generation went back (the database was restored
+        or reloaded), rather than `generation` being read before a write.
+        """
+        return generation < self._generation and stats.generation() < self._generation
+
+    def _rebuild(self, generation):
+        """Read the whole table and swap the new columns in. Called with _build_lock held."""
+        columns = _Columns(stats.row_count() + 1024)
+        table = connection.ops.quote_name(StringAnalysis._meta.db_table)
+        generation_column = connection.ops.quote_name(StringAnalysis._meta.get_field('generation').column)
+        # A plain cursor: the ORM's per-row overhead would dominate the build.
+        # Every row up to `generation` has committed; later ones, including
+        # any committed during the scan, are read by the next sync
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, length, word_count, is_palindrome, characters FROM {table} "
+                f"WHERE {generation_column} <= %s",
+                [generation],
+            )
+            while rows := cursor.fetchmany(_BUILD_BATCH_SIZE):
+                columns.append(rows)
+
+        # Catch up with rows stored during the scan, and swap the columns in
+        # while holding the lock so no sync can be lost in between
+        with self._lock:
+            self._generation = self._sync(columns, generation, generation)
+            self._columns = columns
+            self._built_at = time.monotonic()
+
+    def _sync(self, columns, since, generation):
+        """
+        Append the rows stored after generation `since` to `columns`, and
+        return the generation they are then in sync with: `generation` or
+        later. Called with _lock held.
+        """
+        created, latest = stats.changed_since(
+            StringAnalysis.objects.all(), since,
+            'id', 'length', 'word_count', 'is_palindrome', 'characters',
+        )
+        columns.append(created)
+        return max(latest, generation)
+
+
+index = ColumnarIndex()
+
+
+def match(filters, generation):
+    """
+    Return the ids of the rows matching the normalized list `filters`, or
+    None if they have to be evaluated in SQL.
+    """
+    if np is None or not settings.STRINGS_COLUMNAR_INDEX:
+        return None
+    return index.match(filters, generation)
@@ -0,0 +1,95 @@
+"""
+Facet counts of the list endpoints.
+
+With `facets=word_count,length_bucket,is_palindrome`, a list response also
+counts the matching strings per value of each named facet:
+
+    "facets": {
+        "word_count": {"1": 12, "2": 30},
+        "length_bucket": {"0-5": 3, "6-10": 20, ..., "101-": 0},
+        "is_palindrome": {"true": 4, "false": 38}
+    }
+
+Length buckets are labelled like `length_buckets` filter ranges, so a
+bucket can be selected by passing its label back. All facets of a request
+are counted by one grouped aggregate query.
+"""
+import bisect
+from collections import Counter
+
+from django.db.models import Case, Count, F, IntegerField, Value, When
+
+FACETS = ('word_count', 'length_bucket', 'is_palindrome')
+
+# Inclusive length ranges of the length_bucket facet (None: unbounded)
+LENGTH_BUCKETS = ((0, 5), (6, 10), (11, 20), (21, 50), (51, 100), (101, None))
+# First length of each bucket, for bisection
+BUCKET_STARTS = [low for low, _ in LENGTH_BUCKETS]
+
+
+class FacetError(ValueError):
+    """Raised for an invalid facets query parameter."""
+
+
+def parse_facets(query_params):
+    """Return the facets named by the `facets` query parameter, in FACETS order."""
+    names = set(filter(None, query_params.get('facets', '').split(',')))
+    if names - set(FACETS):
+        raise FacetError(f"facets must be a comma-separated list of: {', '.join(FACETS)}.")
+    return tuple(name for name in FACETS if name in names)
+
+
+def bucket_of(length):
+    """Return the index in LENGTH_BUCKETS of the bucket holding `length`."""
+    return bisect.bisect_right(BUCKET_STARTS, length) - 1
+
+
+def _bucket_label(bucket):
+    low, high = bucket
+    return f"{low}-{'' if high is None else high}"
+
+
+# Facet name -> expression grouped on
+_EXPRESSIONS = {
+    'word_count': F('word_count'),
+    'length_bucket': Case(
+        *(When(length__lte=high, then=Value(i)) for i, (_, high) in enumerate(LENGTH_BUCKETS[:-1])),
+        default=Value(len(LENGTH_BUCKETS) - 1),
+        output_field=IntegerField(),
+    ),
+    'is_palindrome': F('is_palindrome'),
+}
+
+
+def count_queryset(queryset, names):
+    """
+    Count the rows of `queryset` per value of each facet in `names`, with one
+    GROUP BY over all of them. Returns {name: Counter of values}; length
+    buckets are counted by index in LENGTH_BUCKETS.
+    """
+    groups = (
+        queryset.order_by()
+        .values(**{f'facet_{name}': _EXPRESSIONS[name] for name in names})
+        .annotate(facet_count=Count('*'))
+        .values_list(*(f'facet_{name}' for name in names), 'facet_count')
+    )
+    counts = {name: Counter() for name in names}
+    for *values, count in groups:
+        for name, value in zip(names, values):
+            counts[name][value] += count
+    return counts
+
+
+def render(counts):
+    """Return the `facets` response field for counts from count_queryset()."""
+    facets = {}
+    for name, values in counts.items():
+        if name == 'word_count':
+            facets[name] = {str(value): values[value] for value in sorted(values)}
+        elif name == 'length_bucket':
+            facets[name] = {
+                _bucket_label(bucket): values[i] for i, bucket in enumerate(LENGTH_BUCKETS)
+            }
+        else:
+            facets[name] = {'true': values[True], 'false': values[False]}
+    return facets
@@ -0,0 +1,103 @@
+"""
+Filters of the list endpoints.
+
+GET /strings/ and the natural language filter both reduce their query to
+the same dict of filters (`filters_applied` / `parsed_filters`), which is
+turned into a queryset here. Multi-valued filters hold sorted, distinct
+lists:
+
+    word_count__in   [1, 2, 3]             word_count is any of them
+    contains_all     ['a', 'b']            characters includes all of them
+    contains_any     ['a', 'b']            characters includes any of them
+    length_buckets   [[1, 5], [50, None]]  length is in any inclusive range
+                                           (None: unbounded)
+
+Character filters are case-sensitive on every backend, like the columnar
+index and snapshots that also evaluate them. Django's `contains` lookup
+is not on SQLite (LIKE ignores ASCII case there), so they use
+ContainsCharacter instead.
+"""
+import operator
+from functools import reduce
+
+from django.db.models import F, Lookup, Q
+
+from .models import StringAnalysis
+
+# Filter name -> the field it is evaluated on
+FIELDS = {
+    'is_palindrome': 'is_palindrome',
+    'min_length': 'length',
+    'max_length': 'length',
+    'word_count': 'word_count',
+    'word_count__in': 'word_count',
+    'contains_character': 'characters',
+    'contains_all': 'characters',
+    'contains_any': 'characters',
+    'length_buckets': 'length',
+}
+
+
+class ContainsCharacter(Lookup):
+    """`character` occurs in the text of the left-hand side, case-sensitively."""
+    lookup_name = 'contains_character'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'INSTR({lhs}, {rhs}) > 0', [*lhs_params, *rhs_params]
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'STRPOS({lhs}, {rhs}) > 0', [*lhs_params, *rhs_params]
+
+
+def _contains(character):
+    return Q(ContainsCharacter(F('characters'), character))
+
+
+def _length_range(bucket):
+    low, high = bucket
+    condition = Q()
+    if low is not None:
+        condition &= Q(length__gte=low)
+    if high is not None:
+        condition &= Q(length__lte=high)
+    return condition
+
+
+# Filter name -> function building its condition from the filter value
+CONDITIONS = {
+    'is_palindrome': lambda value: Q(is_palindrome=value),
+    'min_length': lambda value: Q(length__gte=value),
+    'max_length': lambda value: Q(length__lte=value),
+    'word_count': lambda value: Q(word_count=value),
+    'word_count__in': lambda values: Q(word_count__in=values),
+    'contains_character': _contains,
+    'contains_all': lambda values: reduce(operator.and_, map(_contains, values)),
+    'contains_any': lambda values: reduce(operator.or_, map(_contains, values)),
+    'length_buckets': lambda buckets: reduce(operator.or_, map(_length_range, buckets)),
+}
+
+
+def character_filters(filters):
+    """
+    Return the character filters in `filters` as (characters, all_required)
+    pairs.
+    """
+    pairs = []
+    if 'contains_character' in filters:
+        pairs.append(([filters['contains_character']], True))
+    if 'contains_all' in filters:
+        pairs.append((filters['contains_all'], True))
+    if 'contains_any' in filters:
+        pairs.append((filters['contains_any'], False))
+    return pairs
+
+
+def filter_queryset(filters, queryset=None):
+    """Return the StringAnalysis queryset matching a normalized filter dict."""
+    if queryset is None:
+        queryset = StringAnalysis.objects.all()
+    return queryset.filter(*(CONDITIONS[name](value) for name, value in filters.items()))
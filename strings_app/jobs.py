@@ -0,0 +1,175 @@
+"""
+Background processing of asynchronous analysis jobs.
+
+POST /strings?async=1 stores an AnalysisJob and hands its id to a local
+thread pool once the job row is committed. Web processes can run with
+ANALYSIS_JOB_WORKERS = 0 and leave the queue to dedicated
+`manage.py run_analysis_jobs` processes instead; both claim jobs through the
+same atomic status transition, so a job is never processed twice at once.
+
+A claim is a lease of ANALYSIS_JOB_LEASE seconds. Jobs whose worker died,
+left running past their lease or pending because the process exited before
+its pool got to them, are claimed again by run_analysis_jobs, or queued on
+the local pool again when their value is retried.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import AnalysisJob, StringAnalysis
+from .serializers import StringAnalysisSerializer
+from .utils import compute_sha256
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Return the process-wide worker pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ANALYSIS_JOB_WORKERS,
+                thread_name_prefix='analysis-job',
+            )
+        return _executor
+
+
+def enqueue(job):
+    """
+    Schedule a job on the local worker pool after the current transaction commits.
+
+    Does nothing when local workers are disabled; the job then stays pending
+    until a run_analysis_jobs process picks it up.
+    """
+    if settings.ANALYSIS_JOB_WORKERS <= 0:
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, job.pk))
+
+
+def _run_in_worker(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception("Analysis job %s crashed", job_id)
+    finally:
+        close_old_connections()
+
+
+def _claimable(now):
+    """Jobs that are pending, or running on a lease that has expired."""
+    expired = now - timedelta(seconds=settings.ANALYSIS_JOB_LEASE)
+    return Q(status=AnalysisJob.STATUS_PENDING) | Q(
+        status=AnalysisJob.STATUS_RUNNING, claimed_at__lt=expired
+    )
+
+
+def is_abandoned(job):
+    """
+    Whether an unfinished job has been pending or running for longer than
+    its lease, so its worker is presumed gone.
+    """
+    expired = timezone.now() - timedelta(seconds=settings.ANALYSIS_JOB_LEASE)
+    if job.status == AnalysisJob.STATUS_PENDING:
+        return job.created_at < expired
+    if job.status == AnalysisJob.STATUS_RUNNING:
+        return job.claimed_at is None or job.claimed_at < expired
+    return False
+
+
+def claim(job_id):
+    """
+    Atomically move a job to running, from pending or from running on an
+    expired lease. Returns the claim time, or None if the job is not claimable.
+    """
+    now = timezone.now()
+    claimed = AnalysisJob.objects.filter(_claimable(now), pk=job_id).update(
+        status=AnalysisJob.STATUS_RUNNING, claimed_at=now, updated_at=now
+    )
+    return now if claimed else None
+
+
+def run_job(job_id):
+    """
+    Claim and process a single job.
+
+    Returns the finished AnalysisJob, or None if the job was claimed by
+    another worker, before this one or after its lease expired.
+    """
+    claimed_at = claim(job_id)
+    if claimed_at is None:
+        return None
+
+    job = AnalysisJob.objects.get(pk=job_id)
+    # The id of the row the value is stored as, reported on conflicts
+    string_id = job.value_hash
+
+    try:
+        if job.raw:
+            # Raw bodies are stored verbatim, as by views._perform_raw_create()
+            with transaction.atomic():
+                instance = StringAnalysis.objects.create(
+                    value=job.value, sha256_hash=job.value_hash
+                )
+        else:
+            serializer = StringAnalysisSerializer(data={'value': job.value})
+            serializer.is_valid(raise_exception=True)
+            # The serializer trims the value; the row is keyed by its hash
+            string_id = compute_sha256(serializer.validated_data['value'])
+            instance = serializer.save()
+        job.status = AnalysisJob.STATUS_COMPLETED
+        job.string_id = instance.id
+    except IntegrityError:
+        job.status = AnalysisJob.STATUS_FAILED
+        job.error = "String already exists in the database."
+        job.string_id = string_id
+    except ValidationError as e:
+        error_detail = str(e.detail)
+        if 'conflict' in error_detail.lower() or 'already exists' in error_detail.lower():
+            error_detail = "String already exists in the database."
+            job.string_id = string_id
+        job.status = AnalysisJob.STATUS_FAILED
+        job.error = error_detail
+    except Exception as e:
+        job.status = AnalysisJob.STATUS_FAILED
+        job.error = str(e)
+
+    # The value is only needed until the analysis has been stored
+    job.value = ''
+    job.updated_at = timezone.now()
+    # Only while the claim is still ours: a worker that took the job over
+    # after the lease expired owns the result
+    finished = AnalysisJob.objects.filter(pk=job_id, claimed_at=claimed_at).update(
+        status=job.status, string_id=job.string_id, error=job.error,
+        value=job.value, updated_at=job.updated_at,
+    )
+    return job if finished else None
+
+
+def run_pending(limit=None):
+    """
+    Process pending jobs, and running jobs whose lease has expired, in
+    submission order. Returns the number processed.
+    """
+    pending = AnalysisJob.objects.filter(
+        _claimable(timezone.now())
+    ).order_by('created_at').values_list('pk', flat=True)
+    if limit is not None:
+        pending = pending[:limit]
+
+    processed = 0
+    for job_id in list(pending):
+        if run_job(job_id) is not None:
+            processed += 1
+    return processed
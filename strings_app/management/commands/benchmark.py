@@ -0,0 +1,61 @@
+"""
+Run performance benchmarks against a throwaway test database.
+
+Usage:
+    python manage.py benchmark                    # list available suites
+    python manage.py benchmark storage --rows 20000
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from strings_app.benchmarks import SUITES
+
+
+class Command(BaseCommand):
+    help = "Run strings_app benchmark suites on a temporary database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('suites', nargs='*', help="Suites to run.")
+        parser.add_argument(
+            '--rows', type=int, default=10000,
+            help="Number of strings in the generated corpus (default: 10000).",
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help="Random seed for the generated corpus (default: 0).",
+        )
+
+    def handle(self, *args, **options):
+        if not options['suites']:
+            for name, func in sorted(SUITES.items()):
+                self.stdout.write(f"{name:<16} {(func.__doc__ or '').strip()}")
+            return
+
+        unknown = set(options['suites']) - set(SUITES)
+        if unknown:
+            raise CommandError(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+        # Throttle history lives in the cache; a dummy cache disables throttling
+        no_throttling = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        })
+        no_throttling.enable()
+        try:
+            for name in options['suites']:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+                SUITES[name](
+                    options['rows'], self.stdout,
+                    seed=options['seed'],
+                )
+        finally:
+            no_throttling.disable()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
@@ -0,0 +1,67 @@
+"""
+Check that the list endpoints' representative queries use indexes.
+
+Seeds a throwaway test database with a generated corpus, EXPLAINs each query
+in strings_app.plans.QUERIES and fails if any of them reads the whole table.
+
+Usage:
+    python manage.py check_query_plans
+    python manage.py check_query_plans --rows 50000 --verbosity 2   # print plans
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from strings_app import plans
+from strings_app.benchmarks import generate_corpus, load_corpus
+
+
+class Command(BaseCommand):
+    help = "Fail if a representative list query degrades to a sequential scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=20000,
+            help="Number of strings in the generated corpus (default: 20000).",
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help="Random seed for the generated corpus (default: 0).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in plans.VENDORS:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped: query plans of {connection.vendor} databases cannot be checked "
+                f"(supported: {', '.join(plans.VENDORS)})."
+            ))
+            return
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+        try:
+            load_corpus(generate_corpus(options['rows'], seed=options['seed'], large_fraction=0))
+            # Plans depend on table statistics, as they would in production
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            results = plans.check()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        self.report(results, options['verbosity'])
+
+    def report(self, results, verbosity):
+        failures = []
+        for label, plan, scans in results:
+            if scans:
+                failures.append(f"{label}: {'; '.join(scans)}")
+            if verbosity >= 2:
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.stdout.write(plan)
+        if failures:
+            raise CommandError("Sequential scans in query plans:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} query plans use indexes."))
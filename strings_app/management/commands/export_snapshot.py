@@ -0,0 +1,32 @@
+"""
+Export the corpus to a snapshot file for read-only serving.
+
+Usage:
+    python manage.py export_snapshot /srv/strings/corpus.snapshot
+
+Point STRINGS_SNAPSHOT_PATH at the file to serve it. Re-running the command
+replaces the file atomically; serving processes pick up the new one.
+"""
+import os
+
+from django.core.management.base import BaseCommand
+
+from strings_app.snapshot import export
+
+
+class Command(BaseCommand):
+    help = "Write all stored strings to a memory-mappable snapshot file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Snapshot file to write.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="Rows read per database round trip (default: 2000).",
+        )
+
+    def handle(self, *args, **options):
+        rows = export(options['path'], chunk_size=options['chunk_size'])
+        size = os.path.getsize(options['path'])
+        self.stdout.write(
+            f"Exported {rows} string(s) to {options['path']} ({size / 2 ** 20:.1f} MiB)."
+        )
@@ -0,0 +1,44 @@
+"""
+Recompute the corpus statistics rollup from the stored strings.
+
+The rollup behind GET /corpus/stats is maintained on every insert and
+delete; rebuild it after loading rows without signals (bulk_create(), raw
+SQL) or changing facets.LENGTH_BUCKETS. Writes wait until it is done.
+
+Usage:
+    python manage.py rebuild_corpus_stats
+    python manage.py rebuild_corpus_stats --chunks 64 --workers 8
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from strings_app import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the corpus statistics rollup in parallel chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunks', type=int, default=16,
+            help="Number of id ranges the strings are split into (default: 16).",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help="Processes counting the characters of the chunks (default: 4).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help="Rows fetched per database round trip (default: 2000).",
+        )
+
+    def handle(self, *args, **options):
+        if options['chunks'] < 1 or options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--chunks, --workers and --batch-size must be positive.")
+        start = time.perf_counter()
+        rows = stats.rebuild(options['chunks'], options['workers'], options['batch_size'])
+        self.stdout.write(
+            f"Rebuilt the statistics of {rows} string(s) in {time.perf_counter() - start:.1f} s "
+            f"({options['chunks']} chunks, {options['workers']} workers)."
+        )
@@ -0,0 +1,46 @@
+"""
+Process asynchronous analysis jobs outside the web workers.
+
+Usage:
+    python manage.py run_analysis_jobs            # poll forever
+    python manage.py run_analysis_jobs --once     # drain the queue and exit
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from strings_app.jobs import run_pending
+
+
+class Command(BaseCommand):
+    help = "Run pending asynchronous string analysis jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Process the jobs currently pending and exit.",
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help="Seconds to sleep when the queue is empty (default: 1.0).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help="Maximum number of jobs claimed per poll (default: 100).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            processed = run_pending(limit=options['batch_size'])
+            if processed:
+                self.stdout.write(f"Processed {processed} job(s).")
+
+            if options['once']:
+                if processed < options['batch_size']:
+                    break
+                continue
+
+            if not processed:
+                time.sleep(options['interval'])
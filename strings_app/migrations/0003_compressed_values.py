@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:20
+
+from django.db import migrations, models
+
+
+def populate_characters(apps, schema_editor):
+    StringAnalysis = apps.get_model('strings_app', 'StringAnalysis')
+    for row in StringAnalysis.objects.only('id', 'character_frequency_map').iterator():
+        StringAnalysis.objects.filter(pk=row.pk).update(
+            characters=''.join(sorted(row.character_frequency_map))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0002_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stringanalysis',
+            name='characters',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='stringanalysis',
+            name='value_compressed',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='stringanalysis',
+            name='value',
+            field=models.TextField(db_index=True),
+        ),
+        migrations.RunPython(populate_characters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:23
+
+from django.db import migrations, models
+
+
+def _pack_counts(counts):
+    out = bytearray()
+    for count in counts:
+        while count >= 0x80:
+            out.append((count & 0x7F) | 0x80)
+            count >>= 7
+        out.append(count)
+    return bytes(out)
+
+
+def pack_frequency_maps(apps, schema_editor):
+    StringAnalysis = apps.get_model('strings_app', 'StringAnalysis')
+    for row in StringAnalysis.objects.only('id', 'character_frequency_map').iterator():
+        frequency_map = row.character_frequency_map
+        StringAnalysis.objects.filter(pk=row.pk).update(
+            characters=''.join(frequency_map),
+            character_counts=_pack_counts(frequency_map.values()),
+        )
+
+
+def unpack_frequency_maps(apps, schema_editor):
+    StringAnalysis = apps.get_model('strings_app', 'StringAnalysis')
+    for row in StringAnalysis.objects.only('id', 'characters', 'character_counts').iterator():
+        counts, count, shift = [], 0, 0
+        for byte in bytes(row.character_counts):
+            if byte < 0x80:
+                counts.append(count | (byte << shift))
+                count = shift = 0
+            else:
+                count |= (byte & 0x7F) << shift
+                shift += 7
+        StringAnalysis.objects.filter(pk=row.pk).update(
+            character_frequency_map=dict(zip(row.characters, counts))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0003_compressed_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stringanalysis',
+            name='character_counts',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AlterField(
+            model_name='stringanalysis',
+            name='character_frequency_map',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(pack_frequency_maps, unpack_frequency_maps),
+        migrations.RemoveField(
+            model_name='stringanalysis',
+            name='character_frequency_map',
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0004_packed_character_counts'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='stringanalysis',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'String Analysis', 'verbose_name_plural': 'String Analyses'},
+        ),
+        migrations.AddIndex(
+            model_name='stringanalysis',
+            index=models.Index(fields=['created_at', 'id'], name='string_anal_created_0ced3d_idx'),
+        ),
+    ]
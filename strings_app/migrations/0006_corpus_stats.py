@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:28
+
+from django.db import migrations, models
+
+
+def create_corpus_stats(apps, schema_editor):
+    CorpusStats = apps.get_model('strings_app', 'CorpusStats')
+    StringAnalysis = apps.get_model('strings_app', 'StringAnalysis')
+    CorpusStats.objects.update_or_create(
+        pk=1, defaults={'row_count': StringAnalysis.objects.count()}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0005_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorpusStats',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, editable=False, primary_key=True, serialize=False)),
+                ('row_count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Corpus Statistics',
+                'verbose_name_plural': 'Corpus Statistics',
+                'db_table': 'corpus_stats',
+            },
+        ),
+        migrations.RunPython(create_corpus_stats, migrations.RunPython.noop),
+    ]
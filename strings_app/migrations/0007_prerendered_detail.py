@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0006_corpus_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stringanalysis',
+            name='detail_gzip',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='stringanalysis',
+            name='detail_json',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='stringanalysis',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
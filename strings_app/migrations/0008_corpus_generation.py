@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0007_prerendered_detail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corpusstats',
+            name='generation',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0008_corpus_generation'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stringanalysis',
+            name='string_anal_value_618c97_idx',
+        ),
+        migrations.AlterField(
+            model_name='stringanalysis',
+            name='value',
+            field=models.TextField(),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0009_drop_value_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StringDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('string_id', models.CharField(max_length=64)),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'String Deletion',
+                'verbose_name_plural': 'String Deletions',
+                'db_table': 'string_deletion',
+            },
+        ),
+    ]
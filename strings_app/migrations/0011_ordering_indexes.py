@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0010_string_deletion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stringanalysis',
+            name='string_anal_length_c136e5_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stringanalysis',
+            name='string_anal_word_co_d0cb6e_idx',
+        ),
+        migrations.AddIndex(
+            model_name='stringanalysis',
+            index=models.Index(fields=['length', 'id'], name='string_anal_length_21b1e7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringanalysis',
+            index=models.Index(fields=['word_count', 'id'], name='string_anal_word_co_a71fd9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringanalysis',
+            index=models.Index(fields=['unique_characters', 'id'], name='string_anal_unique__bea269_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0011_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stringanalysis',
+            name='string_anal_is_pali_48ea88_idx',
+        ),
+        migrations.AlterField(
+            model_name='stringanalysis',
+            name='is_palindrome',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='stringanalysis',
+            name='length',
+            field=models.IntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='stringanalysis',
+            name='word_count',
+            field=models.IntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='stringanalysis',
+            index=models.Index(fields=['word_count', 'created_at', 'id'], name='string_words_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringanalysis',
+            index=models.Index(condition=models.Q(('is_palindrome', True)), fields=['created_at', 'id'], name='string_palindrome_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringanalysis',
+            index=models.Index(condition=models.Q(('is_palindrome', True)), fields=['length', 'id'], name='string_palindrome_length_idx'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:55
+
+from collections import Counter
+
+from django.db import migrations, models
+
+# facets.LENGTH_BUCKETS when this migration was written: first length of each bucket
+_BUCKET_STARTS = [0, 6, 11, 21, 51, 101]
+
+
+def _unpack_counts(packed):
+    counts, count, shift = [], 0, 0
+    for byte in bytes(packed):
+        if byte < 0x80:
+            counts.append(count | (byte << shift))
+            count = shift = 0
+        else:
+            count |= (byte & 0x7F) << shift
+            shift += 7
+    return counts
+
+
+def populate_rollup(apps, schema_editor):
+    CorpusStats = apps.get_model('strings_app', 'CorpusStats')
+    CharacterStats = apps.get_model('strings_app', 'CharacterStats')
+    LengthStats = apps.get_model('strings_app', 'LengthStats')
+    StringAnalysis = apps.get_model('strings_app', 'StringAnalysis')
+    totals, lengths, occurrences, string_counts = Counter(), Counter(), Counter(), Counter()
+    rows = StringAnalysis.objects.values_list(
+        'length', 'is_palindrome', 'word_count', 'characters', 'character_counts'
+    )
+    for length, is_palindrome, word_count, characters, packed in rows.iterator():
+        totals.update(row_count=1, palindrome_count=int(is_palindrome),
+                      total_length=length, total_word_count=word_count)
+        lengths[sum(start <= length for start in _BUCKET_STARTS) - 1] += 1
+        for character, count in zip(characters, _unpack_counts(packed)):
+            occurrences[character] += count
+            string_counts[character] += 1
+    CorpusStats.objects.update_or_create(pk=1, defaults={
+        field: totals[field]
+        for field in ('row_count', 'palindrome_count', 'total_length', 'total_word_count')
+    })
+    CharacterStats.objects.bulk_create([
+        CharacterStats(character=character, occurrences=count, string_count=string_counts[character])
+        for character, count in occurrences.items()
+    ], batch_size=250)
+    LengthStats.objects.bulk_create([
+        LengthStats(bucket=bucket, string_count=count) for bucket, count in lengths.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0012_composite_and_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CharacterStats',
+            fields=[
+                ('character', models.CharField(max_length=1, primary_key=True, serialize=False)),
+                ('occurrences', models.BigIntegerField(default=0)),
+                ('string_count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Character Statistics',
+                'verbose_name_plural': 'Character Statistics',
+                'db_table': 'corpus_character_stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='LengthStats',
+            fields=[
+                ('bucket', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('string_count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Length Statistics',
+                'verbose_name_plural': 'Length Statistics',
+                'db_table': 'corpus_length_stats',
+            },
+        ),
+        migrations.AddField(
+            model_name='corpusstats',
+            name='palindrome_count',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='corpusstats',
+            name='total_length',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='corpusstats',
+            name='total_word_count',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0015_analysis_job_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stringanalysis',
+            name='generation',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='stringdeletion',
+            name='generation',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def drop_duplicate_bodies(apps, schema_editor):
+    # Bodies kept gzipped are decompressed for plain clients when served
+    StringAnalysis = apps.get_model('strings_app', 'StringAnalysis')
+    StringAnalysis.objects.filter(
+        detail_gzip__isnull=False, detail_json__isnull=False
+    ).update(detail_json=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0016_sync_generation'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_bodies, migrations.RunPython.noop),
+    ]
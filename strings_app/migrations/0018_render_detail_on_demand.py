@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strings_app', '0017_detail_body_stored_once'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='stringanalysis',
+            name='detail_gzip',
+        ),
+        migrations.RemoveField(
+            model_name='stringanalysis',
+            name='detail_json',
+        ),
+    ]
@@ -1,8 +1,20 @@
 """
 Models for the strings_app application.
 """
-from django.db import models
-from .utils import analyze_string, compute_sha256
+import gzip
+import uuid
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from .utils import (
+    analyze_string,
+    compress_value,
+    compute_sha256,
+    decompress_value,
+    pack_counts,
+    unpack_counts,
+)
 
 
 class StringAnalysis(models.Model):
@@ -10,42 +22,81 @@ class StringAnalysis(models.Model):
     Model to store string analysis results.
     
     The sha256_hash is used as the primary key (id field).
+    
+    Values larger than STRING_COMPRESSION_THRESHOLD bytes are stored
+    zlib-compressed in value_compressed, with only a short prefix kept in
+    value; use full_value to read the complete string.
     """
-    # Use sha256_hash as primary key
+    # Use sha256_hash as primary key (and uniqueness guarantee)
     id = models.CharField(max_length=64, primary_key=True, editable=False)
     
-    # The original string value (unique)
-    value = models.TextField(unique=True, db_index=True)
+    # The original string value, or its prefix when compressed. Not indexed:
+    # rows are looked up by id, the SHA-256 of the value
+    value = models.TextField()
+    value_compressed = models.BinaryField(null=True, editable=False)
     
     # Computed properties
-    length = models.IntegerField(db_index=True)
-    is_palindrome = models.BooleanField(default=False, db_index=True)
+    # Indexed by the composite and partial indexes in Meta
+    length = models.IntegerField()
+    is_palindrome = models.BooleanField(default=False)
     unique_characters = models.IntegerField()
-    word_count = models.IntegerField(db_index=True)
+    word_count = models.IntegerField()
     sha256_hash = models.CharField(max_length=64, editable=False)
-    character_frequency_map = models.JSONField()
     
-    # Timestamp
-    created_at = models.DateTimeField(auto_now_add=True)
+    # character_frequency_map, stored compactly: the distinct characters in
+    # order of first occurrence (also used by character filters, so they never
+    # read the possibly compressed value) and their counts as packed varints
+    characters = models.TextField(default='', editable=False)
+    character_counts = models.BinaryField(default=b'', editable=False)
+    
+    # Timestamp; assigned on construction so the detail body can include it
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # The CorpusStats.generation the insert produced (see stats.changed_since);
+    # 0 for rows loaded without signals
+    generation = models.BigIntegerField(default=0, db_index=True, editable=False)
     
     class Meta:
         db_table = 'string_analysis'
         verbose_name = 'String Analysis'
         verbose_name_plural = 'String Analyses'
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
         indexes = [
-            models.Index(fields=['value']),
-            models.Index(fields=['is_palindrome']),
-            models.Index(fields=['length']),
-            models.Index(fields=['word_count']),
+            # Back keyset pagination over the default ordering and the other
+            # orderings of pagination.ORDERINGS; (length, id) also serves
+            # length ranges and buckets, (word_count, id) word_count__in
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['length', 'id']),
+            models.Index(fields=['word_count', 'id']),
+            models.Index(fields=['unique_characters', 'id']),
+            # word_count=N, read in list order without sorting
+            models.Index(fields=['word_count', 'created_at', 'id'], name='string_words_created_idx'),
+            # Palindromes are rare: partial indexes over them, rather than an
+            # index on the boolean, serve is_palindrome=true in list order
+            # and together with length filters or ordering
+            models.Index(
+                fields=['created_at', 'id'], condition=models.Q(is_palindrome=True),
+                name='string_palindrome_created_idx',
+            ),
+            models.Index(
+                fields=['length', 'id'], condition=models.Q(is_palindrome=True),
+                name='string_palindrome_length_idx',
+            ),
         ]
+        # Checked by `manage.py check_query_plans` (see plans.py)
     
-    def save(self, *args, **kwargs):
+    def populate_properties(self):
         """
-        Override save method to compute properties before saving.
+        Compute all derived columns and the stored form of the value.
+        
+        Called by save(); bulk loaders can call it directly before bulk_create().
         """
-        # Compute all properties using the utility function
-        properties = analyze_string(self.value)
+        # The inline column only holds a prefix once the value is compressed
+        full_value = self.full_value
+        
+        # Compute all properties using the utility function; a hash supplied
+        # by the creator (taken from the raw request body) is reused
+        known_hash = self.sha256_hash if self._state.adding and self.sha256_hash else None
+        properties = analyze_string(full_value, sha256_hash=known_hash)
         
         # Set the computed properties
         self.length = properties['length']
@@ -58,11 +109,74 @@ class StringAnalysis(models.Model):
         # Set the id (primary key) to the sha256_hash
         self.id = self.sha256_hash
         
-        super().save(*args, **kwargs)
+        # Store large values compressed, keeping the full string in memory
+        self.value, self.value_compressed = compress_value(
+            full_value,
+            settings.STRING_COMPRESSION_THRESHOLD,
+            settings.STRING_INLINE_PREFIX_LENGTH,
+        )
+        self._full_value = full_value
+    
+    def render_detail(self):
+        """
+        Render the GET /strings/<value> response body.
+        
+        Returns (json, gzip): the body, and its gzip encoding once it is at
+        least STRING_DETAIL_GZIP_MIN_SIZE bytes (None below that).
+        """
+        # Imported here because serializers imports this module
+        from .renderers import FastJSONRenderer
+        from .serializers import StringAnalysisSerializer
+        
+        body = FastJSONRenderer().render(StringAnalysisSerializer(self).data)
+        if len(body) >= settings.STRING_DETAIL_GZIP_MIN_SIZE:
+            return body, gzip.compress(body, mtime=0)
+        return body, None
+    
+    def save(self, *args, **kwargs):
+        """
+        Override save method to compute properties before saving.
+        
+        The insert and the corpus counter updates made by signal receivers
+        commit together.
+        """
+        self.populate_properties()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.value[:50]}{'...' if len(self.value) > 50 else ''}"
     
+    @property
+    def full_value(self):
+        """
+        Return the complete string, decompressing it on first access.
+        """
+        if self.value_compressed is None:
+            return self.value
+        full_value = getattr(self, '_full_value', None)
+        if full_value is None:
+            full_value = self._full_value = decompress_value(self.value_compressed)
+        return full_value
+    
+    @property
+    def character_frequency_map(self):
+        """
+        Return the character frequency dictionary, decoding it on first access.
+        """
+        frequency_map = self.__dict__.get('_character_frequency_map')
+        if frequency_map is None:
+            frequency_map = self._character_frequency_map = dict(
+                zip(self.characters, unpack_counts(self.character_counts))
+            )
+        return frequency_map
+    
+    @character_frequency_map.setter
+    def character_frequency_map(self, frequency_map):
+        self._character_frequency_map = dict(frequency_map)
+        self.characters = ''.join(frequency_map)
+        self.character_counts = pack_counts(frequency_map.values())
+    
     @property
     def properties(self):
         """
@@ -76,3 +190,143 @@ class StringAnalysis(models.Model):
             'sha256_hash': self.sha256_hash,
             'character_frequency_map': self.character_frequency_map,
         }
+
+
+class AnalysisJob(models.Model):
+    """
+    A deferred string analysis submitted with POST /strings?async=1.
+    
+    Jobs are picked up by the in-process worker pool (see jobs.py) or by the
+    run_analysis_jobs management command, which claim them atomically for
+    ANALYSIS_JOB_LEASE seconds. A job whose worker died is claimed again once
+    its lease has expired.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    # The submitted value; cleared once the job has finished
+    value = models.TextField(blank=True)
+    value_hash = models.CharField(max_length=64, db_index=True)
+    # Whether the value is a raw request body, stored verbatim
+    raw = models.BooleanField(default=False)
+    
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # When the current worker claimed the job (see jobs.claim)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    
+    # Result: id of the created StringAnalysis, or the failure reason
+    string_id = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'analysis_job'
+        verbose_name = 'Analysis Job'
+        verbose_name_plural = 'Analysis Jobs'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class CorpusStats(models.Model):
+    """
+    Corpus-wide counters, kept in a single row (pk=1).
+    
+    Updated in the same transaction as every StringAnalysis insert and
+    delete (see signals.py), so reads are O(1) and exact.
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1, editable=False)
+    row_count = models.BigIntegerField(default=0)
+    
+    # Incremented by every insert and delete; list responses use it as ETag
+    generation = models.BigIntegerField(default=0)
+    
+    # Sums over the stored strings, reported by GET /corpus/stats
+    palindrome_count = models.BigIntegerField(default=0)
+    total_length = models.BigIntegerField(default=0)
+    total_word_count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'corpus_stats'
+        verbose_name = 'Corpus Statistics'
+        verbose_name_plural = 'Corpus Statistics'
+    
+    def __str__(self):
+        return f"{self.row_count} strings"
+
+
+class CharacterStats(models.Model):
+    """
+    Corpus-wide frequency of one character, maintained like CorpusStats.
+    
+    Rows are never removed: a character no stored string contains any more
+    keeps a row with zero counts.
+    """
+    character = models.CharField(max_length=1, primary_key=True)
+    # Occurrences summed over every stored string
+    occurrences = models.BigIntegerField(default=0)
+    # Stored strings containing the character
+    string_count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'corpus_character_stats'
+        verbose_name = 'Character Statistics'
+        verbose_name_plural = 'Character Statistics'
+    
+    def __str__(self):
+        return f"{self.character!r}: {self.occurrences}"
+
+
+class LengthStats(models.Model):
+    """
+    Number of stored strings per length bucket (facets.LENGTH_BUCKETS),
+    maintained like CorpusStats. Rebuild it after changing the buckets.
+    """
+    # Index of the bucket in facets.LENGTH_BUCKETS
+    bucket = models.PositiveSmallIntegerField(primary_key=True)
+    string_count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'corpus_length_stats'
+        verbose_name = 'Length Statistics'
+        verbose_name_plural = 'Length Statistics'
+    
+    def __str__(self):
+        return f"bucket {self.bucket}: {self.string_count}"
+
+
+class StringDeletion(models.Model):
+    """
+    Ids of recently deleted strings.
+    
+    Polled by every process to evict its cached detail responses (see
+    cache.py), and pruned once no cached entry can predate them.
+    """
+    string_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # The CorpusStats.generation the deletion produced
+    generation = models.BigIntegerField(default=0, db_index=True)
+    
+    class Meta:
+        db_table = 'string_deletion'
+        verbose_name = 'String Deletion'
+        verbose_name_plural = 'String Deletions'
+    
+    def __str__(self):
+        return f"{self.string_id} deleted at {self.deleted_at}"
@@ -0,0 +1,197 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Pages are selected with a WHERE clause on the ordering columns instead of an
+OFFSET, so fetching a page costs the same no matter how deep it is: the
+database seeks to the cursor position in the index on the ordering columns
+((created_at, id) by default) and reads `limit + 1` rows from there. The
+same index scan, stopped after `limit + 1` rows, answers top-K requests such
+as the ten longest strings without sorting the table.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .models import StringAnalysis
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+# `ordering` query parameter values -> keyset ordering. Each one is backed by
+# an index on (column, id), so a page is read off the index in order
+ORDERINGS = {
+    f'{sign}{name}': (f'{sign}{name}', f'{sign}id')
+    for name in ('created_at', 'length', 'word_count', 'unique_characters')
+    for sign in ('', '-')
+}
+
+
+class PaginationError(ValueError):
+    """Raised for an invalid `limit`, `cursor` or `ordering` query parameter."""
+
+
+class Page:
+    """One page of results with opaque cursors to its neighbours."""
+
+    def __init__(self, rows, next_cursor, previous_cursor):
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+def is_paginated(query_params):
+    """Return True if the request asks for a page rather than the full list."""
+    return 'limit' in query_params or 'cursor' in query_params
+
+
+def parse_limit(query_params, default=None):
+    """
+    Return the requested page size.
+
+    Defaults to `default`, or else REST_FRAMEWORK['PAGE_SIZE'], and may not
+    exceed STRINGS_MAX_PAGE_SIZE.
+    """
+    raw = query_params.get('limit')
+    if raw is None:
+        return default or settings.REST_FRAMEWORK['PAGE_SIZE']
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("limit must be an integer.")
+    if not 1 <= limit <= settings.STRINGS_MAX_PAGE_SIZE:
+        raise PaginationError(
+            f"limit must be between 1 and {settings.STRINGS_MAX_PAGE_SIZE}."
+        )
+    return limit
+
+
+def parse_ordering(query_params, default='-created_at'):
+    """Return the keyset ordering named by the `ordering` query parameter."""
+    name = query_params.get('ordering', default)
+    try:
+        return ORDERINGS[name]
+    except KeyError:
+        raise PaginationError(
+            f"ordering must be one of: {', '.join(ORDERINGS)}."
+        )
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by the values of its ordering columns.
+
+    `ordering` must be a total order (end in a unique column) and be backed
+    by an index for pages to be cheap.
+    """
+
+    def __init__(self, ordering=DEFAULT_ORDERING):
+        self.ordering = tuple(ordering)
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in self.ordering
+        ]
+
+    def paginate(self, queryset, limit, cursor=None, key=None):
+        """
+        Return the Page of `limit` rows following (or preceding) `cursor`.
+
+        `key` maps a row to its ordering values; by default rows are model
+        instances and the values are read from their attributes. Pass one
+        for values_list() querysets.
+        """
+        direction, position = self.decode_cursor(cursor) if cursor else ('next', None)
+        backwards = direction == 'prev'
+        rows = list(self.seek(queryset, position, backwards)[:limit + 1])
+        return self.page(rows, limit, position, backwards, key)
+
+    def seek(self, queryset, position=None, backwards=False):
+        """
+        Return `queryset` limited to the rows after `position` (before it,
+        if `backwards`), ordered moving away from it.
+        """
+        if position is not None:
+            queryset = queryset.filter(self._beyond(position, backwards))
+        return queryset.order_by(*(self._reversed() if backwards else self.ordering))
+
+    def page(self, rows, limit, position, backwards, key=None):
+        """
+        Return the Page made of `rows`: up to `limit + 1` rows read in
+        seek() order from `position`.
+        """
+        if key is None:
+            key = self._instance_key
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+
+        if not rows:
+            return Page(rows, None, None)
+
+        if backwards:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        return Page(
+            rows,
+            self.encode_cursor('next', key(rows[-1])) if has_next else None,
+            self.encode_cursor('prev', key(rows[0])) if has_previous else None,
+        )
+
+    def _instance_key(self, row):
+        return [getattr(row, name) for name, _ in self.fields]
+
+    def _reversed(self):
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering
+        )
+
+    def _beyond(self, position, backwards):
+        """
+        Build the condition selecting rows after `position` in ordering
+        order (or before it, when paging backwards).
+        """
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.fields, position):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        # The OR alone gives the index no range to seek to: bound the first
+        # column too, so the scan starts at the cursor rather than at the
+        # start of the list
+        (name, descending), value = self.fields[0], position[0]
+        bound = 'lte' if descending != backwards else 'gte'
+        return Q(**{f'{name}__{bound}': value}) & condition
+
+    def encode_cursor(self, direction, values):
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in values
+        ]
+        payload = {'d': direction, 'v': values}
+        if self.ordering != DEFAULT_ORDERING:
+            # So that a cursor is not used with another ordering
+            payload['o'] = self.ordering[0]
+        payload = json.dumps(payload, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, raw_values = payload['d'], payload['v']
+            if direction not in ('next', 'prev') or len(raw_values) != len(self.fields):
+                raise ValueError
+            if payload.get('o', DEFAULT_ORDERING[0]) != self.ordering[0]:
+                raise ValueError
+            position = [
+                StringAnalysis._meta.get_field(name).to_python(raw)
+                for (name, _), raw in zip(self.fields, raw_values)
+            ]
+        except (binascii.Error, ValueError, KeyError, TypeError, ValidationError):
+            raise PaginationError("Invalid cursor.")
+        return direction, position
@@ -0,0 +1,70 @@
+"""
+Request body parsers for the strings_app application.
+
+POST /strings accepts the value to analyze as the raw request body, in
+addition to the JSON envelope, so large values don't have to be JSON-escaped
+by the client and decoded again by the server.
+"""
+import codecs
+import hashlib
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class RawStringBody:
+    """
+    A string value taken verbatim from the request body.
+
+    Attributes:
+        value: The decoded string
+        sha256_hash: SHA-256 of the value's UTF-8 encoding
+    """
+    __slots__ = ('value', 'sha256_hash')
+
+    def __init__(self, value, sha256_hash):
+        self.value = value
+        self.sha256_hash = sha256_hash
+
+
+class PlainTextParser(BaseParser):
+    """
+    Parse a text/plain body into a RawStringBody.
+
+    The body is decoded exactly once, using the charset from the Content-Type
+    header (UTF-8 by default). For UTF-8 bodies the hash is taken from the
+    raw bytes, so the value is never re-encoded.
+    """
+    media_type = 'text/plain'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        raw = stream.read() if stream is not None else b''
+        charset = self._charset(media_type, parser_context)
+
+        try:
+            value = raw.decode(charset)
+        except (LookupError, UnicodeDecodeError) as exc:
+            raise ParseError(f"Request body is not valid {charset}: {exc}")
+
+        if codecs.lookup(charset).name == 'utf-8':
+            sha256_hash = hashlib.sha256(raw).hexdigest()
+        else:
+            sha256_hash = hashlib.sha256(value.encode()).hexdigest()
+
+        return RawStringBody(value, sha256_hash)
+
+    def _charset(self, media_type, parser_context):
+        for param in (media_type or '').split(';')[1:]:
+            name, _, val = param.partition('=')
+            if name.strip().lower() == 'charset' and val.strip():
+                return val.strip().strip('"')
+        return (parser_context or {}).get('encoding') or 'utf-8'
+
+
+class OctetStreamParser(PlainTextParser):
+    """
+    Parse an application/octet-stream body into a RawStringBody.
+
+    The bytes must be UTF-8 (or the charset given in Content-Type).
+    """
+    media_type = 'application/octet-stream'
@@ -0,0 +1,83 @@
+"""
+Query plan checks for the list endpoints' filter mix.
+
+Each representative query is one the list endpoints run: a first page in
+list order or in another indexed ordering, or a count, for the filter
+combinations clients send. check() EXPLAINs them and reports the ones the
+database would answer by reading the whole table. Filters that no index
+can serve (contains_character) only appear next to ones that can, or in
+queries that read an ordering index and stop after a page.
+"""
+from django.db import connection
+
+from .filters import filter_queryset
+from .models import StringAnalysis
+from .pagination import DEFAULT_ORDERING, ORDERINGS, KeysetPaginator
+
+PAGE_SIZE = 100
+
+# Databases whose plans sequential_scans() can read
+VENDORS = ('postgresql', 'sqlite')
+
+# (label, filters, ordering or None for a count)
+QUERIES = [
+    ("list", {}, DEFAULT_ORDERING),
+    ("palindromes", {'is_palindrome': True}, DEFAULT_ORDERING),
+    ("palindromic single words of 5+ characters",
+     {'is_palindrome': True, 'word_count': 1, 'min_length': 5}, DEFAULT_ORDERING),
+    ("non-palindromes", {'is_palindrome': False}, DEFAULT_ORDERING),
+    ("word count", {'word_count': 2}, DEFAULT_ORDERING),
+    ("word count and length range", {'word_count': 1, 'min_length': 5, 'max_length': 10}, DEFAULT_ORDERING),
+    ("word counts", {'word_count__in': [1, 2, 3]}, DEFAULT_ORDERING),
+    ("length range", {'min_length': 10, 'max_length': 20}, DEFAULT_ORDERING),
+    ("length buckets", {'length_buckets': [[1, 5], [50, None]]}, DEFAULT_ORDERING),
+    ("character", {'contains_character': 'a'}, DEFAULT_ORDERING),
+    ("characters", {'contains_any': ['x', 'z']}, DEFAULT_ORDERING),
+    ("longest", {}, ORDERINGS['-length']),
+    ("longest palindromes", {'is_palindrome': True}, ORDERINGS['-length']),
+    ("most unique characters", {}, ORDERINGS['-unique_characters']),
+    ("fewest words", {'min_length': 100}, ORDERINGS['word_count']),
+    ("count palindromes", {'is_palindrome': True}, None),
+    ("count palindromes of 5+ characters", {'is_palindrome': True, 'min_length': 5}, None),
+    ("count word count", {'word_count': 2}, None),
+    ("count word counts", {'word_count__in': [1, 2, 3]}, None),
+    ("count length range", {'min_length': 10, 'max_length': 20}, None),
+]
+
+
+def queryset_of(filters, ordering):
+    """Return the queryset the list endpoints run for a representative query."""
+    queryset = filter_queryset(filters)
+    if ordering is None:
+        return queryset.order_by().values('pk')
+    return KeysetPaginator(ordering).seek(queryset)[:PAGE_SIZE + 1]
+
+
+def sequential_scans(plan):
+    """Return the lines of `plan` (EXPLAIN output) that read a whole table."""
+    table = StringAnalysis._meta.db_table
+    if connection.vendor == 'postgresql':
+        return [line.strip() for line in plan.splitlines() if f'Seq Scan on {table}' in line]
+    if connection.vendor == 'sqlite':
+        # "SCAN string_analysis USING INDEX ..." walks an index in order and
+        # stops after the page; a bare "SCAN string_analysis" reads the table.
+        # SQLite before 3.36 writes "SCAN TABLE string_analysis"
+        return [
+            line.strip() for line in plan.splitlines()
+            if 'SCAN ' in line and line.split('SCAN ', 1)[1].removeprefix('TABLE ').strip() == table
+        ]
+    raise ValueError(
+        f"Cannot read {connection.vendor} query plans; supported databases: {', '.join(VENDORS)}"
+    )
+
+
+def check(queries=QUERIES):
+    """
+    EXPLAIN `queries` and return (label, plan, sequential scan lines) for
+    each of them.
+    """
+    results = []
+    for label, filters, ordering in queries:
+        plan = queryset_of(filters, ordering).explain()
+        results.append((label, plan, sequential_scans(plan)))
+    return results
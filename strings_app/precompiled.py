@@ -0,0 +1,245 @@
+"""
+Precompiled SQL for the list endpoints' filter combinations.
+
+For small, indexed results, compiling a queryset to SQL costs as much as
+running it. Yet list queries come in few shapes: a set of filter names
+(see filters.py), and whether the whole result, a first page, a page after
+or before a cursor, or a count is wanted. The SQL of each shape is compiled
+by the ORM once, with placeholder values, and then run with the request's
+values bound as parameters. Rows go through the converters the ORM would
+apply, so they are exactly what values_list() returns.
+
+Boolean filters are compiled into the SQL itself (`WHERE is_palindrome` or
+`WHERE NOT is_palindrome`), so their values are part of the shape, and so
+are the lengths of multi-valued filters and their missing bounds. Every
+other value is a slot, bound as a parameter. When a shape is compiled it is
+built with a distinct placeholder in each slot, and the parameter the ORM
+bound for each placeholder is checked; a shape whose SQL does not bind its
+values as expected is left to the ORM.
+
+Connections are per thread, so each thread compiles the shapes it uses,
+and keeps the STRINGS_PRECOMPILED_MAX_SHAPES it used last: multi-valued
+filters make the number of shapes unbounded.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+
+from . import stats
+from .filters import FIELDS, filter_queryset
+from .models import StringAnalysis
+from .pagination import DEFAULT_ORDERING, KeysetPaginator
+from .serializers import FAST_FIELDS
+
+# Stands for a slot in a shape
+_SLOT = object()
+
+# Cursor slots are keyed by (_CURSOR, field name)
+_CURSOR = 'cursor'
+
+# Placeholder values of the cursor slots; filter slots get numbers counting
+# up from _FIRST_NUMBER, or private use characters from _FIRST_CHARACTER
+_CURSOR_PLACEHOLDERS = {
+    'created_at': datetime(2001, 2, 3, 4, 5, 6, 789012, tzinfo=dt_timezone.utc),
+    'id': 'precompiled-query-placeholder',
+    'length': 6_291_457,
+    'word_count': 6_291_457,
+    'unique_characters': 6_291_457,
+}
+_FIRST_NUMBER = 7_340_033
+_FIRST_CHARACTER = 0xE000
+
+# Filter name -> model field
+_FIELDS = {name: StringAnalysis._meta.get_field(field) for name, field in FIELDS.items()}
+
+
+class UnsupportedShape(Exception):
+    """Raised when a shape's compiled SQL cannot be reused with other values."""
+
+
+def _split(filters):
+    """
+    Return the shape of `filters`, and the values of its slots keyed by
+    (filter name, *position in the value).
+    """
+    slots = {}
+
+    def template(value, slot):
+        if isinstance(value, list):
+            return tuple(template(item, slot + (i,)) for i, item in enumerate(value))
+        if value is None:
+            return None
+        slots[slot] = value
+        return _SLOT
+
+    shape = frozenset(
+        (name, value if isinstance(value, bool) else template(value, (name,)))
+        for name, value in filters.items()
+    )
+    return shape, slots
+
+
+def _placeholders(shape):
+    """
+    Return filters of `shape` with a distinct placeholder in each slot, and
+    the placeholder values keyed like _split()'s.
+    """
+    slots = {}
+
+    def fill(value, slot):
+        if isinstance(value, tuple):
+            return [fill(item, slot + (i,)) for i, item in enumerate(value)]
+        if value is not _SLOT:
+            return value
+        if _FIELDS[slot[0]].name == 'characters':
+            slots[slot] = chr(_FIRST_CHARACTER + len(slots))
+        else:
+            slots[slot] = _FIRST_NUMBER + len(slots)
+        return slots[slot]
+
+    filters = {name: value if isinstance(value, bool) else fill(value, (name,)) for name, value in shape}
+    return filters, slots
+
+
+def _bind(slot, value):
+    """Return the parameter the ORM binds for `value` in `slot`."""
+    field = StringAnalysis._meta.get_field(slot[1]) if slot[0] == _CURSOR else _FIELDS[slot[0]]
+    return field.get_db_prep_value(value, connection)
+
+
+class CompiledQuery:
+    """The SQL of one query shape, and the slot each parameter is filled from."""
+
+    def __init__(self, queryset, placeholders, template='{}'):
+        """Compile `queryset`, built with `placeholders` in its slots."""
+        compiler = queryset.query.get_compiler(connection=connection)
+        sql, params = compiler.as_sql()
+        expected = {slot: _bind(slot, value) for slot, value in placeholders.items()}
+        self.slots = []
+        for param in params:
+            slots = [
+                slot for slot, value in expected.items()
+                if type(value) is type(param) and value == param
+            ]
+            if len(slots) != 1:
+                raise UnsupportedShape(f"Cannot tell which value {param!r} binds")
+            self.slots.append(slots[0])
+        if set(self.slots) != expected.keys():
+            raise UnsupportedShape("Not every slot is bound")
+        self.sql = template.format(sql)
+        fields = [column[0] for column in compiler.select[:compiler.col_count]]
+        self.converters = list(compiler.get_converters(fields).items())
+
+    def execute(self, values, limit=None):
+        """Run the query with `values` in its slots and return the rows as lists."""
+        params = [_bind(slot, values[slot]) for slot in self.slots]
+        sql = self.sql
+        if limit is not None:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        if not self.converters:
+            return rows
+        return list(self._convert(rows))
+
+    def _convert(self, rows):
+        # As SQLCompiler.apply_converters()
+        for row in rows:
+            row = list(row)
+            for position, (converters, expression) in self.converters:
+                value = row[position]
+                for converter in converters:
+                    value = converter(value, expression, connection)
+                row[position] = value
+            yield row
+
+
+class FilterQuery:
+    """The precompiled queries of one filter shape, in one ordering."""
+
+    def __init__(self, shape, ordering=DEFAULT_ORDERING):
+        self._paginator = paginator = KeysetPaginator(ordering)
+        filters, placeholders = _placeholders(shape)
+        queryset = filter_queryset(filters)
+        position = [_CURSOR_PLACEHOLDERS[name] for name, _ in paginator.fields]
+        cursor_placeholders = {
+            **placeholders,
+            **{(_CURSOR, name): _CURSOR_PLACEHOLDERS[name] for name, _ in paginator.fields},
+        }
+
+        self._all = CompiledQuery(
+            queryset.order_by(*ordering).values_list(*FAST_FIELDS), placeholders
+        )
+        self._first = CompiledQuery(paginator.seek(queryset).values_list(*FAST_FIELDS), placeholders)
+        self._after = CompiledQuery(
+            paginator.seek(queryset, position).values_list(*FAST_FIELDS), cursor_placeholders
+        )
+        self._before = CompiledQuery(
+            paginator.seek(queryset, position, backwards=True).values_list(*FAST_FIELDS),
+            cursor_placeholders,
+        )
+        self._count = CompiledQuery(
+            queryset.order_by().values_list('pk'), placeholders,
+            template='SELECT COUNT(*) FROM ({}) subquery',
+        )
+
+    def rows(self, filters):
+        """Return the FAST_FIELDS rows of the whole result, in list order."""
+        return self._all.execute(_split(filters)[1])
+
+    def page(self, filters, limit, cursor=None, key=None):
+        """As KeysetPaginator(ordering).paginate() over the filtered FAST_FIELDS rows."""
+        paginator = self._paginator
+        direction, position = paginator.decode_cursor(cursor) if cursor else ('next', None)
+        backwards = direction == 'prev'
+        values = _split(filters)[1]
+        if position is None:
+            rows = self._first.execute(values, limit + 1)
+        else:
+            values.update({(_CURSOR, name): value for (name, _), value in zip(paginator.fields, position)})
+            rows = (self._before if backwards else self._after).execute(values, limit + 1)
+        return paginator.page(rows, limit, position, backwards, key)
+
+    def count(self, filters, mode='exact'):
+        """As stats.count_queryset() for the filtered queryset."""
+        if mode == 'none':
+            return None
+        if not filters:
+            return stats.row_count()
+        if mode == 'estimate' and connection.vendor == 'postgresql':
+            return stats.count_queryset(filter_queryset(filters), mode)
+        return self._count.execute(_split(filters)[1])[0][0]
+
+
+_local = threading.local()
+
+
+def get(filters, ordering=DEFAULT_ORDERING):
+    """
+    Return the FilterQuery for the shape of `filters` in `ordering`, or None
+    if the filters have to be run through the ORM.
+    """
+    if not settings.STRINGS_PRECOMPILED_QUERIES or not filters.keys() <= FIELDS.keys():
+        return None
+    shape = (_split(filters)[0], tuple(ordering))
+    queries = getattr(_local, 'queries', None)
+    if queries is None:
+        queries = _local.queries = OrderedDict()
+    try:
+        queries.move_to_end(shape)
+        return queries[shape]
+    except KeyError:
+        pass
+    try:
+        query = FilterQuery(*shape)
+    except UnsupportedShape:
+        query = None
+    queries[shape] = query
+    while len(queries) > settings.STRINGS_PRECOMPILED_MAX_SHAPES:
+        queries.popitem(last=False)
+    return query
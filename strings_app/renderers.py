@@ -0,0 +1,124 @@
+"""
+Renderers for the strings_app application.
+"""
+import gzip
+import json
+import re
+
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    orjson writes UTF-8 bytes directly instead of building a str and then
+    encoding it. The output is byte-for-byte what JSONRenderer produces with
+    the default settings: compact separators, unescaped non-ASCII, and
+    U+2028/U+2029 escaped. Types orjson does not handle natively (datetimes,
+    decimals, lazy strings, ...) go through the configured encoder_class.
+
+    Falls back to JSONRenderer for indented output, non-default JSON
+    settings, and anything orjson refuses to encode (such as integers wider
+    than 64 bits). Floats are the one exception to byte compatibility:
+    both write the shortest repr, but outside [1e-4, 1e16) they differ
+    (orjson writes 1e16 and 0.00001 where json writes 1e+16 and 1e-05), and
+    orjson writes NaN and infinities as null where json raises. The only
+    floats the API returns, the ratio and averages of GET /corpus/stats,
+    are rounded to 4 and 2 decimals and so render identically.
+    """
+    _options = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not (self.compact and self.strict and not self.ensure_ascii):
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self._options)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same as JSONRenderer: U+2028 and U+2029 are valid JSON but not
+        # valid JavaScript, so they are escaped
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+class PrerenderedJSONResponse(Response):
+    """
+    A Response whose JSON body was rendered ahead of time.
+
+    `content` is the body as rendered by FastJSONRenderer and `gzip_content`
+    its gzip encoding; either may be None, but not both. When the negotiated
+    renderer is a non-indenting JSONRenderer the stored bytes are sent as
+    they are, gzipped if the client accepts it. Any other renderer (such as
+    the browsable API) renders `data`, which is decoded from the body only
+    when accessed.
+
+    The JSON representations carry `ETag: "<etag>"` (`"<etag>-gzip"` when
+    gzipped) and the given Cache-Control header, if any.
+    """
+
+    def __init__(self, content, gzip_content=None, status=None, headers=None,
+                 etag=None, cache_control=None):
+        self.content_bytes = bytes(content) if content is not None else None
+        self.gzip_bytes = bytes(gzip_content) if gzip_content is not None else None
+        self.etag = etag
+        self.cache_control = cache_control
+        self._data = None
+        super().__init__(None, status=status, headers=headers)
+        if self.gzip_bytes is not None:
+            patch_vary_headers(self, ('Accept-Encoding',))
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self._identity_bytes())
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    def _identity_bytes(self):
+        if self.content_bytes is None:
+            self.content_bytes = gzip.decompress(self.gzip_bytes)
+        return self.content_bytes
+
+    @property
+    def rendered_content(self):
+        renderer = getattr(self, 'accepted_renderer', None)
+        if not isinstance(renderer, JSONRenderer) or renderer.get_indent(
+            self.accepted_media_type, self.renderer_context
+        ):
+            return super().rendered_content
+
+        self['Content-Type'] = renderer.media_type
+        if self.cache_control:
+            self['Cache-Control'] = self.cache_control
+        request = self.renderer_context.get('request')
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '') if request else ''
+        if self.gzip_bytes is not None and _accepts_gzip.search(accept_encoding):
+            self['Content-Encoding'] = 'gzip'
+            if self.etag:
+                self['ETag'] = f'"{self.etag}-gzip"'
+            return self.gzip_bytes
+        if self.etag:
+            self['ETag'] = f'"{self.etag}"'
+        return self._identity_bytes()
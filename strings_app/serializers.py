@@ -1,8 +1,14 @@
 """
 Serializers for the strings_app application.
 """
-from rest_framework import serializers
-from .models import StringAnalysis
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from . import bloom
+from .models import AnalysisJob, StringAnalysis
+from .utils import compute_sha256, decompress_value, unpack_counts
 
 
 class StringAnalysisSerializer(serializers.ModelSerializer):
@@ -35,6 +41,12 @@ class StringAnalysisSerializer(serializers.ModelSerializer):
         """Return the properties dictionary."""
         return obj.properties
     
+    def to_representation(self, instance):
+        """Return the complete value, not the stored prefix of compressed values."""
+        data = super().to_representation(instance)
+        data['value'] = instance.full_value
+        return data
+    
     def validate_value(self, value):
         """
         Validate that value is a string and not empty.
@@ -55,16 +67,95 @@ class StringAnalysisSerializer(serializers.ModelSerializer):
             serializers.ValidationError: If the string already exists (409 Conflict)
         """
         value = validated_data.get('value')
+        value_hash = compute_sha256(value)
         
-        # Check if string already exists
-        if StringAnalysis.objects.filter(value=value).exists():
+        # Check if string already exists; the Bloom filter rules out most
+        # new values without a query
+        if bloom.might_exist(value_hash) and StringAnalysis.objects.filter(pk=value_hash).exists():
             raise serializers.ValidationError(
                 {"error": "String already exists in the database."},
                 code='conflict'
             )
         
-        # Create and return the instance
-        return StringAnalysis.objects.create(**validated_data)
+        # Create and return the instance; a concurrent insert of the same
+        # value from another process surfaces as a primary key violation
+        try:
+            with transaction.atomic():
+                return StringAnalysis.objects.create(**validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"error": "String already exists in the database."},
+                code='conflict'
+            )
+
+
+# Columns read by the fast read path, in the order fast_representer() unpacks them
+FAST_FIELDS = (
+    'id', 'value', 'value_compressed', 'length', 'is_palindrome',
+    'unique_characters', 'word_count', 'sha256_hash', 'characters',
+    'character_counts', 'created_at',
+)
+
+_created_at_field = serializers.DateTimeField()
+
+
+def _datetime_formatter():
+    """
+    Return a function formatting datetimes exactly like DateTimeField.
+    
+    DateTimeField looks up the current timezone for every value; for the
+    default ISO 8601 format it is resolved once here instead.
+    """
+    if api_settings.DATETIME_FORMAT != ISO_8601 or not settings.USE_TZ:
+        return _created_at_field.to_representation
+    current_timezone = timezone.get_current_timezone()
+    
+    def format_datetime(value):
+        value = value.astimezone(current_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return format_datetime
+
+
+def fast_representer():
+    """
+    Return a function building the StringAnalysisSerializer representation
+    of a FAST_FIELDS tuple.
+    
+    The dicts are exactly what StringAnalysisSerializer(instance).data
+    returns, built without model instances or per-field serializer
+    machinery. Create one representer per response.
+    """
+    format_datetime = _datetime_formatter()
+    
+    def represent(row):
+        (pk, value, value_compressed, length, is_palindrome, unique_characters,
+         word_count, sha256_hash, characters, character_counts, created_at) = row
+        return {
+            'id': pk,
+            'value': value if value_compressed is None else decompress_value(value_compressed),
+            'properties': {
+                'length': length,
+                'is_palindrome': is_palindrome,
+                'unique_characters': unique_characters,
+                'word_count': word_count,
+                'sha256_hash': sha256_hash,
+                'character_frequency_map': dict(zip(characters, unpack_counts(character_counts))),
+            },
+            'created_at': format_datetime(created_at),
+        }
+    return represent
+
+
+def fast_serialize(queryset):
+    """
+    Serialize a StringAnalysis queryset through the fast read path.
+    
+    Equivalent to StringAnalysisSerializer(queryset, many=True).data.
+    """
+    represent = fast_representer()
+    return [represent(row) for row in queryset.values_list(*FAST_FIELDS)]
 
 
 class StringListSerializer(serializers.Serializer):
@@ -100,3 +191,23 @@ class NaturalLanguageQuerySerializer(serializers.Serializer):
     data = StringAnalysisSerializer(many=True)
     count = serializers.IntegerField()
     interpreted_query = serializers.DictField()
+
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for asynchronous analysis jobs.
+    
+    Returns:
+    {
+        "id": "uuid",
+        "status": "pending" | "running" | "completed" | "failed",
+        "string_id": "sha256 of the analyzed string",
+        "error": "failure reason, if any",
+        "created_at": "ISO8601 datetime",
+        "updated_at": "ISO8601 datetime"
+    }
+    """
+    class Meta:
+        model = AnalysisJob
+        fields = ['id', 'status', 'string_id', 'error', 'created_at', 'updated_at']
+        read_only_fields = fields
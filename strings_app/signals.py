@@ -0,0 +1,20 @@
+"""
+Signal receivers for the strings_app application.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import bloom, cache, stats
+from .models import StringAnalysis
+
+
+@receiver(post_save, sender=StringAnalysis)
+def string_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.record_created(instance)
+        bloom.record_created(instance.pk)
+
+
+@receiver(post_delete, sender=StringAnalysis)
+def string_deleted(sender, instance, **kwargs):
+    cache.record_deletion(instance.pk, stats.record_deleted(instance))
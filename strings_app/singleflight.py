@@ -0,0 +1,68 @@
+"""
+In-process single-flight call deduplication.
+
+Concurrent callers asking for the same key share a single execution of the
+underlying function: the first caller (the leader) runs it, every caller
+that arrives while it is still running waits for and receives the same result.
+"""
+import threading
+
+
+class _Call:
+    """A single in-flight call and its eventual outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls that share a key.
+
+    Usage:
+        flight = SingleFlight()
+        result, shared = flight.do(key, fn)
+
+    `shared` is False for the caller that actually ran `fn` and True for
+    callers that waited on another caller's execution. Exceptions raised by
+    `fn` are re-raised in every waiting caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self, key):
+        """Return True if a call for `key` is currently running."""
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,475 @@
+"""
+Read-only corpus snapshots served from a memory-mapped file.
+
+`python manage.py export_snapshot <path>` writes every stored string to one
+file. With STRINGS_SNAPSHOT_PATH pointing at it, the detail, lookup and list
+endpoints answer from the file instead of the database, and the endpoints
+that write are refused. The file is mapped, not read: every worker process
+shares the same pages through the page cache and starts serving at once.
+
+File layout (little-endian, sections 8-byte aligned):
+
+    header      magic, row count, corpus generation, export time (us)
+    sections    (offset, size) of each section below
+
+Rows are numbered in id order; the digest of row r is the r-th entry of
+`digests`, so ids are found by binary search. The fixed-width columns hold
+one value per row. `order` lists the rows in the list endpoints' order
+(newest first), and `bodies` / `characters` are blobs indexed by
+`body_offsets` / `char_offsets` (row r spans offsets[r]:offsets[r + 1]).
+`stats` is the GET /corpus/stats body of the exported rows, as JSON.
+Bodies are the detail responses, rendered at export, so list responses are
+assembled by concatenating them. Like in the detail cache, large bodies are
+only kept gzipped (`body_gzipped` is set for those).
+
+A new export can replace the file while it is being served (it is written
+aside and renamed into place); each process maps the new file within a
+second.
+"""
+import array
+import bisect
+import gzip
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+
+from . import facets, stats
+from .columnar import char_bits, column_mask, row_predicate, split_character_filters
+from .filters import FIELDS
+from .models import StringAnalysis
+from .pagination import DEFAULT_ORDERING, KeysetPaginator, PaginationError
+from .renderers import FastJSONRenderer
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+MAGIC = b'STRSNAP\x03'
+
+# magic, row count, corpus generation, export time in microseconds
+_HEADER = struct.Struct('<8sQqq')
+_SECTION = struct.Struct('<QQ')
+
+# Section name, array typecode (None for byte blobs)
+SECTIONS = (
+    ('digests', None),
+    ('length', 'I'),
+    ('word_count', 'I'),
+    ('unique_characters', 'I'),
+    ('is_palindrome', 'B'),
+    ('chars_low', 'Q'),
+    ('chars_high', 'Q'),
+    ('created_at', 'q'),
+    ('order', 'I'),
+    ('body_gzipped', 'B'),
+    ('body_offsets', 'Q'),
+    ('bodies', None),
+    ('char_offsets', 'Q'),
+    ('characters', None),
+    ('stats', None),
+)
+
+# Filters a snapshot can evaluate
+FILTERS = frozenset(FIELDS)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Seconds between checks for a replaced snapshot file
+_RELOAD_CHECK_INTERVAL = 1.0
+
+
+def export(path, chunk_size=2000):
+    """
+    Write a snapshot of all stored strings to `path`, atomically.
+
+    Returns the number of rows written.
+    """
+    generation = stats.generation()
+    exported_at = (datetime.now(dt_timezone.utc) - _EPOCH) // _MICROSECOND
+    columns = {name: array.array(typecode) for name, typecode in SECTIONS if typecode}
+    digests = bytearray()
+    columns['body_offsets'].append(0)
+    columns['char_offsets'].append(0)
+    # The rollup of the exported rows, as stats.py maintains it in the database
+    totals = {'generation': generation, 'palindrome_count': 0, 'total_length': 0, 'total_word_count': 0}
+    lengths, occurrences, strings = Counter(), Counter(), Counter()
+
+    rows = StringAnalysis.objects.order_by('pk').iterator(chunk_size=chunk_size)
+    with tempfile.TemporaryFile() as bodies, tempfile.TemporaryFile() as characters_blob:
+        for row in rows:
+            digests += bytes.fromhex(row.pk)
+            columns['length'].append(row.length)
+            columns['word_count'].append(row.word_count)
+            columns['unique_characters'].append(row.unique_characters)
+            columns['is_palindrome'].append(row.is_palindrome)
+            low, high = char_bits(row.characters)
+            columns['chars_low'].append(low)
+            columns['chars_high'].append(high)
+            columns['created_at'].append((row.created_at - _EPOCH) // _MICROSECOND)
+            # As the detail cache keeps them: gzipped only, when large enough
+            detail_json, detail_gzip = row.render_detail()
+            body, gzipped = (detail_json, False) if detail_gzip is None else (detail_gzip, True)
+            columns['body_gzipped'].append(gzipped)
+            bodies.write(body)
+            columns['body_offsets'].append(columns['body_offsets'][-1] + len(body))
+            encoded = row.characters.encode()
+            characters_blob.write(encoded)
+            columns['char_offsets'].append(columns['char_offsets'][-1] + len(encoded))
+            totals['palindrome_count'] += row.is_palindrome
+            totals['total_length'] += row.length
+            totals['total_word_count'] += row.word_count
+            lengths[facets.bucket_of(row.length)] += 1
+            occurrences.update(row.character_frequency_map)
+            strings.update(row.characters)
+
+        row_count = len(columns['length'])
+        totals['row_count'] = row_count
+        corpus_stats = stats.render_corpus_stats(totals, lengths, sorted(
+            ((character, occurrences[character], strings[character]) for character in strings),
+            key=lambda item: (-item[1], item[0]),
+        ))
+        created = columns['created_at']
+        # Newest first, ties broken by id descending: the list endpoints' order
+        columns['order'] = array.array('I', sorted(
+            range(row_count), key=lambda row: (created[row], row), reverse=True
+        ))
+        if sys.byteorder == 'big':
+            for values in columns.values():
+                values.byteswap()
+
+        blobs = {
+            'digests': digests, 'bodies': bodies, 'characters': characters_blob,
+            'stats': bytearray(FastJSONRenderer().render(corpus_stats)),
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(_HEADER.pack(MAGIC, row_count, generation, exported_at))
+                table_at = out.tell()
+                out.write(b'\0' * _SECTION.size * len(SECTIONS))
+                table = []
+                for name, typecode in SECTIONS:
+                    out.write(b'\0' * (-out.tell() % 8))
+                    start = out.tell()
+                    blob = blobs.get(name)
+                    if blob is None:
+                        columns[name].tofile(out)
+                    elif isinstance(blob, bytearray):
+                        out.write(blob)
+                    else:
+                        blob.seek(0)
+                        while chunk := blob.read(1024 * 1024):
+                            out.write(chunk)
+                    table.append(_SECTION.pack(start, out.tell() - start))
+                out.seek(table_at)
+                out.write(b''.join(table))
+            # Readable by the web workers, whichever user they run as
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    return row_count
+
+
+class Snapshot:
+    """A memory-mapped snapshot file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.row_count, self.generation, self.exported_at = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a strings snapshot")
+        view = memoryview(self._mmap)
+        self._sections = {}
+        for index, (name, typecode) in enumerate(SECTIONS):
+            start, size = _SECTION.unpack_from(self._mmap, _HEADER.size + index * _SECTION.size)
+            self._sections[name] = (start, size)
+            if typecode:
+                # Zero-copy views of the mapped pages (the file is little-endian,
+                # like every platform this runs on)
+                setattr(self, name, view[start:start + size].cast(typecode))
+        self.etag = f'W/"snapshot-{self.exported_at}"'
+
+    def find(self, pk):
+        """Return the row of the string with id `pk`, or None."""
+        try:
+            digest = bytes.fromhex(pk)
+        except ValueError:
+            return None
+        start, size = self._sections['digests']
+        low, high = 0, self.row_count
+        while low < high:
+            middle = (low + high) // 2
+            at = start + middle * 32
+            if self._mmap[at:at + 32] < digest:
+                low = middle + 1
+            else:
+                high = middle
+        at = start + low * 32
+        if low < self.row_count and self._mmap[at:at + 32] == digest:
+            return low
+        return None
+
+    def stored_body(self, row):
+        """Return the detail response body of `row` as stored, and whether it is gzipped."""
+        start = self._sections['bodies'][0]
+        body = self._mmap[start + self.body_offsets[row]:start + self.body_offsets[row + 1]]
+        return body, bool(self.body_gzipped[row])
+
+    def body(self, row):
+        """Return the detail response body of `row`."""
+        body, gzipped = self.stored_body(row)
+        return gzip.decompress(body) if gzipped else body
+
+    def corpus_stats(self):
+        """Return the GET /corpus/stats body of the snapshot's rows."""
+        start, size = self._sections['stats']
+        return json.loads(self._mmap[start:start + size])
+
+    def characters_of(self, row):
+        start = self._sections['characters'][0]
+        return self._mmap[start + self.char_offsets[row]:start + self.char_offsets[row + 1]].decode()
+
+    def id_of(self, row):
+        start = self._sections['digests'][0] + row * 32
+        return self._mmap[start:start + 32].hex()
+
+    def match(self, filters):
+        """
+        Return the positions in `order` of the rows matching the normalized
+        list `filters`, in ascending order.
+        """
+        unsupported = filters.keys() - FILTERS
+        if unsupported:
+            raise ValueError(f"Unsupported filter(s): {', '.join(sorted(unsupported))}")
+        # Character filters are evaluated on the ASCII masks; those that
+        # involve other characters are checked on the characters themselves
+        masked, unmasked = split_character_filters(filters)
+        if np is not None:
+            mask = column_mask(filters, masked, *(
+                self._array(name) for name in ('length', 'word_count', 'is_palindrome', 'chars_low', 'chars_high')
+            ))
+            positions = np.flatnonzero(mask[self._array('order')]).tolist()
+        else:
+            matches = row_predicate(filters, masked)
+            columns = (self.length, self.word_count, self.is_palindrome, self.chars_low, self.chars_high)
+            positions = [
+                position for position, row in enumerate(self.order)
+                if matches(*(column[row] for column in columns))
+            ]
+
+        for characters, all_required in unmasked:
+            test = all if all_required else any
+            positions = [
+                position for position in positions
+                if test(ch in self.characters_of(self.order[position]) for ch in characters)
+            ]
+        return positions
+
+    def _array(self, name):
+        start, size = self._sections[name]
+        dtype = np.dtype('<' + getattr(self, name).format)
+        return np.frombuffer(self._mmap, dtype=dtype, count=size // dtype.itemsize, offset=start)
+
+    def sort(self, positions, ordering=DEFAULT_ORDERING):
+        """Return the rows at `positions` of `order`, in `ordering`."""
+        rows = [self.order[position] for position in positions]
+        (name, descending), _ = KeysetPaginator(ordering).fields
+        if name == 'created_at':
+            # `order` is by (created_at, id), descending
+            return rows if descending else rows[::-1]
+        # Rows are numbered in id order, so they break ties like ids do
+        if np is not None:
+            rows = np.array(rows, dtype=np.int64)
+            rows = rows[np.lexsort((rows, self._array(name)[rows]))]
+            return (rows[::-1] if descending else rows).tolist()
+        column = getattr(self, name)
+        return sorted(rows, key=lambda row: (column[row], row), reverse=descending)
+
+    def count_facets(self, positions, names):
+        """As facets.count_queryset() for the rows at `positions` of `order`."""
+        counts = {}
+        if np is not None:
+            rows = self._array('order')[np.array(positions, dtype=np.int64)]
+            for name in names:
+                if name == 'length_bucket':
+                    starts = np.array(facets.BUCKET_STARTS, dtype=np.int64)
+                    values = np.searchsorted(starts, self._array('length')[rows], side='right') - 1
+                else:
+                    values = self._array(name)[rows]
+                unique, unique_counts = np.unique(values, return_counts=True)
+                counts[name] = Counter({
+                    (bool(value) if name == 'is_palindrome' else int(value)): int(count)
+                    for value, count in zip(unique, unique_counts)
+                })
+            return counts
+        rows = [self.order[position] for position in positions]
+        for name in names:
+            if name == 'length_bucket':
+                counts[name] = Counter(facets.bucket_of(self.length[row]) for row in rows)
+            else:
+                column = getattr(self, name)
+                counts[name] = Counter(column[row] for row in rows)
+                if name == 'is_palindrome':
+                    counts[name] = Counter({bool(value): count for value, count in counts[name].items()})
+        return counts
+
+    def paginate(self, positions, limit, cursor=None, ordering=DEFAULT_ORDERING):
+        """
+        Return the Page of rows following (or preceding) `cursor` among
+        `positions`, in `ordering`, with the same cursors the database path
+        produces.
+        """
+        if tuple(ordering) != DEFAULT_ORDERING:
+            return self._paginate_sorted(self.sort(positions, ordering), limit, cursor, ordering)
+        paginator = KeysetPaginator()
+        direction, position = paginator.decode_cursor(cursor) if cursor else ('next', None)
+        backwards = direction == 'prev'
+
+        if position is None:
+            selected = positions[:limit + 1]
+        else:
+            created_at, pk = position
+            try:
+                key = (-((created_at - _EPOCH) // _MICROSECOND), _negate(bytes.fromhex(pk)))
+            except (TypeError, ValueError):
+                raise PaginationError("Invalid cursor.")
+            if backwards:
+                end = bisect.bisect_left(positions, self._seek(key, after=False))
+                selected = positions[max(0, end - limit - 1):end][::-1]
+            else:
+                start = bisect.bisect_left(positions, self._seek(key, after=True))
+                selected = positions[start:start + limit + 1]
+
+        rows = [self.order[p] for p in selected]
+        return paginator.page(rows, limit, position, backwards, key=self._cursor_values)
+
+    def _paginate_sorted(self, rows, limit, cursor, ordering):
+        """paginate() over `rows`, sorted in `ordering` by sort()."""
+        paginator = KeysetPaginator(ordering)
+        direction, position = paginator.decode_cursor(cursor) if cursor else ('next', None)
+        backwards = direction == 'prev'
+        (name, descending), _ = paginator.fields
+
+        def values(row):
+            if name == 'created_at':
+                return [_EPOCH + self.created_at[row] * _MICROSECOND, self.id_of(row)]
+            return [getattr(self, name)[row], self.id_of(row)]
+
+        if position is None:
+            selected = rows[:limit + 1]
+        else:
+            value, pk = position
+            try:
+                if name == 'created_at':
+                    value = (value - _EPOCH) // _MICROSECOND
+                key = (value, bytes.fromhex(pk))
+            except (TypeError, ValueError):
+                raise PaginationError("Invalid cursor.")
+
+            column = getattr(self, name)
+
+            def sort_key(row):
+                # Ascending along `rows`
+                start = self._sections['digests'][0] + row * 32
+                value, digest = column[row], self._mmap[start:start + 32]
+                return (-value, _negate(digest)) if descending else (value, digest)
+
+            key = (-key[0], _negate(key[1])) if descending else key
+            # First index sorting after the cursor (or at it, paging backwards)
+            low, high = 0, len(rows)
+            while low < high:
+                middle = (low + high) // 2
+                middle_key = sort_key(rows[middle])
+                if middle_key < key or (not backwards and middle_key == key):
+                    low = middle + 1
+                else:
+                    high = middle
+            if backwards:
+                selected = rows[max(0, low - limit - 1):low][::-1]
+            else:
+                selected = rows[low:low + limit + 1]
+
+        return paginator.page(selected, limit, position, backwards, key=values)
+
+    def _seek(self, key, after):
+        """
+        Return the first position of `order` whose row sorts after the
+        cursor `key` (or at it, unless `after`).
+        """
+        low, high = 0, self.row_count
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = self._order_key(middle)
+            if middle_key < key or (after and middle_key == key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _order_key(self, position):
+        """Sort key of the row at `position` of `order` (ascending along it)."""
+        row = self.order[position]
+        start = self._sections['digests'][0] + row * 32
+        return (-self.created_at[row], _negate(self._mmap[start:start + 32]))
+
+    def _cursor_values(self, row):
+        return [_EPOCH + self.created_at[row] * _MICROSECOND, self.id_of(row)]
+
+    def render_list(self, rows, rest):
+        """
+        Return the list envelope {"data": [...], **rest} for `rows`, built
+        from the stored bodies.
+        """
+        return (
+            b'{"data":[' + b','.join(self.body(row) for row in rows) + b'],'
+            + FastJSONRenderer().render(rest)[1:]
+        )
+
+
+def _negate(digest):
+    """Map a digest to bytes that sort in the opposite order."""
+    return bytes(255 - byte for byte in digest)
+
+
+_current = None
+_current_lock = threading.Lock()
+_checked_at = 0.0
+
+
+def get_snapshot():
+    """
+    Return the snapshot named by STRINGS_SNAPSHOT_PATH, or None when
+    serving from the database.
+    """
+    global _current, _checked_at
+    path = settings.STRINGS_SNAPSHOT_PATH
+    if not path:
+        return None
+    current = _current
+    if (current is not None and current[0] == path
+            and time.monotonic() - _checked_at < _RELOAD_CHECK_INTERVAL):
+        return current[2]
+    with _current_lock:
+        stat = os.stat(path)
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if _current is None or _current[:2] != (path, identity):
+            # The previous mapping is left to the garbage collector: requests
+            # in flight may still be reading from it
+            _current = (path, identity, Snapshot(path))
+        _checked_at = time.monotonic()
+        return _current[2]
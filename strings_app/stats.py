@@ -0,0 +1,335 @@
+"""
+Maintained corpus statistics.
+
+The counters in CorpusStats are adjusted by signal receivers on every insert
+and delete, so list endpoints can report the size of the corpus without a
+COUNT(*) over the whole table, and can tell whether it changed since a
+response was sent (the generation counter behind their ETags).
+
+The same receivers add each string's properties to (or subtract them from)
+the rollup behind GET /corpus/stats: sums in CorpusStats, character
+frequencies in CharacterStats and the length histogram in LengthStats. All
+of it is updated in the transaction that inserts or deletes the string.
+
+Each insert and deletion is stamped with the generation it produced. The
+CorpusStats update holds off other writers until the transaction commits,
+so generations commit in increasing order, and the per-process structures
+that follow the table (bloom.py, columnar.py, the deletion feed of
+cache.py) poll for stamps above the last one they read with
+changed_since().
+
+`manage.py rebuild_corpus_stats` recomputes everything from the stored
+strings, e.g. after rows were bulk loaded without signals.
+"""
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+
+from . import facets
+from .models import CharacterStats, CorpusStats, LengthStats, StringAnalysis
+from .utils import unpack_counts
+
+# Rows per INSERT ... ON CONFLICT statement of the rollup tables
+_UPSERT_BATCH_SIZE = 250
+
+
+def _adjust(**deltas):
+    """Apply `field=delta` adjustments to the CorpusStats row."""
+    updated = CorpusStats.objects.filter(pk=1).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        # The row is created by a migration; recover if it was removed
+        CorpusStats.objects.get_or_create(
+            pk=1, defaults={'row_count': StringAnalysis.objects.count()}
+        )
+
+
+def _add_counts(model, key_field, rows):
+    """
+    Add `rows`, {key: {field: delta}}, to the rows of a rollup table,
+    inserting the keys it lacks, with INSERT ... ON CONFLICT statements
+    (SQLite and PostgreSQL).
+    """
+    if not rows:
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    key = connection.ops.quote_name(model._meta.get_field(key_field).column)
+    fields = sorted({field for deltas in rows.values() for field in deltas})
+    columns = [connection.ops.quote_name(model._meta.get_field(field).column) for field in fields]
+    placeholders = '(%s)' % ', '.join(['%s'] * (len(fields) + 1))
+    keys = sorted(rows)
+    with connection.cursor() as cursor:
+        for start in range(0, len(keys), _UPSERT_BATCH_SIZE):
+            batch = keys[start:start + _UPSERT_BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {table} ({key}, {', '.join(columns)}) "
+                f"VALUES {', '.join([placeholders] * len(batch))} "
+                f"ON CONFLICT ({key}) DO UPDATE SET "
+                + ', '.join(f"{column} = {table}.{column} + excluded.{column}" for column in columns),
+                [value for k in batch for value in (k, *(rows[k].get(field, 0) for field in fields))],
+            )
+
+
+def _record(instance, sign):
+    """Apply the insert (sign 1) or deletion (-1) of `instance`; return its generation."""
+    # CorpusStats is updated first: its row lock orders concurrent writers,
+    # so they cannot deadlock on the rollup rows, and commit their
+    # generations in order
+    _adjust(
+        row_count=sign, generation=1,
+        palindrome_count=sign * instance.is_palindrome,
+        total_length=sign * instance.length,
+        total_word_count=sign * instance.word_count,
+    )
+    _add_counts(CharacterStats, 'character', {
+        character: {'occurrences': sign * count, 'string_count': sign}
+        for character, count in instance.character_frequency_map.items()
+    })
+    _add_counts(LengthStats, 'bucket', {facets.bucket_of(instance.length): {'string_count': sign}})
+    return generation()
+
+
+def record_created(instance):
+    """Account for a newly inserted StringAnalysis, and stamp it with its generation."""
+    instance.generation = _record(instance, 1)
+    StringAnalysis.objects.filter(pk=instance.pk).update(generation=instance.generation)
+
+
+def record_deleted(instance):
+    """Account for a deleted StringAnalysis. Returns the generation of the deletion."""
+    return _record(instance, -1)
+
+
+def changed_since(queryset, generation, *fields):
+    """
+    Return the `fields` of the rows of `queryset` (StringAnalysis or
+    StringDeletion) stamped with a generation above `generation`, and the
+    latest generation read, or `generation` if there are none.
+
+    No row stamped at or below the latest generation read can commit
+    afterwards, so passing it to the next call misses nothing.
+    """
+    rows = queryset.filter(generation__gt=generation).order_by('generation').values_list(
+        'generation', *fields
+    )
+    changed, latest = [], generation
+    for latest, *values in rows:
+        changed.append(values)
+    return changed, latest
+
+
+def row_count():
+    """Return the number of stored strings in O(1)."""
+    count = CorpusStats.objects.filter(pk=1).values_list('row_count', flat=True).first()
+    if count is None:
+        count = StringAnalysis.objects.count()
+    return count
+
+
+def generation():
+    """Return a number that changes whenever a string is stored or deleted."""
+    value = CorpusStats.objects.filter(pk=1).values_list('generation', flat=True).first()
+    return value or 0
+
+
+def count_queryset(queryset, mode='exact'):
+    """
+    Count the rows matched by a StringAnalysis queryset.
+
+    Args:
+        queryset: The filtered queryset
+        mode: 'exact', 'estimate' or 'none'
+
+    Returns:
+        The count, or None for mode 'none'. Unfiltered querysets are counted
+        from CorpusStats in both exact and estimate mode. Filtered estimates
+        use the planner's row estimate on PostgreSQL and fall back to an
+        exact COUNT elsewhere.
+    """
+    if mode == 'none':
+        return None
+
+    if queryset.query.is_empty():
+        return 0
+
+    if not queryset.query.where:
+        return row_count()
+
+    if mode == 'estimate' and connection.vendor == 'postgresql':
+        return _planner_estimate(queryset)
+
+    return queryset.count()
+
+
+def _planner_estimate(queryset):
+    """Return PostgreSQL's estimated row count for a queryset."""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def corpus_stats():
+    """
+    Return the rollup served by GET /corpus/stats, read in a fixed number
+    of queries whatever the size of the corpus.
+    """
+    totals = CorpusStats.objects.filter(pk=1).values(
+        'row_count', 'generation', 'palindrome_count', 'total_length', 'total_word_count'
+    ).first() or {
+        'row_count': 0, 'generation': 0, 'palindrome_count': 0, 'total_length': 0, 'total_word_count': 0,
+    }
+    lengths = Counter(dict(LengthStats.objects.values_list('bucket', 'string_count')))
+    characters = CharacterStats.objects.filter(string_count__gt=0).order_by(
+        '-occurrences', 'character'
+    ).values_list('character', 'occurrences', 'string_count')
+    return render_corpus_stats(totals, lengths, characters)
+
+
+def render_corpus_stats(totals, lengths, characters):
+    """
+    Return the GET /corpus/stats body for `totals` (the CorpusStats
+    fields), `lengths` (Counter of strings per LengthStats bucket) and
+    `characters`, (character, occurrences, strings) most occurrences first.
+    Also used for the statistics of snapshots (see snapshot.py).
+    """
+    count = totals['row_count']
+    return {
+        'count': count,
+        'generation': totals['generation'],
+        'palindrome_count': totals['palindrome_count'],
+        'palindrome_ratio': round(totals['palindrome_count'] / count, 4) if count else None,
+        'average_length': round(totals['total_length'] / count, 2) if count else None,
+        'average_word_count': round(totals['total_word_count'] / count, 2) if count else None,
+        'length_histogram': facets.render({'length_bucket': lengths})['length_bucket'],
+        'characters': {
+            character: {'occurrences': occurrences, 'strings': strings}
+            for character, occurrences, strings in characters
+        },
+    }
+
+
+def _chunk_bounds(chunks):
+    """
+    Split the id space into `chunks` ranges of (first id, first id of the
+    next range or None). Ids are hex digests, so the ranges hold about as
+    many rows each.
+    """
+    starts = [format(i * 16 ** 4 // chunks, '04x') for i in range(chunks)]
+    return list(zip(starts, starts[1:] + [None]))
+
+
+def _chunk_queryset(bounds):
+    """Return the strings with ids in `bounds`."""
+    low, high = bounds
+    queryset = StringAnalysis.objects.filter(id__gte=low)
+    if high is not None:
+        queryset = queryset.filter(id__lt=high)
+    return queryset
+
+
+def _aggregate_chunk(queryset):
+    """Return the totals and the length histogram of `queryset`, computed in SQL."""
+    totals = queryset.aggregate(
+        row_count=Count('pk'),
+        palindrome_count=Count('pk', filter=Q(is_palindrome=True)),
+        total_length=Sum('length'),
+        total_word_count=Sum('word_count'),
+    )
+    lengths = facets.count_queryset(queryset, ('length_bucket',))['length_bucket']
+    return {key: value or 0 for key, value in totals.items()}, lengths
+
+
+def _count_characters(rows):
+    """
+    Return the occurrences of each character, and the number of strings
+    containing it, over `rows` of (characters, character_counts).
+
+    Runs in worker processes: it touches neither Django nor the database.
+    """
+    occurrences, string_counts = Counter(), Counter()
+    for characters, packed in rows:
+        for character, count in zip(characters, unpack_counts(packed)):
+            occurrences[character] += count
+        string_counts.update(characters)
+    return occurrences, string_counts
+
+
+def rebuild(chunks=16, workers=4, batch_size=2000):
+    """
+    Recompute the rollup from the stored strings and return the number of
+    strings it covers.
+
+    The id space is split into `chunks` ranges. The totals and length
+    histogram of each are aggregated in SQL; its characters are read
+    `batch_size` rows per round trip and counted by up to `workers`
+    processes, at most one per CPU (with one, in the calling thread), while
+    the next range is read. The generation is incremented, so ETags and
+    cache keys derived from it change.
+
+    The CorpusStats row stays locked until the rebuild commits, so every
+    insert and delete in the meantime waits for it (and then applies its
+    deltas to the rebuilt rollup): run it when writes can be held off.
+    """
+    totals, lengths, occurrences, string_counts = Counter(), Counter(), Counter(), Counter()
+
+    def add(counts):
+        chunk_occurrences, chunk_string_counts = counts
+        occurrences.update(chunk_occurrences)
+        string_counts.update(chunk_string_counts)
+
+    with transaction.atomic():
+        CorpusStats.objects.get_or_create(pk=1)
+        list(CorpusStats.objects.select_for_update().filter(pk=1).values_list('pk'))
+        # Workers only count characters, so they need no database connection;
+        # more of them than CPUs would only add overhead
+        workers = min(workers, os.cpu_count() or 1)
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            pending = []
+            for bounds in _chunk_bounds(chunks):
+                queryset = _chunk_queryset(bounds)
+                chunk_totals, chunk_lengths = _aggregate_chunk(queryset)
+                totals.update(chunk_totals)
+                lengths.update(chunk_lengths)
+                rows = [
+                    (characters, bytes(packed))
+                    for characters, packed in queryset.order_by().values_list(
+                        'characters', 'character_counts'
+                    ).iterator(chunk_size=batch_size)
+                ]
+                if executor is None:
+                    add(_count_characters(rows))
+                else:
+                    pending.append(executor.submit(_count_characters, rows))
+            for future in pending:
+                add(future.result())
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        CorpusStats.objects.filter(pk=1).update(
+            generation=F('generation') + 1,
+            **{
+                field: totals[field]
+                for field in ('row_count', 'palindrome_count', 'total_length', 'total_word_count')
+            },
+        )
+        CharacterStats.objects.all().delete()
+        CharacterStats.objects.bulk_create(
+            [
+                CharacterStats(
+                    character=character, occurrences=count, string_count=string_counts[character]
+                )
+                for character, count in sorted(occurrences.items())
+            ],
+            batch_size=_UPSERT_BATCH_SIZE,
+        )
+        LengthStats.objects.all().delete()
+        LengthStats.objects.bulk_create([
+            LengthStats(bucket=bucket, string_count=count) for bucket, count in sorted(lengths.items())
+        ])
+    return totals['row_count']
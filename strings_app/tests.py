@@ -2,12 +2,73 @@
 Comprehensive tests for the strings_app application.
 Tests all endpoints, filters, error cases, and natural language parsing.
 """
-from django.test import TestCase
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db.models.query import QuerySet
+from django.db.models.sql.compiler import SQLCompiler
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import StringAnalysis
-from .utils import analyze_string, compute_sha256
+from unittest import mock
+from django.core.management import CommandError, call_command
+from .models import AnalysisJob, CharacterStats, CorpusStats, LengthStats, StringAnalysis, StringDeletion
+from . import bloom
+from . import cache
+from . import columnar
+from . import facets
+from . import snapshot
+from . import stats
+from . import jobs
+from . import pagination
+from . import plans
+from . import precompiled
+from .filters import filter_queryset
+from .renderers import FastJSONRenderer
+from .serializers import FAST_FIELDS, StringAnalysisSerializer, fast_serialize
+from .singleflight import SingleFlight, _Call
+from .utils import analyze_string, compute_sha256, pack_counts, unpack_counts
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+import gzip
 import json
+import os
+import tempfile
+import threading
+import unittest
+import uuid
+from io import StringIO
+
+
+# Anonymous throttle counters live in the default cache; without this they
+# accumulate across the whole run and later tests get 429 responses. The
+# Bloom filter is built once and then only changed by the tests' own
+# creates, so query counts do not depend on when it last synced.
+_test_settings = override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    STRINGS_SYNC_INTERVAL=3600,
+    STRINGS_BLOOM_REBUILD_INTERVAL=86400,
+    # Test rollbacks rewind the corpus generation, so cached responses from
+    # one test could be served in another; ResponseCacheTestCase and
+    # DetailCacheTestCase enable the caches
+    STRINGS_LIST_CACHE_BYTES=0,
+    STRINGS_DETAIL_CACHE_BYTES=0,
+    STRINGS_COLUMNAR_INDEX=False,
+)
+
+
+def setUpModule():
+    _test_settings.enable()
+    bloom.stored_ids.invalidate()
+    bloom.might_exist('0' * 64)
+
+
+def tearDownModule():
+    _test_settings.disable()
 
 
 class StringAnalysisUtilsTestCase(TestCase):
@@ -53,6 +114,16 @@ class StringAnalysisUtilsTestCase(TestCase):
         self.assertEqual(len(hash1), 64)
 
 
+    def test_pack_counts_round_trip(self):
+        """Test varint packing of character counts."""
+        counts = [1, 127, 128, 300, 16384, 2 ** 40]
+        packed = pack_counts(counts)
+        
+        self.assertEqual(unpack_counts(packed), counts)
+        self.assertEqual(len(pack_counts([1, 2, 3])), 3)
+        self.assertEqual(unpack_counts(memoryview(packed)), counts)
+
+
 class StringAnalysisModelTestCase(TestCase):
     """Test the StringAnalysis model."""
     
@@ -75,6 +146,16 @@ class StringAnalysisModelTestCase(TestCase):
         with self.assertRaises(Exception):
             StringAnalysis.objects.create(value="test")
     
+    def test_character_frequency_map_storage(self):
+        """Test that the frequency map survives its compact encoding in order."""
+        value = "h\u00e9llo w\u00f6rld \U0001f600\U0001f600"
+        StringAnalysis.objects.create(value=value)
+        loaded = StringAnalysis.objects.get(pk=compute_sha256(value))
+        expected = analyze_string(value)['character_frequency_map']
+        
+        self.assertEqual(list(loaded.character_frequency_map.items()), list(expected.items()))
+        self.assertEqual(loaded.characters, ''.join(expected))
+    
     def test_properties_method(self):
         """Test the properties method."""
         string_analysis = StringAnalysis.objects.create(value="test")
@@ -88,6 +169,60 @@ class StringAnalysisModelTestCase(TestCase):
         self.assertIn('character_frequency_map', props)
 
 
+@override_settings(STRING_COMPRESSION_THRESHOLD=64, STRING_INLINE_PREFIX_LENGTH=8)
+class CompressedValueTestCase(TestCase):
+    """Test transparent compression of large values."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.large = 'abc ' * 100 + 'z'
+        self.string_analysis = StringAnalysis.objects.create(value=self.large)
+    
+    def test_large_value_stored_compressed(self):
+        """Test that only a prefix is stored inline for large values."""
+        inline, compressed = StringAnalysis.objects.values_list(
+            'value', 'value_compressed'
+        ).get(pk=compute_sha256(self.large))
+        
+        self.assertEqual(inline, self.large[:8])
+        self.assertIsNotNone(compressed)
+        self.assertLess(len(compressed), len(self.large))
+        self.assertEqual(self.string_analysis.full_value, self.large)
+        self.assertEqual(self.string_analysis.length, len(self.large))
+    
+    def test_small_value_stored_inline(self):
+        """Test that values under the threshold are not compressed."""
+        small = StringAnalysis.objects.create(value="small")
+        small.refresh_from_db()
+        
+        self.assertEqual(small.value, "small")
+        self.assertIsNone(small.value_compressed)
+    
+    def test_detail_and_list_return_full_value(self):
+        """Test that responses decompress the stored value."""
+        response = self.client.get(f'/strings/{self.large}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['value'], self.large)
+        
+        response = self.client.get('/strings/')
+        self.assertEqual(response.data['data'][0]['value'], self.large)
+    
+    def test_contains_character_beyond_prefix(self):
+        """Test that filters do not depend on the inline prefix."""
+        response = self.client.get('/strings/?contains_character=z')
+        
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_resave_keeps_full_value(self):
+        """Test that re-saving a loaded row does not truncate it."""
+        loaded = StringAnalysis.objects.get(pk=self.string_analysis.pk)
+        loaded.save()
+        loaded = StringAnalysis.objects.get(pk=self.string_analysis.pk)
+        
+        self.assertEqual(loaded.full_value, self.large)
+        self.assertEqual(loaded.length, len(self.large))
+
+
 class CreateStringAPITestCase(TestCase):
     """Test POST /strings endpoint."""
     
@@ -150,6 +285,305 @@ class CreateStringAPITestCase(TestCase):
         ])
 
 
+class SingleFlightTestCase(TestCase):
+    """Test deduplication of concurrent identical creates."""
+    
+    def test_concurrent_callers_share_one_execution(self):
+        """Test that callers arriving mid-flight wait for the leader's result."""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+        
+        def work():
+            calls.append(1)
+            release.wait(5)
+            return 'done'
+        
+        def caller():
+            results.append(flight.do('key', work))
+        
+        leader = threading.Thread(target=caller)
+        leader.start()
+        while not flight.in_flight('key'):
+            pass
+        followers = [threading.Thread(target=caller) for _ in range(4)]
+        for t in followers:
+            t.start()
+        release.set()
+        for t in [leader] + followers:
+            t.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False] + [True] * 4)
+        self.assertTrue(all(result == 'done' for result, _ in results))
+        self.assertFalse(flight.in_flight('key'))
+    
+    def test_errors_propagate_to_waiters(self):
+        """Test that a caller waiting on a failing leader re-raises its exception."""
+        flight = SingleFlight()
+        release = threading.Event()
+        waiting = threading.Event()
+        errors = []
+        
+        class WatchedEvent(threading.Event):
+            def wait(self, timeout=None):
+                waiting.set()
+                return super().wait(timeout)
+        
+        class WatchedCall(_Call):
+            def __init__(self):
+                super().__init__()
+                self.done = WatchedEvent()
+        
+        def fail():
+            release.wait(5)
+            raise RuntimeError('boom')
+        
+        def caller(fn):
+            try:
+                flight.do('key', fn)
+            except RuntimeError as e:
+                errors.append(e)
+        
+        with mock.patch('strings_app.singleflight._Call', WatchedCall):
+            leader = threading.Thread(target=caller, args=(fail,))
+            leader.start()
+            while not flight.in_flight('key'):
+                pass
+            # Would run on its own, and not raise, if it missed the leader
+            follower = threading.Thread(target=caller, args=(lambda: 'ran',))
+            follower.start()
+            self.assertTrue(waiting.wait(5))
+            release.set()
+            for t in (leader, follower):
+                t.join()
+        
+        self.assertEqual(len(errors), 2)
+        self.assertIs(errors[0], errors[1])
+        self.assertFalse(flight.in_flight('key'))
+        self.assertEqual(flight.do('key', lambda: 1), (1, False))
+    
+    def test_shared_create_returns_conflict(self):
+        """Test that a request coalesced onto another's insert gets 409."""
+        client = APIClient()
+        with mock.patch('strings_app.views._create_flight.do',
+                        return_value=((status.HTTP_201_CREATED, {}), True)):
+            response = client.post('/strings', {'value': 'shared'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+    
+    def test_insert_race_returns_conflict(self):
+        """Test that losing the race on the primary key is reported as 409."""
+        StringAnalysis.objects.create(value="raced")
+        client = APIClient()
+        with mock.patch.object(QuerySet, 'exists', return_value=False):
+            response = client.post('/strings', {'value': 'raced'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+
+class RawBodyCreateAPITestCase(TestCase):
+    """Test POST /strings with text/plain and application/octet-stream bodies."""
+    
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_create_from_text_plain(self):
+        """Test that a raw body is stored verbatim and hashed from its bytes."""
+        body = 'Madam, in Eden\n'
+        response = self.client.post('/strings', body.encode(), content_type='text/plain')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['value'], body)
+        self.assertEqual(response.data['id'], compute_sha256(body))
+        self.assertEqual(response.data['properties']['sha256_hash'], compute_sha256(body))
+    
+    def test_create_from_octet_stream(self):
+        """Test that application/octet-stream bodies are decoded as UTF-8."""
+        body = 'na\u00efve caf\u00e9'
+        response = self.client.post(
+            '/strings', body.encode(), content_type='application/octet-stream'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['id'], compute_sha256(body))
+        self.assertEqual(response.data['properties']['length'], len(body))
+    
+    def test_create_with_explicit_charset(self):
+        """Test that a non-UTF-8 charset is honoured and the hash stays canonical."""
+        body = 'gar\u00e7on'
+        response = self.client.post(
+            '/strings', body.encode('latin-1'), content_type='text/plain; charset=latin-1'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['value'], body)
+        self.assertEqual(response.data['id'], compute_sha256(body))
+    
+    def test_invalid_encoding(self):
+        """Test that undecodable bytes are rejected."""
+        response = self.client.post('/strings', b'\xff\xfe\xfa', content_type='text/plain')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_empty_body(self):
+        """Test that a blank body is rejected."""
+        response = self.client.post('/strings', b'  ', content_type='text/plain')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_duplicate_raw_body(self):
+        """Test that a raw body matching a stored value conflicts."""
+        StringAnalysis.objects.create(value="test")
+        response = self.client.post('/strings', b'test', content_type='text/plain')
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+
+class AsyncCreateAPITestCase(TestCase):
+    """Test POST /strings?async=1 and GET /jobs/<id>."""
+    
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_async_create_returns_job(self):
+        """Test that async mode queues a job and defers the analysis."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/strings?async=1', {'value': 'later'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], AnalysisJob.STATUS_PENDING)
+        self.assertEqual(response['Location'], f"/jobs/{response.data['id']}")
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(StringAnalysis.objects.filter(value='later').exists())
+    
+    def test_async_retry_reuses_pending_job(self):
+        """Test that retrying an unfinished job does not queue it twice."""
+        first = self.client.post('/strings?async=1', {'value': 'retry'}, format='json')
+        second = self.client.post('/strings?async=1', {'value': 'retry'}, format='json')
+        
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertEqual(AnalysisJob.objects.count(), 1)
+    
+    def test_async_existing_value_conflicts(self):
+        """Test that async mode reports 409 for stored values."""
+        StringAnalysis.objects.create(value="stored")
+        response = self.client.post('/strings?async=1', {'value': 'stored'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+    
+    def test_job_runs_and_reports_completion(self):
+        """Test that a processed job exposes the created string's id."""
+        response = self.client.post('/strings?async=1', {'value': 'racecar'}, format='json')
+        job_id = response.data['id']
+        
+        call_command('run_analysis_jobs', '--once', stdout=StringIO())
+        
+        response = self.client.get(f'/jobs/{job_id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], AnalysisJob.STATUS_COMPLETED)
+        self.assertEqual(response.data['string_id'], compute_sha256('racecar'))
+        self.assertTrue(StringAnalysis.objects.get(pk=compute_sha256('racecar')).is_palindrome)
+        self.assertEqual(AnalysisJob.objects.get(pk=job_id).value, '')
+    
+    def test_async_raw_body_is_stored_verbatim(self):
+        """Test that an async text/plain body keeps its surrounding whitespace."""
+        body = '  line one\n'
+        response = self.client.post('/strings?async=1', body.encode(), content_type='text/plain')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(AnalysisJob.objects.get(pk=response.data['id']).raw)
+        
+        job = jobs.run_job(response.data['id'])
+        
+        self.assertEqual(job.status, AnalysisJob.STATUS_COMPLETED)
+        self.assertEqual(job.string_id, compute_sha256(body))
+        self.assertEqual(StringAnalysis.objects.get(pk=compute_sha256(body)).value, body)
+    
+    def test_async_raw_body_conflict(self):
+        """Test that a raw job for a value stored meanwhile fails as a conflict."""
+        response = self.client.post('/strings?async=1', b'twice\n', content_type='text/plain')
+        StringAnalysis.objects.create(value='twice\n')
+        
+        job = jobs.run_job(response.data['id'])
+        
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(job.error, "String already exists in the database.")
+        self.assertEqual(job.string_id, compute_sha256('twice\n'))
+    
+    def test_async_conflict_reports_trimmed_id(self):
+        """Test that a JSON job's conflict names the row of the trimmed value."""
+        response = self.client.post('/strings?async=1', {'value': '  padded  '}, format='json')
+        StringAnalysis.objects.create(value='padded')
+        
+        job = jobs.run_job(response.data['id'])
+        
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(job.error, "String already exists in the database.")
+        self.assertEqual(job.string_id, compute_sha256('padded'))
+    
+    def test_job_is_claimed_once(self):
+        """Test that a job already claimed by another worker is skipped."""
+        job = AnalysisJob.objects.create(value='once', value_hash=compute_sha256('once'))
+        
+        self.assertTrue(jobs.claim(job.pk))
+        self.assertIsNone(jobs.run_job(job.pk))
+    
+    def test_expired_lease_is_reclaimed(self):
+        """Test that a job left running past its lease is run again."""
+        job = AnalysisJob.objects.create(value='stuck', value_hash=compute_sha256('stuck'))
+        self.assertIsNotNone(jobs.claim(job.pk))
+        self.assertEqual(jobs.run_pending(), 0)
+        
+        AnalysisJob.objects.filter(pk=job.pk).update(
+            claimed_at=timezone.now() - timedelta(seconds=settings.ANALYSIS_JOB_LEASE + 1)
+        )
+        self.assertEqual(jobs.run_pending(), 1)
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_COMPLETED)
+        self.assertEqual(job.string_id, compute_sha256('stuck'))
+    
+    def test_expired_worker_does_not_overwrite_result(self):
+        """Test that a worker whose job was taken over leaves its result alone."""
+        job = AnalysisJob.objects.create(value='slow', value_hash=compute_sha256('slow'))
+        expired = timezone.now() - timedelta(seconds=settings.ANALYSIS_JOB_LEASE + 1)
+        original_claim = jobs.claim
+        
+        def claim_then_expire(job_id):
+            claimed_at = original_claim(job_id)
+            # Another worker takes the job over while this one is still working
+            AnalysisJob.objects.filter(pk=job_id).update(claimed_at=expired)
+            original_claim(job_id)
+            return claimed_at
+        
+        with mock.patch.object(jobs, 'claim', claim_then_expire):
+            self.assertIsNone(jobs.run_job(job.pk))
+        self.assertEqual(AnalysisJob.objects.get(pk=job.pk).status, AnalysisJob.STATUS_RUNNING)
+    
+    def test_retry_requeues_abandoned_job(self):
+        """Test that retrying the value of an abandoned job queues it again."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            first = self.client.post('/strings?async=1', {'value': 'orphan'}, format='json')
+            self.client.post('/strings?async=1', {'value': 'orphan'}, format='json')
+        self.assertEqual(len(callbacks), 1)
+        
+        AnalysisJob.objects.filter(pk=first.data['id']).update(
+            created_at=timezone.now() - timedelta(seconds=settings.ANALYSIS_JOB_LEASE + 1)
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            second = self.client.post('/strings?async=1', {'value': 'orphan'}, format='json')
+        
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(len(callbacks), 1)
+    
+    def test_job_not_found(self):
+        """Test retrieving a non-existent job."""
+        response = self.client.get('/jobs/00000000-0000-0000-0000-000000000000')
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
 class GetStringByValueAPITestCase(TestCase):
     """Test GET /strings/<string_value> endpoint."""
     
@@ -181,6 +615,257 @@ class GetStringByValueAPITestCase(TestCase):
         self.assertIn('error', response.data)
 
 
+class DetailBodyTestCase(TestCase):
+    """Test detail bodies rendered from the row, and their gzip encoding."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.small = StringAnalysis.objects.create(value="hello world")
+        self.large_value = 'abc ' * 5000 + 'z'
+        self.large = StringAnalysis.objects.create(value=self.large_value)
+        # Above STRING_DETAIL_GZIP_MIN_SIZE, below STRING_COMPRESSION_THRESHOLD
+        self.medium = StringAnalysis.objects.create(value='medium ' * 100)
+    
+    def expected_body(self, pk):
+        return JSONRenderer().render(StringAnalysisSerializer(StringAnalysis.objects.get(pk=pk)).data)
+    
+    def test_body_matches_serializer(self):
+        """Test that the body equals a DRF serialization of the row, read in one query."""
+        with self.assertNumQueries(1):
+            response = self.client.get('/strings/hello world')
+        
+        self.assertEqual(response.content, self.expected_body(self.small.pk))
+        self.assertEqual(response['Content-Type'], 'application/json')
+    
+    def test_no_body_stored(self):
+        """Test that rows store no rendered body next to the columns it repeats."""
+        fields = {field.name for field in StringAnalysis._meta.get_fields()}
+        
+        self.assertFalse(fields & {'detail_json', 'detail_gzip'})
+        self.assertEqual(self.small.render_detail(), (self.expected_body(self.small.pk), None))
+    
+    def test_large_body_plain_for_plain_clients(self):
+        """Test that bodies from the minimum size are sent plain to clients not accepting gzip."""
+        for value in (self.medium.value, self.large_value):
+            with self.subTest(length=len(value)):
+                response = self.client.get(f'/strings/{value}')
+                
+                self.assertEqual(response.content, self.expected_body(compute_sha256(value)))
+                self.assertNotIn('Content-Encoding', response)
+                self.assertIn('Accept-Encoding', response['Vary'])
+    
+    def test_gzip_served_when_accepted(self):
+        """Test that clients accepting gzip get the body gzipped."""
+        response = self.client.get(f'/strings/{self.large_value}', HTTP_ACCEPT_ENCODING='gzip, br')
+        
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.expected_body(self.large.pk))
+    
+    def test_small_body_not_gzipped(self):
+        """Test that bodies below the minimum size are sent plain even to gzip clients."""
+        response = self.client.get('/strings/hello world', HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response.content, self.expected_body(self.small.pk))
+
+
+@override_settings(STRINGS_DETAIL_CACHE_BYTES=1024 * 1024)
+class DetailCacheTestCase(TestCase):
+    """Test the per-process cache of detail responses."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.get_cache('detail').clear()
+        # Generations are rolled back between tests: read deletions from now on
+        cache.deletions._generation = cache.deletions._synced_at = None
+        StringAnalysis.objects.create(value="hot string")
+        self.pk = compute_sha256("hot string")
+        self.first = self.client.get('/strings/hot string')
+    
+    def test_hit_runs_no_query(self):
+        """Test that a cached string is served without touching the database."""
+        with self.assertNumQueries(0):
+            response = self.client.get('/strings/hot string')
+        
+        self.assertEqual(self.first['X-Cache'], 'MISS')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.content, self.first.content)
+        self.assertEqual(response['ETag'], self.first['ETag'])
+    
+    def test_head_and_conditional_get_use_cache(self):
+        """Test that HEAD and If-None-Match are answered from the cache."""
+        with self.assertNumQueries(0):
+            head = self.client.head('/strings/hot string')
+            not_modified = self.client.get(
+                '/strings/hot string', HTTP_IF_NONE_MATCH=self.first['ETag']
+            )
+        
+        self.assertEqual(head.status_code, status.HTTP_200_OK)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    @override_settings(STRING_DETAIL_GZIP_MIN_SIZE=0)
+    def test_gzip_body_is_cached(self):
+        """Test that the gzipped body is served from the cache too."""
+        StringAnalysis.objects.create(value="zipped " * 50)
+        self.client.get('/strings/' + 'zipped%20' * 50, HTTP_ACCEPT_ENCODING='gzip')
+        
+        response = self.client.get('/strings/' + 'zipped%20' * 50, HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['value'], "zipped " * 50)
+    
+    @override_settings(STRING_DETAIL_GZIP_MIN_SIZE=0)
+    def test_gzipped_body_cached_once(self):
+        """Test that a gzipped body is cached in that form only, and inflated for plain clients."""
+        StringAnalysis.objects.create(value="zipped " * 50)
+        self.client.get('/strings/' + 'zipped%20' * 50)
+        
+        content, gzip_content = cache.get_detail(compute_sha256("zipped " * 50))
+        response = self.client.get('/strings/' + 'zipped%20' * 50)
+        
+        self.assertIsNone(content)
+        self.assertEqual(json.loads(gzip.decompress(gzip_content))['value'], "zipped " * 50)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()['value'], "zipped " * 50)
+    
+    def test_delete_evicts_and_publishes(self):
+        """Test that deleting a string evicts it and records the deletion."""
+        self.client.delete('/strings/hot string')
+        
+        response = self.client.get('/strings/hot string')
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(StringDeletion.objects.filter(string_id=self.pk).exists())
+    
+    def test_deletion_recorded_without_local_cache(self):
+        """Test that a process caching no details still records deletions for the others."""
+        with override_settings(STRINGS_DETAIL_CACHE_BYTES=0):
+            self.client.delete('/strings/hot string')
+        
+        self.assertTrue(StringDeletion.objects.filter(string_id=self.pk).exists())
+    
+    @override_settings(STRINGS_SYNC_INTERVAL=0)
+    def test_deletion_by_another_process_evicts(self):
+        """Test that deletions recorded elsewhere are picked up by polling."""
+        # Recorded long after deleted_at, which does not matter: the
+        # generation orders deletions
+        StringDeletion.objects.create(
+            string_id=self.pk, deleted_at=timezone.now() - timedelta(minutes=5),
+            generation=stats.generation() + 1,
+        )
+        
+        response = self.client.get('/strings/hot string')
+        
+        self.assertEqual(response['X-Cache'], 'MISS')
+    
+    def test_old_deletions_are_pruned(self):
+        """Test that deletions older than the TTL plus sync interval are removed."""
+        StringDeletion.objects.create(
+            string_id='0' * 64, deleted_at=timezone.now() - timedelta(days=1)
+        )
+        cache.deletions._pruned_at = None
+        
+        StringAnalysis.objects.get(pk=self.pk).delete()
+        
+        self.assertEqual(
+            list(StringDeletion.objects.values_list('string_id', flat=True)), [self.pk]
+        )
+    
+    def test_stats_endpoint(self):
+        """Test that GET /cache/stats reports the detail cache."""
+        self.client.get('/strings/hot string')
+        
+        detail = self.client.get('/cache/stats').data['detail']
+        
+        self.assertEqual(detail['entries'], 1)
+        self.assertEqual(detail['bytes'], len(self.first.content))
+        self.assertEqual(detail['endpoints']['detail']['hits'], 1)
+
+
+class ConditionalRequestTestCase(TestCase):
+    """Test ETags, Cache-Control and If-None-Match handling."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.string_analysis = StringAnalysis.objects.create(value="hello world")
+        self.large_value = 'abc ' * 5000 + 'z'
+        StringAnalysis.objects.create(value=self.large_value)
+    
+    def test_detail_etag_is_hash(self):
+        """Test that detail responses carry the hash as a strong ETag."""
+        response = self.client.get('/strings/hello world')
+        
+        self.assertEqual(response['ETag'], f'"{self.string_analysis.id}"')
+        self.assertIn('immutable', response['Cache-Control'])
+    
+    def test_detail_not_modified_without_fetching_row(self):
+        """Test that a matching If-None-Match returns 304 after an existence check."""
+        etag = f'"{self.string_analysis.id}"'
+        with self.assertNumQueries(1):
+            response = self.client.get('/strings/hello world', HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+    
+    def test_detail_gzip_etag(self):
+        """Test that the gzip representation has its own ETag, which also validates."""
+        url = f'/strings/{self.large_value}'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        etag = response['ETag']
+        
+        self.assertEqual(etag, f'"{compute_sha256(self.large_value)}-gzip"')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_detail_stale_etag_after_delete(self):
+        """Test that a deleted string is reported missing, not unmodified."""
+        etag = f'"{self.string_analysis.id}"'
+        self.client.delete('/strings/hello world')
+        
+        response = self.client.get('/strings/hello world', HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_detail_other_etag_returns_body(self):
+        """Test that a non-matching If-None-Match returns the full response."""
+        response = self.client.get('/strings/hello world', HTTP_IF_NONE_MATCH='"other"')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_list_weak_etag_changes_with_corpus(self):
+        """Test that list ETags validate until a string is stored or deleted."""
+        response = self.client.get('/strings/?is_palindrome=false')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        
+        response = self.client.get('/strings/?is_palindrome=false', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.client.post('/strings', {'value': 'new string'}, format='json')
+        response = self.client.get('/strings/?is_palindrome=false', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        
+        etag = response['ETag']
+        self.client.delete('/strings/new string')
+        response = self.client.get('/strings/?is_palindrome=false', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_streamed_list_etag(self):
+        """Test that streamed lists carry the same ETag."""
+        regular = self.client.get('/strings/')
+        streamed = self.client.get('/strings/?stream=1')
+        
+        self.assertEqual(streamed['ETag'], regular['ETag'])
+        self.assertEqual(
+            self.client.get('/strings/?stream=1', HTTP_IF_NONE_MATCH=regular['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+
 class ListStringsAPITestCase(TestCase):
     """Test GET /strings endpoint with filters."""
     
@@ -261,6 +946,14 @@ class ListStringsAPITestCase(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
+    def test_filter_contains_special_character(self):
+        """Test contains_character with characters that need quoting."""
+        StringAnalysis.objects.create(value='say "hi". \\o/')
+        
+        for char in ['"', '.', '\\', '%']:
+            response = self.client.get('/strings/', {'contains_character': char})
+            self.assertEqual(response.data['count'], 0 if char == '%' else 1, char)
+    
     def test_filter_invalid_contains_character(self):
         """Test invalid contains_character value (more than 1 char)."""
         response = self.client.get('/strings/?contains_character=ab')
@@ -268,62 +961,843 @@ class ListStringsAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
-class NaturalLanguageFilterAPITestCase(TestCase):
-    """Test GET /strings/filter-by-natural-language endpoint."""
+class MultiValuedFilterAPITestCase(TestCase):
+    """Test the multi-valued list filters."""
+    
+    values = ["racecar", "hello world", "noon", "a b c", "level up", "zebra", "one two three four"]
     
     def setUp(self):
         self.client = APIClient()
-        
-        # Create test strings
-        StringAnalysis.objects.create(value="racecar")
-        StringAnalysis.objects.create(value="hello")
-        StringAnalysis.objects.create(value="noon")
-        StringAnalysis.objects.create(value="a")
+        for value in self.values:
+            StringAnalysis.objects.create(value=value)
     
-    def test_natural_language_palindrome(self):
-        """Test parsing 'palindrome' query."""
-        response = self.client.get('/strings/filter-by-natural-language?query=palindrome')
-        
+    def listed(self, params):
+        response = self.client.get('/strings/', params)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn('interpreted_query', response.data)
-        self.assertEqual(response.data['interpreted_query']['original_query'], 'palindrome')
-        self.assertIn('is_palindrome', response.data['interpreted_query']['parsed_filters'])
+        return sorted(item['value'] for item in response.data['data'])
     
-    def test_natural_language_single_word(self):
-        """Test parsing 'single word' query."""
-        response = self.client.get('/strings/filter-by-natural-language?query=single word')
+    def test_word_count_in(self):
+        """Test that word_count__in returns the union of the single filters, in one query."""
+        separately = sorted(
+            value for word_count in (1, 3) for value in self.listed({'word_count': word_count})
+        )
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/strings/', {'word_count__in': '3,1,3'})
+        
+        self.assertEqual(sorted(item['value'] for item in response.data['data']), separately)
+        self.assertEqual(response.data['filters_applied'], {'word_count__in': [1, 3]})
+        self.assertEqual(sum('"word_count" IN' in query['sql'] for query in queries), 1)
+    
+    def test_contains_character_all_and_any(self):
+        """Test repeated contains_character with all (default) and any semantics."""
+        self.assertEqual(self.listed({'contains_character': ['e', 'l']}), ["hello world", "level up"])
         self.assertEqual(
-            response.data['interpreted_query']['parsed_filters']['word_count'], 1
+            self.listed({'contains_character': ['z', 'n'], 'contains_character_match': 'any'}),
+            ["noon", "one two three four", "zebra"],
         )
+        response = self.client.get('/strings/', {'contains_character': ['l', 'e', 'l']})
+        self.assertEqual(response.data['filters_applied'], {'contains_all': ['e', 'l']})
+        response = self.client.get('/strings/', {'contains_character': 'n', 'contains_character_match': 'any'})
+        self.assertEqual(response.data['filters_applied'], {'contains_character': 'n'})
     
-    def test_natural_language_longer_than(self):
-        """Test parsing 'longer than X characters' query."""
-        response = self.client.get(
-            '/strings/filter-by-natural-language?query=longer than 3 characters'
-        )
+    def test_length_buckets(self):
+        """Test that lengths in any of the ranges match, with open-ended ranges."""
+        self.assertEqual(self.listed({'length_buckets': '4-5,18-'}), ["a b c", "noon", "one two three four", "zebra"])
+        self.assertEqual(self.listed({'length_buckets': '-4'}), ["noon"])
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get('/strings/', {'length_buckets': '18-,4-5,4-5'})
+        self.assertEqual(response.data['filters_applied'], {'length_buckets': [[4, 5], [18, None]]})
+    
+    def test_combined_with_other_filters(self):
+        """Test that the multi-valued filters combine with the others."""
         self.assertEqual(
-            response.data['interpreted_query']['parsed_filters']['min_length'], 4
+            self.listed({'word_count__in': '1,2', 'length_buckets': '1-7', 'is_palindrome': 'true'}),
+            ["noon", "racecar"],
         )
     
-    def test_natural_language_shorter_than(self):
-        """Test parsing 'shorter than X' query."""
-        response = self.client.get(
-            '/strings/filter-by-natural-language?query=shorter than 5'
-        )
+    def test_invalid_values(self):
+        """Test validation of the multi-valued filters."""
+        for params in (
+            {'word_count__in': '1,x'},
+            {'word_count__in': ''},
+            {'length_buckets': '5'},
+            {'length_buckets': '-'},
+            {'length_buckets': '1-x'},
+            {'contains_character': ['a', 'bc']},
+            {'contains_character': 'a', 'contains_character_match': 'some'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get('/strings/', params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('error', response.data)
+    
+    @override_settings(STRINGS_MAX_FILTER_VALUES=2)
+    def test_too_many_values(self):
+        """Test that at most STRINGS_MAX_FILTER_VALUES values are accepted."""
+        response = self.client.get('/strings/', {'word_count__in': '1,2,3'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "word_count__in accepts at most 2 values.")
+
+
+class FacetAPITestCase(TestCase):
+    """Test facet counts on the list endpoints."""
+    
+    values = ["racecar", "hello world", "noon", "a", "level up", "abcdefghijklmno", "never odd or even", "xyz"]
+    
+    def setUp(self):
+        self.client = APIClient()
+        for value in self.values:
+            StringAnalysis.objects.create(value=value)
+    
+    def expected(self, rows):
+        word_counts = sorted({row.word_count for row in rows})
+        return {
+            'word_count': {str(n): sum(row.word_count == n for row in rows) for n in word_counts},
+            'length_bucket': {
+                f"{low}-{'' if high is None else high}": sum(
+                    row.length >= low and (high is None or row.length <= high) for row in rows
+                )
+                for low, high in facets.LENGTH_BUCKETS
+            },
+            'is_palindrome': {
+                'true': sum(row.is_palindrome for row in rows),
+                'false': sum(not row.is_palindrome for row in rows),
+            },
+        }
+    
+    def test_facets(self):
+        """Test the counts of every facet over the whole corpus."""
+        response = self.client.get('/strings/', {'facets': 'is_palindrome,word_count,length_bucket'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(
-            response.data['interpreted_query']['parsed_filters']['max_length'], 4
-        )
+        self.assertEqual(response.data['facets'], self.expected(StringAnalysis.objects.all()))
+        self.assertEqual(list(response.data['facets']), list(facets.FACETS))
+        self.assertEqual(list(response.data['facets']['length_bucket'])[-1], '101-')
     
-    def test_natural_language_contains_letter(self):
-        """Test parsing 'contains letter X' query."""
+    def test_facets_count_matches_not_page(self):
+        """Test that facets count every match of a filtered, paginated request."""
+        params = {'facets': 'word_count,is_palindrome', 'min_length': 4, 'limit': 2}
+        expected = self.expected(StringAnalysis.objects.filter(length__gte=4))
+        del expected['length_bucket']
+        
+        first = self.client.get('/strings/', params)
+        second = self.client.get('/strings/', {**params, 'cursor': first.data['next']})
+        
+        self.assertEqual(first.data['facets'], expected)
+        self.assertEqual(second.data['facets'], expected)
+        self.assertEqual(len(first.data['data']), 2)
+    
+    def test_one_aggregate_query(self):
+        """Test that all facets add a single grouped query."""
+        with CaptureQueriesContext(connection) as without_facets:
+            self.client.get('/strings/', {'is_palindrome': 'false'})
+        with CaptureQueriesContext(connection) as with_facets:
+            self.client.get('/strings/', {
+                'is_palindrome': 'false', 'facets': 'word_count,length_bucket,is_palindrome',
+            })
+        
+        self.assertEqual(len(with_facets), len(without_facets) + 1)
+        self.assertIn('GROUP BY', with_facets[-1]['sql'])
+    
+    def test_natural_language_facets(self):
+        """Test that the natural language filter accepts facets."""
         response = self.client.get(
-            '/strings/filter-by-natural-language?query=contains letter a'
+            '/strings/filter-by-natural-language', {'query': 'palindromes', 'facets': 'word_count'}
+        )
+        
+        self.assertEqual(response.data['facets'], {'word_count': {'1': 3, '4': 1}})
+    
+    @override_settings(STRINGS_LIST_CACHE_BYTES=1024 * 1024)
+    def test_facets_are_cached(self):
+        """Test that facet counts are cached across pages and invalidated by writes."""
+        cache.get_cache('list').clear()
+        params = {'facets': 'length_bucket', 'limit': 3}
+        
+        with mock.patch.object(facets, 'count_queryset', wraps=facets.count_queryset) as count:
+            first = self.client.get('/strings/', params)
+            self.client.get('/strings/', {**params, 'cursor': first.data['next']})
+            self.assertEqual(count.call_count, 1)
+            
+            StringAnalysis.objects.create(value="another one")
+            response = self.client.get('/strings/', params)
+            self.assertEqual(count.call_count, 2)
+        
+        self.assertEqual(
+            response.data['facets']['length_bucket'],
+            self.expected(StringAnalysis.objects.all())['length_bucket'],
+        )
+        self.assertEqual(cache.get_cache('list').stats()['endpoints']['facets']['hits'], 1)
+    
+    def test_invalid_facets(self):
+        """Test unknown facets, and facets with stream."""
+        response = self.client.get('/strings/', {'facets': 'word_count,color'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('facets must be', response.data['error'])
+        
+        response = self.client.get('/strings/', {'facets': 'word_count', 'stream': '1'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class KeysetPaginationAPITestCase(TestCase):
+    """Test cursor pagination of the list endpoints."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        for value in ["racecar", "hello world", "noon", "test", "level"]:
+            StringAnalysis.objects.create(value=value)
+        # Identical timestamps must still page deterministically (by id)
+        first = StringAnalysis.objects.order_by('created_at').first()
+        StringAnalysis.objects.update(created_at=first.created_at)
+        self.expected = [s['id'] for s in self.client.get('/strings/').data['data']]
+    
+    def test_pages_cover_full_list_in_order(self):
+        """Test that following next cursors walks the whole list once."""
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get('/strings/', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['count'], 5)
+            ids += [s['id'] for s in response.data['data']]
+            pages += 1
+            cursor = response.data['next']
+            if cursor is None:
+                break
+        
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 3)
+    
+    def test_previous_cursor(self):
+        """Test that the previous cursor returns the preceding page."""
+        first = self.client.get('/strings/', {'limit': 2})
+        second = self.client.get('/strings/', {'limit': 2, 'cursor': first.data['next']})
+        back = self.client.get('/strings/', {'limit': 2, 'cursor': second.data['previous']})
+        
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(back.data['data'], first.data['data'])
+        self.assertIsNone(back.data['previous'])
+        self.assertEqual(back.data['next'], first.data['next'])
+    
+    def test_pagination_with_filters(self):
+        """Test that cursors respect the active filters."""
+        response = self.client.get('/strings/', {'limit': 1, 'is_palindrome': 'true'})
+        second = self.client.get(
+            '/strings/', {'limit': 5, 'is_palindrome': 'true', 'cursor': response.data['next']}
+        )
+        
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(second.data['data']), 2)
+        self.assertIsNone(second.data['next'])
+    
+    def test_natural_language_pagination(self):
+        """Test that the natural language endpoint paginates too."""
+        response = self.client.get(
+            '/strings/filter-by-natural-language', {'query': 'palindrome', 'limit': 2}
+        )
+        
+        self.assertEqual(len(response.data['data']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIn('interpreted_query', response.data)
+    
+    def test_unpaginated_response_unchanged(self):
+        """Test that requests without limit/cursor get the full list."""
+        response = self.client.get('/strings/')
+        
+        self.assertEqual(len(response.data['data']), 5)
+        self.assertNotIn('next', response.data)
+    
+    def test_invalid_parameters(self):
+        """Test invalid limit and cursor values."""
+        for params in [{'limit': 'abc'}, {'limit': 0}, {'limit': 100000}, {'cursor': 'garbage'}]:
+            response = self.client.get('/strings/', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', "Reads SQLite query plans")
+    def test_cursor_seeks_into_index(self):
+        """Test that pages after a cursor seek to it instead of walking the index."""
+        for ordering in pagination.ORDERINGS:
+            for precompiled_queries in (True, False):
+                with self.subTest(ordering=ordering, precompiled=precompiled_queries), \
+                        override_settings(STRINGS_PRECOMPILED_QUERIES=precompiled_queries):
+                    first = self.client.get('/strings/', {'limit': 2, 'ordering': ordering})
+                    for cursor in (first.data['next'], self.client.get('/strings/', {
+                        'limit': 2, 'ordering': ordering, 'cursor': first.data['next'],
+                    }).data['previous']):
+                        queries = []
+                        
+                        def capture(execute, sql, params, many, context):
+                            queries.append((sql, params))
+                            return execute(sql, params, many, context)
+                        
+                        with connection.execute_wrapper(capture):
+                            self.client.get('/strings/', {'limit': 2, 'ordering': ordering, 'cursor': cursor})
+                        # Planned with bound parameters, as served
+                        sql, params = next(
+                            query for query in queries
+                            if 'FROM "string_analysis"' in query[0] and 'ORDER BY' in query[0]
+                        )
+                        with connection.cursor() as db:
+                            db.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                            plan = [row[-1] for row in db.fetchall()]
+                        # One range search, read in order: no scan, OR of
+                        # index searches or sort
+                        self.assertEqual(len(plan), 1, plan)
+                        self.assertTrue(plan[0].startswith('SEARCH string_analysis'), plan)
+
+
+class OrderingAPITestCase(TestCase):
+    """Test the ordering parameter and top-K queries."""
+    
+    values = ["racecar", "hello world", "noon", "a", "level up", "abcdefg", "never odd or even", "xyz"]
+    
+    def setUp(self):
+        self.client = APIClient()
+        for value in self.values:
+            StringAnalysis.objects.create(value=value)
+    
+    def expected(self, field, descending):
+        rows = sorted(
+            StringAnalysis.objects.values_list(field, 'id', 'value'), reverse=descending
+        )
+        return [value for _, _, value in rows]
+    
+    def test_orderings(self):
+        """Test every ordering, whole and paged in both directions."""
+        for name in pagination.ORDERINGS:
+            field, descending = name.lstrip('-'), name.startswith('-')
+            with self.subTest(ordering=name):
+                expected = self.expected(field, descending)
+                response = self.client.get('/strings/', {'ordering': name})
+                self.assertEqual([item['value'] for item in response.data['data']], expected)
+                
+                values, params = [], {'ordering': name, 'limit': 3}
+                while True:
+                    page = self.client.get('/strings/', params).data
+                    values += [item['value'] for item in page['data']]
+                    if not page['next']:
+                        break
+                    params['cursor'] = page['next']
+                self.assertEqual(values, expected)
+                
+                previous = self.client.get('/strings/', {**params, 'cursor': page['previous']}).data
+                self.assertEqual([item['value'] for item in previous['data']], expected[3:6])
+    
+    def test_orm_path_matches_precompiled(self):
+        """Test that the ORM and precompiled queries order identically."""
+        for params in ({'ordering': '-length', 'limit': 3}, {'ordering': 'word_count', 'is_palindrome': 'false'}):
+            with self.subTest(params=params):
+                compiled = self.client.get('/strings/', params)
+                with override_settings(STRINGS_PRECOMPILED_QUERIES=False):
+                    plain = self.client.get('/strings/', params)
+                self.assertEqual(compiled.content, plain.content)
+    
+    def test_invalid_ordering(self):
+        """Test unknown and unindexed orderings, and cursors of another ordering."""
+        for ordering in ('value', 'is_palindrome', '--length'):
+            with self.subTest(ordering=ordering):
+                response = self.client.get('/strings/', {'ordering': ordering})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('ordering must be one of', response.data['error'])
+        
+        cursor = self.client.get('/strings/', {'ordering': 'length', 'limit': 2}).data['next']
+        response = self.client.get('/strings/', {'ordering': 'word_count', 'cursor': cursor})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/strings/', {'cursor': cursor})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    @unittest.skipUnless(connection.vendor == 'sqlite', "Checks SQLite's query plan")
+    def test_top_k_reads_index(self):
+        """Test that a top-K page is read from an index instead of sorted."""
+        for ordering in pagination.ORDERINGS.values():
+            with self.subTest(ordering=ordering):
+                plan = StringAnalysis.objects.order_by(*ordering)[:5].explain()
+                self.assertIn('INDEX', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_natural_language_top_k(self):
+        """Test "longest N" / "shortest N" queries."""
+        response = self.client.get(
+            '/strings/filter-by-natural-language', {'query': 'longest 2 palindromes'}
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['value'] for item in response.data['data']], ["never odd or even", "racecar"])
+        self.assertEqual(response.data['interpreted_query']['ordering'], '-length')
+        self.assertEqual(response.data['interpreted_query']['limit'], 2)
+        self.assertIsNotNone(response.data['next'])
+    
+    def test_parse_natural_language_ordering(self):
+        """Test the ordering phrases of natural language queries."""
+        from .views import parse_natural_language_ordering
+        
+        self.assertEqual(parse_natural_language_ordering("longest 5 words"), ('-length', 5))
+        self.assertEqual(parse_natural_language_ordering("the 3 shortest palindromes"), ('length', 3))
+        self.assertEqual(parse_natural_language_ordering("shortest strings"), ('length', None))
+        self.assertEqual(
+            parse_natural_language_ordering("top 10 with the most unique characters"),
+            ('-unique_characters', 10),
+        )
+        self.assertEqual(parse_natural_language_ordering("fewest distinct characters"), ('unique_characters', None))
+        self.assertEqual(parse_natural_language_ordering("shorter than 5"), (None, None))
+        with override_settings(STRINGS_MAX_PAGE_SIZE=100):
+            self.assertEqual(parse_natural_language_ordering("longest 5000"), ('-length', 100))
+
+
+class QueryPlanTestCase(TestCase):
+    """Test the plan check of the list endpoints' representative queries."""
+    
+    def setUp(self):
+        from .benchmarks import generate_corpus, load_corpus
+        load_corpus(generate_corpus(2000, large_fraction=0))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    
+    def test_representative_queries_use_indexes(self):
+        """Test that no representative query reads the whole table."""
+        for label, plan, scans in plans.check():
+            with self.subTest(query=label):
+                self.assertEqual(scans, [], plan)
+    
+    def test_sequential_scan_is_reported(self):
+        """Test that a query no index serves is reported, and fails the command."""
+        from .management.commands.check_query_plans import Command
+        
+        results = plans.check([("count character", {'contains_character': 'a'}, None)])
+        self.assertEqual(len(results[0][2]), 1)
+        
+        with self.assertRaisesRegex(CommandError, "count character"):
+            Command(stdout=StringIO()).report(results, verbosity=1)
+    
+    def test_sqlite_plan_formats(self):
+        """Test that full scans are found in the plans of SQLite before and after 3.36."""
+        plan = "\n".join([
+            "SCAN string_analysis",
+            "SCAN TABLE string_analysis",
+            "SCAN string_analysis USING INDEX string_analysis_length_id",
+            "SCAN TABLE string_analysis USING INDEX string_analysis_length_id",
+            "SEARCH TABLE string_analysis USING INDEX string_analysis_length_id (length>?)",
+        ])
+        
+        with mock.patch.object(connection, 'vendor', 'sqlite'):
+            scans = plans.sequential_scans(plan)
+        
+        self.assertEqual(scans, ["SCAN string_analysis", "SCAN TABLE string_analysis"])
+    
+    def test_unsupported_database_is_skipped(self):
+        """Test that other databases get a clear error, and the command skips them."""
+        out = StringIO()
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            with self.assertRaisesRegex(ValueError, "supported databases: postgresql, sqlite"):
+                plans.sequential_scans("")
+            call_command('check_query_plans', stdout=out)
+        
+        self.assertIn("Skipped: query plans of mysql databases cannot be checked", out.getvalue())
+    
+    def test_command_report(self):
+        """Test the command's summary when every plan uses indexes."""
+        from .management.commands.check_query_plans import Command
+        
+        out = StringIO()
+        Command(stdout=out).report(plans.check(), verbosity=1)
+        self.assertIn(f"{len(plans.QUERIES)} query plans use indexes.", out.getvalue())
+
+
+class CorpusStatsRollupTestCase(TestCase):
+    """Test the corpus statistics rollup and GET /corpus/stats."""
+    
+    values = ["racecar", "hello world", "noon", "caf\u00e9 \U0001F600", "level up and away from here", "a"]
+    
+    def setUp(self):
+        self.client = APIClient()
+        for value in self.values:
+            StringAnalysis.objects.create(value=value)
+    
+    def expected(self):
+        """Compute the statistics from the stored strings."""
+        rows = list(StringAnalysis.objects.all())
+        occurrences, strings = {}, {}
+        for row in rows:
+            for character, count in row.character_frequency_map.items():
+                occurrences[character] = occurrences.get(character, 0) + count
+                strings[character] = strings.get(character, 0) + 1
+        palindromes = sum(row.is_palindrome for row in rows)
+        return {
+            'count': len(rows),
+            'palindrome_count': palindromes,
+            'palindrome_ratio': round(palindromes / len(rows), 4) if rows else None,
+            'average_length': round(sum(row.length for row in rows) / len(rows), 2) if rows else None,
+            'average_word_count': round(sum(row.word_count for row in rows) / len(rows), 2) if rows else None,
+            'length_histogram': {
+                f"{low}-{'' if high is None else high}": sum(
+                    row.length >= low and (high is None or row.length <= high) for row in rows
+                )
+                for low, high in facets.LENGTH_BUCKETS
+            },
+            'characters': {
+                character: {'occurrences': occurrences[character], 'strings': strings[character]}
+                for character in sorted(occurrences, key=lambda c: (-occurrences[c], c))
+            },
+        }
+    
+    def actual(self):
+        data = stats.corpus_stats()
+        del data['generation']
+        return data
+    
+    def test_creates_and_deletes_maintain_rollup(self):
+        """Test that the rollup matches the stored strings after writes."""
+        self.assertEqual(self.actual(), self.expected())
+        
+        self.client.post('/strings', {'value': 'a man a plan'}, format='json')
+        self.client.delete('/strings/noon')
+        StringAnalysis.objects.filter(value='caf\u00e9 \U0001F600').delete()
+        
+        self.assertEqual(self.actual(), self.expected())
+        self.assertNotIn('\U0001F600', self.actual()['characters'])
+    
+    def test_rolled_back_insert_leaves_rollup(self):
+        """Test that the rollup is updated in the inserting transaction."""
+        before = self.actual()
+        try:
+            with transaction.atomic():
+                StringAnalysis.objects.create(value="zzz")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        
+        self.assertEqual(self.actual(), before)
+    
+    def test_rebuild(self):
+        """Test that a rebuild recomputes the rollup of rows loaded without signals."""
+        objs = [StringAnalysis(value=value) for value in ("bulk one", "xyzzy", "wow")]
+        for obj in objs:
+            obj.populate_properties()
+        StringAnalysis.objects.bulk_create(objs)
+        CharacterStats.objects.filter(character='l').update(occurrences=1000)
+        LengthStats.objects.all().delete()
+        self.assertNotEqual(self.actual(), self.expected())
+        
+        for chunks in (1, 7):
+            with self.subTest(chunks=chunks):
+                self.assertEqual(stats.rebuild(chunks=chunks, workers=1), len(self.values) + 3)
+                self.assertEqual(self.actual(), self.expected())
+    
+    def test_rebuild_changes_etag(self):
+        """Test that a rebuild moves the generation, so cached responses are revalidated."""
+        response = self.client.get('/corpus/stats')
+        CharacterStats.objects.filter(character='l').update(occurrences=1000)
+        
+        stats.rebuild(chunks=2, workers=1)
+        
+        refreshed = self.client.get('/corpus/stats', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(refreshed.status_code, status.HTTP_200_OK)
+        self.assertEqual(refreshed.json()['characters'], response.json()['characters'])
+    
+    def test_rebuild_command(self):
+        """Test the rebuild_corpus_stats command."""
+        CorpusStats.objects.filter(pk=1).update(palindrome_count=0)
+        out = StringIO()
+        
+        call_command('rebuild_corpus_stats', '--chunks', '4', '--workers', '1', stdout=out)
+        
+        self.assertIn(f"Rebuilt the statistics of {len(self.values)} string(s)", out.getvalue())
+        self.assertEqual(self.actual(), self.expected())
+        with self.assertRaises(CommandError):
+            call_command('rebuild_corpus_stats', '--workers', '0', stdout=StringIO())
+    
+    def test_endpoint(self):
+        """Test GET /corpus/stats, its ETag and its constant query count."""
+        # Generation, totals, length histogram, characters
+        with self.assertNumQueries(4):
+            response = self.client.get('/corpus/stats')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['generation'], stats.generation())
+        del data['generation']
+        self.assertEqual(data, self.expected())
+        self.assertEqual(data['palindrome_count'], 3)
+        
+        with self.assertNumQueries(1):
+            not_modified = self.client.get('/corpus/stats', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        StringAnalysis.objects.create(value="another")
+        with self.assertNumQueries(4):
+            response = self.client.get('/corpus/stats', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.json()['count'], len(self.values) + 1)
+    
+    def test_stats_string_is_a_detail(self):
+        """Test that the stored string "stats" is reached like any other value."""
+        self.assertEqual(self.client.head('/strings/stats').status_code, status.HTTP_404_NOT_FOUND)
+        StringAnalysis.objects.create(value="stats")
+        
+        self.assertEqual(self.client.head('/strings/stats').status_code, status.HTTP_200_OK)
+        response = self.client.get('/strings/stats')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['value'], "stats")
+        self.assertEqual(self.client.delete('/strings/stats').status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(StringAnalysis.objects.filter(value="stats").exists())
+    
+    def test_empty_corpus(self):
+        """Test the statistics of an empty corpus."""
+        StringAnalysis.objects.all().delete()
+        
+        data = self.client.get('/corpus/stats').json()
+        
+        self.assertEqual(data['count'], 0)
+        self.assertIsNone(data['palindrome_ratio'])
+        self.assertEqual(data['characters'], {})
+        self.assertEqual(set(data['length_histogram'].values()), {0})
+
+
+class ParallelRebuildTestCase(TransactionTestCase):
+    """Test rebuilding the corpus statistics with several worker processes."""
+    
+    def test_parallel_rebuild(self):
+        """Test that parallel chunks add up to a sequential rebuild."""
+        for value in ["racecar", "hello world", "noon", "parallel chunks", "z"]:
+            StringAnalysis.objects.create(value=value)
+        maintained = stats.corpus_stats()
+        CharacterStats.objects.all().delete()
+        
+        with mock.patch('strings_app.stats.os.cpu_count', return_value=4):
+            self.assertEqual(stats.rebuild(chunks=8, workers=4), 5)
+        rebuilt = stats.corpus_stats()
+        self.assertEqual(rebuilt.pop('generation'), maintained.pop('generation') + 1)
+        self.assertEqual(rebuilt, maintained)
+
+
+class ListCountTestCase(TestCase):
+    """Test count computation on the list endpoints."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        for value in ["racecar", "hello world", "noon"]:
+            StringAnalysis.objects.create(value=value)
+    
+    def test_row_count_maintained(self):
+        """Test that creates and deletes keep the corpus counter exact."""
+        self.assertEqual(stats.row_count(), 3)
+        
+        self.client.post('/strings', {'value': 'new'}, format='json')
+        self.client.delete('/strings/noon')
+        StringAnalysis.objects.filter(value='racecar').delete()
+        
+        self.assertEqual(CorpusStats.objects.get(pk=1).row_count, 2)
+        self.assertEqual(stats.row_count(), StringAnalysis.objects.count())
+    
+    def test_unpaginated_list_runs_one_query(self):
+        """Test that the unpaginated count comes from the fetched rows."""
+        # One query for the rows, one for the ETag's generation counter
+        with self.assertNumQueries(2):
+            response = self.client.get('/strings/?is_palindrome=true')
+        
+        self.assertEqual(response.data['count'], 2)
+    
+    def test_paginated_count_modes(self):
+        """Test count=exact|estimate|none on paginated requests."""
+        exact = self.client.get('/strings/', {'limit': 1, 'word_count': 1})
+        estimate = self.client.get('/strings/', {'limit': 1, 'count': 'estimate'})
+        none = self.client.get('/strings/', {'limit': 1, 'count': 'none'})
+        invalid = self.client.get('/strings/', {'limit': 1, 'count': 'maybe'})
+        
+        self.assertEqual(exact.data['count'], 2)
+        self.assertEqual(estimate.data['count'], 3)
+        self.assertIsNone(none.data['count'])
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_unfiltered_count_uses_counter(self):
+        """Test that unfiltered pages are counted without COUNT(*)."""
+        CorpusStats.objects.filter(pk=1).update(row_count=42)
+        response = self.client.get('/strings/', {'limit': 1})
+        
+        self.assertEqual(response.data['count'], 42)
+
+
+@override_settings(STRINGS_STREAM_CHUNK_SIZE=2)
+class FastSerializationTestCase(TestCase):
+    """Test that the fast read path matches StringAnalysisSerializer."""
+    
+    @override_settings(STRING_COMPRESSION_THRESHOLD=64, STRING_INLINE_PREFIX_LENGTH=8)
+    def setUp(self):
+        for value in ["racecar", "hello world", "h\u00e9llo \U0001F600", 'quote " \\ \n', 'abc ' * 50]:
+            StringAnalysis.objects.create(value=value)
+    
+    def test_matches_model_serializer(self):
+        """Test that every row serializes identically, compressed ones included."""
+        queryset = StringAnalysis.objects.all()
+        
+        self.assertEqual(fast_serialize(queryset), StringAnalysisSerializer(queryset, many=True).data)
+    
+    def test_matches_model_serializer_in_other_timezone(self):
+        """Test that created_at is rendered in the current timezone like DRF does."""
+        queryset = StringAnalysis.objects.all()
+        with override_settings(TIME_ZONE='Africa/Lagos'):
+            self.assertEqual(fast_serialize(queryset), StringAnalysisSerializer(queryset, many=True).data)
+    
+    def test_list_response_unchanged(self):
+        """Test that the list endpoint returns the serializer's output."""
+        response = APIClient().get('/strings/')
+        expected = StringAnalysisSerializer(StringAnalysis.objects.all(), many=True).data
+        
+        self.assertEqual(response.data['data'], expected)
+        
+        response = APIClient().get('/strings/', {'limit': 2})
+        self.assertEqual(response.data['data'], expected[:2])
+
+
+class FastJSONRendererTestCase(TestCase):
+    """Test that FastJSONRenderer output matches JSONRenderer byte for byte."""
+    
+    def setUp(self):
+        self.data = {
+            'data': [
+                {'value': 'line\u2028sep\u2029 \u00e9\U0001F600 "q" \\ \x00\x1f\t\n', 'n': -(2 ** 63)},
+                {'frequency': {'"': 1, '\\': 2, 'a': 3}, 'flag': True, 'missing': None},
+            ],
+            'created_at': timezone.now(),
+            'amount': Decimal('1.5'),
+            'id': uuid.uuid4(),
+            'error': ErrorDetail('Invalid.', code='invalid'),
+            'lazy': gettext_lazy('Not found.'),
+            'count': 2,
+        }
+    
+    def test_matches_json_renderer(self):
+        """Test identical bytes for nested data and DRF-encoded types."""
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+    
+    def test_matches_json_renderer_for_floats(self):
+        """Test identical bytes for the floats the API returns."""
+        floats = {
+            'rounded': [0.0001, 0.0952, 0.5, 1.0, 2.1, 11.57, 1 / 3, 123456.78, 9999999999999998.0],
+            'negative': [-0.25, -1e-4],
+        }
+        self.assertEqual(FastJSONRenderer().render(floats), JSONRenderer().render(floats))
+        
+        for value in ("racecar", "hello world", "a b c"):
+            StringAnalysis.objects.create(value=value)
+        data = stats.corpus_stats()
+        self.assertIsInstance(data['average_length'], float)
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+    
+    def test_falls_back_for_unencodable_values(self):
+        """Test that integers wider than 64 bits fall back to the stdlib encoder."""
+        data = {'big': 2 ** 70}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+    
+    def test_indent_uses_json_renderer(self):
+        """Test that indented output is left to JSONRenderer."""
+        media_type = 'application/json; indent=2'
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type),
+        )
+    
+    def test_without_orjson(self):
+        """Test that the renderer works when orjson is not installed."""
+        with mock.patch('strings_app.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+    
+    def test_none_renders_empty(self):
+        """Test that empty responses have an empty body."""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class StreamingListAPITestCase(TestCase):
+    """Test GET /strings?stream=1."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        for value in ["racecar", "hello world", "noon", "test", "h\u00e9llo"]:
+            StringAnalysis.objects.create(value=value)
+    
+    def test_stream_matches_regular_response(self):
+        """Test that streamed bytes equal the non-streamed body."""
+        for params in ['', '&is_palindrome=true', '&min_length=100']:
+            regular = self.client.get('/strings/?format=json' + params)
+            streamed = self.client.get('/strings/?format=json&stream=1' + params)
+            
+            self.assertTrue(streamed.streaming)
+            self.assertEqual(b''.join(streamed.streaming_content), regular.content)
+    
+    def test_stream_natural_language(self):
+        """Test streaming the natural language endpoint."""
+        response = self.client.get(
+            '/strings/filter-by-natural-language', {'query': 'palindrome', 'stream': '1'}
+        )
+        body = json.loads(b''.join(response.streaming_content))
+        
+        self.assertEqual(body['count'], 2)
+        self.assertEqual(body['interpreted_query']['parsed_filters'], {'is_palindrome': True})
+    
+    def test_stream_rejects_pagination(self):
+        """Test that stream and limit are mutually exclusive."""
+        response = self.client.get('/strings/', {'stream': '1', 'limit': 2})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NaturalLanguageFilterAPITestCase(TestCase):
+    """Test GET /strings/filter-by-natural-language endpoint."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        
+        # Create test strings
+        StringAnalysis.objects.create(value="racecar")
+        StringAnalysis.objects.create(value="hello")
+        StringAnalysis.objects.create(value="noon")
+        StringAnalysis.objects.create(value="a")
+    
+    def test_natural_language_palindrome(self):
+        """Test parsing 'palindrome' query."""
+        response = self.client.get('/strings/filter-by-natural-language?query=palindrome')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('interpreted_query', response.data)
+        self.assertEqual(response.data['interpreted_query']['original_query'], 'palindrome')
+        self.assertIn('is_palindrome', response.data['interpreted_query']['parsed_filters'])
+    
+    def test_natural_language_single_word(self):
+        """Test parsing 'single word' query."""
+        response = self.client.get('/strings/filter-by-natural-language?query=single word')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['interpreted_query']['parsed_filters']['word_count'], 1
+        )
+    
+    def test_natural_language_longer_than(self):
+        """Test parsing 'longer than X characters' query."""
+        response = self.client.get(
+            '/strings/filter-by-natural-language?query=longer than 3 characters'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['interpreted_query']['parsed_filters']['min_length'], 4
+        )
+    
+    def test_natural_language_shorter_than(self):
+        """Test parsing 'shorter than X' query."""
+        response = self.client.get(
+            '/strings/filter-by-natural-language?query=shorter than 5'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['interpreted_query']['parsed_filters']['max_length'], 4
+        )
+    
+    def test_natural_language_contains_letter(self):
+        """Test parsing 'contains letter X' query."""
+        response = self.client.get(
+            '/strings/filter-by-natural-language?query=contains letter a'
         )
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -368,6 +1842,842 @@ class NaturalLanguageFilterAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
 
 
+@override_settings(STRINGS_LIST_CACHE_BYTES=1024 * 1024)
+class ResponseCacheTestCase(TestCase):
+    """Test the cache of list and natural language filter responses."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.get_cache('list').clear()
+        StringAnalysis.objects.create(value="racecar")
+        StringAnalysis.objects.create(value="hello world")
+    
+    def test_repeated_query_is_served_from_cache(self):
+        """Test that the second identical request is a hit with the same body."""
+        first = self.client.get('/strings/', {'is_palindrome': 'true'})
+        second = self.client.get('/strings/', {'is_palindrome': 'true'})
+        
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.data['count'], 1)
+        self.assertEqual(second.data['filters_applied'], {'is_palindrome': True})
+    
+    def test_hit_runs_no_row_query(self):
+        """Test that a hit only reads the generation counter."""
+        self.client.get('/strings/', {'is_palindrome': 'true'})
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/strings/', {'is_palindrome': 'true'})
+        
+        self.assertEqual(len(queries), 1)
+    
+    def test_create_and_delete_invalidate(self):
+        """Test that writes change the generation and so the cache key."""
+        self.client.get('/strings/', {'is_palindrome': 'true'})
+        
+        self.client.post('/strings', {'value': 'noon'}, format='json')
+        response = self.client.get('/strings/', {'is_palindrome': 'true'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+        
+        self.client.delete('/strings/noon')
+        response = self.client.get('/strings/', {'is_palindrome': 'true'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_natural_language_shares_list_entry(self):
+        """Test that equal filter sets share an entry but keep their own envelope."""
+        self.client.get('/strings/', {'is_palindrome': 'true'})
+        response = self.client.get(
+            '/strings/filter-by-natural-language', {'query': 'palindromic strings'}
+        )
+        
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertNotIn('filters_applied', response.data)
+        self.assertEqual(
+            response.data['interpreted_query']['parsed_filters'], {'is_palindrome': True}
+        )
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_pages_are_cached_separately(self):
+        """Test that pagination parameters are part of the key."""
+        first = self.client.get('/strings/', {'limit': 1})
+        second = self.client.get('/strings/', {'limit': 1, 'cursor': first.data['next']})
+        again = self.client.get('/strings/', {'limit': 1, 'cursor': first.data['next']})
+        
+        self.assertEqual(second['X-Cache'], 'MISS')
+        self.assertEqual(again['X-Cache'], 'HIT')
+        self.assertNotEqual(first.data['data'], second.data['data'])
+        self.assertEqual(again.content, second.content)
+    
+    def test_errors_are_not_cached(self):
+        """Test that an invalid cursor is rejected every time."""
+        for _ in range(2):
+            response = self.client.get('/strings/', {'limit': 1, 'cursor': 'bogus'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_stats_endpoint(self):
+        """Test that GET /cache/stats reports per-endpoint hit rates."""
+        self.client.get('/strings/')
+        self.client.get('/strings/')
+        self.client.get('/strings/filter-by-natural-language', {'query': 'palindromic'})
+        
+        response = self.client.get('/cache/stats')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        endpoints = response.data['list']['endpoints']
+        self.assertEqual(endpoints['list'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+        self.assertEqual(endpoints['natural_language']['misses'], 1)
+        self.assertEqual(response.data['list']['entries'], 2)
+    
+    @override_settings(STRINGS_LIST_CACHE_BYTES=0)
+    def test_disabled(self):
+        """Test that a size of 0 disables the cache."""
+        self.client.get('/strings/')
+        response = self.client.get('/strings/')
+        
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIsNone(self.client.get('/cache/stats').data['list'])
+
+
+class LRUCacheTestCase(TestCase):
+    """Test the LRUCache used for response caching."""
+    
+    def test_evicts_least_recently_used(self):
+        """Test that the total size stays within max_bytes."""
+        lru = cache.LRUCache(max_bytes=10)
+        lru.set('a', b'aaaa')
+        lru.set('b', b'bbbb')
+        lru.get('a')
+        lru.set('c', b'cccc')
+        
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), b'aaaa')
+        self.assertEqual(lru.get('c'), b'cccc')
+        self.assertEqual(lru.stats()['bytes'], 8)
+        self.assertEqual(lru.stats()['evictions'], 1)
+    
+    def test_rejects_oversized_values(self):
+        """Test that values over max_entry_bytes are not stored."""
+        lru = cache.LRUCache(max_bytes=100, max_entry_bytes=4)
+        
+        self.assertFalse(lru.set('a', b'aaaaa'))
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.stats()['bytes'], 0)
+    
+    def test_ttl(self):
+        """Test that entries expire ttl seconds after being stored."""
+        lru = cache.LRUCache(max_bytes=100, ttl=30)
+        with mock.patch('strings_app.cache.time.monotonic', return_value=1000.0):
+            lru.set('a', b'a')
+        with mock.patch('strings_app.cache.time.monotonic', return_value=1029.0):
+            self.assertEqual(lru.get('a'), b'a')
+        with mock.patch('strings_app.cache.time.monotonic', return_value=1030.0):
+            self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.stats()['entries'], 0)
+
+
+@unittest.skipIf(columnar.np is None, "NumPy is not installed")
+@override_settings(STRINGS_COLUMNAR_INDEX=True)
+class ColumnarIndexTestCase(TestCase):
+    """Test list filtering through the in-memory columnar index."""
+    
+    values = [
+        "racecar", "hello world", "noon", "a", "level up", "zebra",
+        "never odd or even", "abc def ghi", "xyz", "tattarrattat", "caf\u00e9 au lait",
+    ]
+    queries = [
+        {'is_palindrome': 'true'},
+        {'is_palindrome': 'false', 'min_length': 4},
+        {'min_length': 3, 'max_length': 7},
+        {'word_count': 2},
+        {'contains_character': 'a'},
+        {'contains_character': 'z', 'word_count': 1},
+        {'min_length': 100},
+        {'word_count__in': '1,3'},
+        {'length_buckets': '1-4,10-'},
+        {'contains_character': ['e', 'l']},
+        {'contains_character': ['z', 'y'], 'contains_character_match': 'any'},
+    ]
+    
+    def setUp(self):
+        self.client = APIClient()
+        columnar.index.invalidate()
+        for value in self.values:
+            StringAnalysis.objects.create(value=value)
+    
+    def list_both_ways(self, params):
+        """Return the list response bodies with and without the index."""
+        indexed = self.client.get('/strings/', params)
+        with override_settings(STRINGS_COLUMNAR_INDEX=False):
+            plain = self.client.get('/strings/', params)
+        return indexed, plain
+    
+    def test_matches_sql_filters(self):
+        """Test that every filter combination returns what SQL returns."""
+        for params in self.queries:
+            with self.subTest(params=params):
+                indexed, plain = self.list_both_ways(params)
+                self.assertEqual(indexed.status_code, status.HTTP_200_OK)
+                self.assertEqual(indexed.content, plain.content)
+    
+    def test_paginated_matches_sql_filters(self):
+        """Test that pages and counts are unchanged."""
+        params = {'is_palindrome': 'true', 'limit': 2}
+        indexed, plain = self.list_both_ways(params)
+        self.assertEqual(indexed.content, plain.content)
+        
+        params['cursor'] = indexed.data['next']
+        indexed, plain = self.list_both_ways(params)
+        self.assertEqual(indexed.content, plain.content)
+    
+    def test_natural_language_uses_index(self):
+        """Test that the natural language filter resolves through the index too."""
+        with mock.patch.object(columnar.index, 'match', wraps=columnar.index.match) as match:
+            response = self.client.get(
+                '/strings/filter-by-natural-language', {'query': 'palindromic single word'}
+            )
+        
+        match.assert_called_once()
+        self.assertEqual(response.data['count'], 4)
+    
+    def test_fetches_matches_by_primary_key(self):
+        """Test that rows are fetched by id, and no match means no row query."""
+        self.client.get('/strings/')
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/strings/', {'word_count': 3, 'contains_character': 'g'})
+        self.assertIn('"string_analysis"."id" IN', queries[-1]['sql'])
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/strings/', {'min_length': 1000})
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['count'], 0)
+    
+    def test_writes_are_visible(self):
+        """Test that strings stored or deleted after the build are reflected."""
+        self.client.get('/strings/', {'is_palindrome': 'true'})
+        
+        self.client.post('/strings', {'value': 'kayak'}, format='json')
+        self.client.delete('/strings/noon')
+        indexed, plain = self.list_both_ways({'is_palindrome': 'true'})
+        
+        self.assertEqual(indexed.content, plain.content)
+        values = [item['value'] for item in indexed.data['data']]
+        self.assertIn('kayak', values)
+        self.assertNotIn('noon', values)
+    
+    def test_sync_reads_rows_by_generation(self):
+        """Test that sync reads each new row once, whatever its created_at."""
+        columnar.index.match({}, stats.generation())
+        StringAnalysis.objects.create(value="one more")
+        # created_at is assigned on construction, possibly long before commit
+        StringAnalysis.objects.create(value="late commit", created_at=timezone.now() - timedelta(days=1))
+        
+        matches = columnar.index.match({}, stats.generation())
+        
+        self.assertEqual(len(matches), len(set(matches)))
+        self.assertEqual(len(matches), len(self.values) + 2)
+        self.assertIn(compute_sha256("late commit"), matches)
+    
+    def test_stale_generation_is_covered(self):
+        """Test that a generation read before a synced write does not rebuild."""
+        stale = stats.generation()
+        columnar.index.match({}, stale)
+        StringAnalysis.objects.create(value="one more")
+        columnar.index.match({}, stats.generation())
+        
+        with mock.patch.object(columnar.index, '_rebuild') as rebuild:
+            matches = columnar.index.match({}, stale)
+        
+        rebuild.assert_not_called()
+        self.assertIn(compute_sha256("one more"), matches)
+    
+    def test_regressed_generation_rebuilds(self):
+        """Test that the index is rebuilt when the corpus generation goes back."""
+        columnar.index.match({}, stats.generation())
+        StringAnalysis.objects.create(value="one more")
+        columnar.index.match({}, stats.generation())
+        
+        StringAnalysis.objects.filter(value="one more").delete()
+        CorpusStats.objects.filter(pk=1).update(generation=0)
+        with mock.patch.object(columnar.index, '_rebuild', wraps=columnar.index._rebuild) as rebuild:
+            matches = columnar.index.match({}, stats.generation())
+        
+        rebuild.assert_called_once()
+        self.assertNotIn(compute_sha256("one more"), matches)
+    
+    def test_rebuild_does_not_block_requests(self):
+        """Test that a due rebuild in another thread leaves requests on the current columns."""
+        columnar.index.match({}, stats.generation())
+        StringAnalysis.objects.create(value="one more")
+        
+        with columnar.index._build_lock, override_settings(STRINGS_COLUMNAR_REBUILD_INTERVAL=0):
+            with mock.patch.object(columnar.index, '_rebuild') as rebuild:
+                matches = columnar.index.match({}, stats.generation())
+        
+        rebuild.assert_not_called()
+        self.assertIn(compute_sha256("one more"), matches)
+    
+    def test_falls_back_to_sql(self):
+        """Test that unsupported or unselective filters are left to SQL."""
+        generation = stats.generation()
+        self.assertIsNone(columnar.index.match({'contains_character': '\u00e9'}, generation))
+        self.assertIsNone(columnar.index.match({'unknown': 1}, generation))
+        with override_settings(STRINGS_COLUMNAR_MAX_MATCHES=2):
+            self.assertIsNone(columnar.index.match({'is_palindrome': True}, generation))
+        
+        response = self.client.get('/strings/', {'contains_character': '\u00e9'})
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_character_filters_are_case_sensitive(self):
+        """Test that the index, SQL and snapshots agree on mixed-case characters."""
+        for value in ("Apple", "APPLE pie", "banana"):
+            StringAnalysis.objects.create(value=value)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'corpus.snapshot')
+        snapshot.export(path)
+        values = self.values + ["Apple", "APPLE pie", "banana"]
+        queries = [
+            ({'contains_character': 'A'}, {"Apple", "APPLE pie"}),
+            ({'contains_character': 'L'}, {"APPLE pie"}),
+            ({'contains_character': ['A', 'l']}, {"Apple"}),
+            ({'contains_character': ['L', 'B'], 'contains_character_match': 'any'}, {"APPLE pie"}),
+            ({'contains_character': 'p'}, {value for value in values if 'p' in value}),
+        ]
+    
+        for params, matching in queries:
+            with self.subTest(params=params):
+                indexed, plain = self.list_both_ways(params)
+                with override_settings(STRINGS_COLUMNAR_INDEX=False, STRINGS_PRECOMPILED_QUERIES=False):
+                    orm = self.client.get('/strings/', params)
+                with override_settings(STRINGS_SNAPSHOT_PATH=path):
+                    from_snapshot = self.client.get('/strings/', params)
+    
+                self.assertEqual({item['value'] for item in indexed.data['data']}, matching)
+                self.assertEqual(indexed.content, plain.content)
+                self.assertEqual(orm.content, plain.content)
+                self.assertEqual(
+                    [item['id'] for item in from_snapshot.data['data']],
+                    [item['id'] for item in plain.data['data']],
+                )
+
+
+class PrecompiledQueryTestCase(TestCase):
+    """Test list filters run through precompiled SQL."""
+    
+    values = [
+        "racecar", "hello world", "noon", "a", "level up", "zebra", "100% sure",
+        "snake_case name", "never odd or even", "abc def ghi", "tattarrattat", "caf\u00e9 au lait",
+    ]
+    filter_values = {
+        'min_length': 4,
+        'max_length': 11,
+        'word_count': 2,
+        'contains_character': 'a',
+    }
+    
+    def setUp(self):
+        self.client = APIClient()
+        for value in self.values:
+            StringAnalysis.objects.create(value=value)
+    
+    def shapes(self):
+        """Yield a filter dict of every shape."""
+        names = list(self.filter_values)
+        for bits in range(2 ** len(names)):
+            filters = {name: self.filter_values[name] for i, name in enumerate(names) if bits >> i & 1}
+            yield filters
+            yield {**filters, 'is_palindrome': True}
+            yield {**filters, 'is_palindrome': False}
+    
+    def test_rows_and_counts_match_orm(self):
+        """Test that every filter shape returns what the ORM returns."""
+        for filters in self.shapes():
+            with self.subTest(filters=filters):
+                query = precompiled.get(filters)
+                queryset = filter_queryset(filters)
+                self.assertIsNotNone(query)
+                self.assertEqual(
+                    [tuple(row) for row in query.rows(filters)],
+                    list(queryset.values_list(*FAST_FIELDS)),
+                )
+                self.assertEqual(query.count(filters), queryset.count())
+    
+    def test_pages_match_orm(self):
+        """Test that pages and cursors, in both directions, are the ORM's."""
+        paginator = pagination.KeysetPaginator()
+        key = lambda row: [row[FAST_FIELDS.index('created_at')], row[FAST_FIELDS.index('id')]]
+        for filters in ({}, {'is_palindrome': False}, {'contains_character': 'e', 'max_length': 20}):
+            with self.subTest(filters=filters):
+                query = precompiled.get(filters)
+                queryset = filter_queryset(filters).values_list(*FAST_FIELDS)
+                cursor, previous = None, []
+                while True:
+                    page = query.page(filters, 2, cursor, key=key)
+                    expected = paginator.paginate(queryset, 2, cursor, key=key)
+                    self.assertEqual([tuple(row) for row in page.rows], expected.rows)
+                    self.assertEqual(page.next_cursor, expected.next_cursor)
+                    self.assertEqual(page.previous_cursor, expected.previous_cursor)
+                    if page.previous_cursor:
+                        previous.append(page.previous_cursor)
+                    if not page.next_cursor:
+                        break
+                    cursor = page.next_cursor
+                for cursor in previous:
+                    page = query.page(filters, 2, cursor, key=key)
+                    expected = paginator.paginate(queryset, 2, cursor, key=key)
+                    self.assertEqual([tuple(row) for row in page.rows], expected.rows)
+                    self.assertEqual(page.previous_cursor, expected.previous_cursor)
+    
+    def test_multi_valued_filters_match_orm(self):
+        """Test shapes of the multi-valued filters, which vary in length."""
+        for filters in (
+            {'word_count__in': [1, 2]},
+            {'word_count__in': [1, 2, 3], 'is_palindrome': False},
+            {'contains_all': ['a', 'e']},
+            {'contains_any': ['%', 'z', '\u00e9']},
+            {'length_buckets': [[None, 4], [10, 12], [15, None]]},
+            {'length_buckets': [[4, 7]], 'contains_any': ['a', 'o'], 'min_length': 5},
+        ):
+            with self.subTest(filters=filters):
+                query = precompiled.get(filters)
+                self.assertIsNotNone(query)
+                self.assertEqual(
+                    [tuple(row) for row in query.rows(filters)],
+                    list(filter_queryset(filters).values_list(*FAST_FIELDS)),
+                )
+                self.assertEqual(query.count(filters), filter_queryset(filters).count())
+        self.assertIsNot(precompiled.get({'word_count__in': [1, 2]}), precompiled.get({'word_count__in': [1]}))
+        self.assertIs(precompiled.get({'word_count__in': [1, 2]}), precompiled.get({'word_count__in': [5, 6]}))
+    
+    def test_like_wildcards_are_escaped(self):
+        """Test that % and _ only match themselves."""
+        for character in ('%', '_', '\\'):
+            with self.subTest(character=character):
+                filters = {'contains_character': character}
+                rows = precompiled.get(filters).rows(filters)
+                self.assertEqual(
+                    [tuple(row) for row in rows],
+                    list(filter_queryset(filters).values_list(*FAST_FIELDS)),
+                )
+        self.assertEqual(len(precompiled.get({'contains_character': '%'}).rows({'contains_character': '%'})), 1)
+    
+    def test_list_responses_unchanged(self):
+        """Test that list and natural language responses are byte-identical."""
+        requests = [
+            ('/strings/', {'is_palindrome': 'true', 'word_count': 1}),
+            ('/strings/', {'min_length': 5, 'contains_character': 'e', 'limit': 2}),
+            ('/strings/', {'count': 'none', 'limit': 3}),
+            ('/strings/filter-by-natural-language', {'query': 'strings longer than 8 characters'}),
+        ]
+        for path, params in requests:
+            with self.subTest(path=path, params=params):
+                compiled = self.client.get(path, params)
+                with override_settings(STRINGS_PRECOMPILED_QUERIES=False):
+                    plain = self.client.get(path, params)
+                self.assertEqual(compiled.status_code, status.HTTP_200_OK)
+                self.assertEqual(compiled.content, plain.content)
+    
+    def test_shapes_compiled_once(self):
+        """Test that a shape is reused with other values, without compiling SQL."""
+        query = precompiled.get({'word_count': 1})
+        self.assertIs(precompiled.get({'word_count': 2}), query)
+        self.assertIsNot(precompiled.get({'word_count': 2, 'is_palindrome': True}), query)
+        
+        with mock.patch.object(SQLCompiler, 'as_sql', side_effect=AssertionError):
+            rows = query.rows({'word_count': 2})
+        self.assertEqual(len(rows), 4)
+    
+    def test_compiled_shapes_are_bounded(self):
+        """Test that each thread keeps only the most recently used shapes."""
+        with override_settings(STRINGS_PRECOMPILED_MAX_SHAPES=2):
+            single = precompiled.get({'word_count': 1})
+            pair = precompiled.get({'word_count__in': [0, 1]})
+            self.assertIs(precompiled.get({'word_count': 2}), single)
+            
+            precompiled.get({'word_count__in': [0, 1, 2]})
+            self.assertIs(precompiled.get({'word_count': 3}), single)
+            self.assertIsNot(precompiled.get({'word_count__in': [2, 3]}), pair)
+            self.assertEqual(len(precompiled._local.queries), 2)
+    
+    def test_falls_back_to_orm(self):
+        """Test that unknown filters and the setting switched off use the ORM."""
+        self.assertIsNone(precompiled.get({'unknown': 1}))
+        with override_settings(STRINGS_PRECOMPILED_QUERIES=False):
+            self.assertIsNone(precompiled.get({'word_count': 1}))
+
+
+class SnapshotServingTestCase(TestCase):
+    """Test serving reads from an exported snapshot."""
+    
+    values = [
+        "racecar", "hello world", "noon", "a", "level up", "zebra",
+        "never odd or even", "abc def ghi", "xyz", "tattarrattat", "caf\u00e9 au lait",
+    ]
+    list_queries = [
+        {},
+        {'is_palindrome': 'true'},
+        {'min_length': 3, 'max_length': 9},
+        {'word_count': 3},
+        {'contains_character': 'e', 'is_palindrome': 'false'},
+        {'contains_character': '\u00e9'},
+        {'min_length': 1000},
+        {'word_count__in': '1,3', 'length_buckets': '-5,9-12'},
+        {'contains_character': ['a', '\u00e9']},
+        {'contains_character': ['z', '\u00e9'], 'contains_character_match': 'any'},
+        {'contains_character': ['z', 'y'], 'contains_character_match': 'any'},
+        {'ordering': '-length'},
+        {'ordering': 'created_at', 'is_palindrome': 'false'},
+        {'ordering': 'unique_characters', 'min_length': 4},
+        {'ordering': '-word_count'},
+        {'facets': 'word_count,length_bucket,is_palindrome'},
+        {'facets': 'is_palindrome,length_bucket', 'contains_character': '\u00e9', 'limit': 1},
+    ]
+    
+    def setUp(self):
+        self.client = APIClient()
+        now = timezone.now()
+        for index, value in enumerate(self.values):
+            # Pairs of rows share a timestamp, so ids break ties
+            StringAnalysis.objects.create(value=value, created_at=now - timedelta(seconds=index // 2))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'corpus.snapshot')
+        self.rows = snapshot.export(self.path)
+    
+    def get_both_ways(self, url, params=None):
+        """Return a response served from the database and one from the snapshot."""
+        from_db = self.client.get(url, params)
+        with self.settings(STRINGS_SNAPSHOT_PATH=self.path):
+            with self.assertNumQueries(0):
+                from_snapshot = self.client.get(url, params)
+        return from_db, from_snapshot
+    
+    def test_export(self):
+        """Test that every row is exported and the file is a valid snapshot."""
+        current = snapshot.Snapshot(self.path)
+        
+        self.assertEqual(self.rows, len(self.values))
+        self.assertEqual(current.row_count, len(self.values))
+        self.assertEqual(current.find(compute_sha256("noon")), sorted(
+            compute_sha256(value) for value in self.values
+        ).index(compute_sha256("noon")))
+        self.assertIsNone(current.find(compute_sha256("missing")))
+        self.assertIsNone(current.find("not hex"))
+    
+    def test_detail(self):
+        """Test that detail responses are identical to the database's."""
+        for value in ("racecar", "caf\u00e9 au lait"):
+            from_db, from_snapshot = self.get_both_ways('/strings/' + value)
+            self.assertEqual(from_snapshot.status_code, status.HTTP_200_OK)
+            self.assertEqual(from_snapshot.content, from_db.content)
+            self.assertEqual(from_snapshot['ETag'], from_db['ETag'])
+        
+        from_db, from_snapshot = self.get_both_ways('/strings/missing')
+        self.assertEqual(from_snapshot.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(from_snapshot.content, from_db.content)
+    
+    @override_settings(STRING_COMPRESSION_THRESHOLD=64)
+    def test_gzipped_body(self):
+        """Test that bodies kept only gzipped are served in both encodings."""
+        StringAnalysis.objects.create(value="large " * 200)
+        snapshot.export(self.path)
+        self.assertIn(1, snapshot.Snapshot(self.path).body_gzipped.tolist())
+        url = '/strings/' + 'large%20' * 200
+        
+        for encoding in ('gzip', ''):
+            from_db = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+            with self.settings(STRINGS_SNAPSHOT_PATH=self.path):
+                from_snapshot = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+            self.assertEqual(from_snapshot.content, from_db.content)
+            self.assertEqual(from_snapshot.get('Content-Encoding'), from_db.get('Content-Encoding'))
+        
+        from_db, from_snapshot = self.get_both_ways('/strings/', {'min_length': 1000})
+        self.assertEqual(from_snapshot.data['count'], 1)
+        self.assertEqual(from_snapshot.content, from_db.content)
+    
+    @override_settings(STRINGS_SNAPSHOT_PATH='')
+    def test_head_and_conditional_get(self):
+        """Test HEAD and If-None-Match against the snapshot."""
+        etag = self.client.get('/strings/noon')['ETag']
+        with self.settings(STRINGS_SNAPSHOT_PATH=self.path):
+            head = self.client.head('/strings/noon')
+            missing = self.client.head('/strings/missing')
+            not_modified = self.client.get('/strings/noon', HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(head.status_code, status.HTTP_200_OK)
+        self.assertEqual(head['ETag'], etag)
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_list_filters(self):
+        """Test that filtered lists are identical to the database's."""
+        for params in self.list_queries:
+            with self.subTest(params=params):
+                from_db, from_snapshot = self.get_both_ways('/strings/', params)
+                self.assertEqual(from_snapshot.status_code, status.HTTP_200_OK)
+                self.assertEqual(from_snapshot.content, from_db.content)
+    
+    def test_list_filters_without_numpy(self):
+        """Test the pure Python filter evaluation."""
+        with mock.patch.object(snapshot, 'np', None):
+            for params in self.list_queries:
+                with self.subTest(params=params):
+                    from_db, from_snapshot = self.get_both_ways('/strings/', params)
+                    self.assertEqual(from_snapshot.content, from_db.content)
+    
+    def test_natural_language(self):
+        """Test that natural language filters are served from the snapshot."""
+        from_db, from_snapshot = self.get_both_ways(
+            '/strings/filter-by-natural-language', {'query': 'palindromic single word'}
+        )
+        self.assertEqual(from_snapshot.content, from_db.content)
+    
+    def test_pagination(self):
+        """Test that pages and cursors match the database's in both directions."""
+        for params in (
+            {'limit': 3},
+            {'limit': 2, 'word_count': 1, 'count': 'none'},
+            {'limit': 2, 'ordering': '-length'},
+            {'limit': 3, 'ordering': 'created_at', 'is_palindrome': 'false'},
+            {'limit': 2, 'ordering': 'word_count'},
+        ):
+            with self.subTest(params=params):
+                params = dict(params)
+                pages = 0
+                while True:
+                    from_db, from_snapshot = self.get_both_ways('/strings/', params)
+                    self.assertEqual(from_snapshot.content, from_db.content)
+                    pages += 1
+                    if not from_db.data['next']:
+                        break
+                    params['cursor'] = from_db.data['next']
+                self.assertGreater(pages, 1)
+                while from_db.data['previous']:
+                    params['cursor'] = from_db.data['previous']
+                    from_db, from_snapshot = self.get_both_ways('/strings/', params)
+                    self.assertEqual(from_snapshot.content, from_db.content)
+        
+        with self.settings(STRINGS_SNAPSHOT_PATH=self.path):
+            response = self.client.get('/strings/', {'limit': 2, 'cursor': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_lookup(self):
+        """Test that batch lookups are identical to the database's."""
+        body = {'values': ['noon', 'missing', 'racecar']}
+        from_db = self.client.post('/strings/lookup', body, format='json')
+        with self.settings(STRINGS_SNAPSHOT_PATH=self.path):
+            from_snapshot = self.client.post('/strings/lookup', body, format='json')
+        
+        self.assertEqual(from_snapshot.content, from_db.content)
+    
+    def test_corpus_stats(self):
+        """Test that statistics are those of the snapshot, not of the database."""
+        from_db, from_snapshot = self.get_both_ways('/corpus/stats')
+        self.assertEqual(from_snapshot.content, from_db.content)
+        self.assertEqual(from_snapshot['ETag'], snapshot.Snapshot(self.path).etag)
+    
+        StringAnalysis.objects.create(value="written after the export")
+        with self.settings(STRINGS_SNAPSHOT_PATH=self.path):
+            with self.assertNumQueries(0):
+                after_write = self.client.get('/corpus/stats')
+                not_modified = self.client.get('/corpus/stats', HTTP_IF_NONE_MATCH=from_snapshot['ETag'])
+    
+        self.assertEqual(after_write.content, from_snapshot.content)
+        self.assertEqual(after_write.data['count'], len(self.values))
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_writes_are_refused(self):
+        """Test that creating and deleting are refused while serving a snapshot."""
+        with self.settings(STRINGS_SNAPSHOT_PATH=self.path):
+            created = self.client.post('/strings', {'value': 'new'}, format='json')
+            deleted = self.client.delete('/strings/noon')
+        
+        self.assertEqual(created.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(deleted.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertTrue(StringAnalysis.objects.filter(value='noon').exists())
+    
+    def test_replaced_file_is_picked_up(self):
+        """Test that a re-export is served once the file check is due."""
+        with self.settings(STRINGS_SNAPSHOT_PATH=self.path):
+            self.assertEqual(self.client.get('/strings/kayak').status_code, 404)
+        StringAnalysis.objects.create(value="kayak")
+        snapshot.export(self.path)
+        snapshot._checked_at = 0.0
+        
+        with self.settings(STRINGS_SNAPSHOT_PATH=self.path):
+            response = self.client.get('/strings/kayak')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_command(self):
+        """Test the export_snapshot management command."""
+        out = StringIO()
+        call_command('export_snapshot', self.path, stdout=out)
+        
+        self.assertIn(f"Exported {len(self.values)} string(s)", out.getvalue())
+
+
+class StringLookupAPITestCase(TestCase):
+    """Test POST /strings/lookup."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        for value in ["racecar", "hello world", "noon"]:
+            StringAnalysis.objects.create(value=value)
+    
+    def test_lookup_values_in_order(self):
+        """Test that found and missing values keep the request order."""
+        response = self.client.post('/strings/lookup', {
+            'values': ['noon', 'absent', 'racecar', 'noon', 'gone'],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['value'] for item in response.data['data']], ['noon', 'racecar'])
+        self.assertEqual(response.data['missing'], ['absent', 'gone'])
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            response.data['data'][0],
+            StringAnalysisSerializer(StringAnalysis.objects.get(pk=compute_sha256('noon'))).data,
+        )
+    
+    def test_lookup_ids(self):
+        """Test lookups by id."""
+        ids = [compute_sha256('hello world'), 'f' * 64]
+        response = self.client.post('/strings/lookup', {'ids': ids}, format='json')
+        
+        self.assertEqual(response.data['data'][0]['id'], ids[0])
+        self.assertEqual(response.data['missing'], ['f' * 64])
+    
+    @mock.patch('strings_app.views.LOOKUP_CHUNK_SIZE', 2)
+    @override_settings(STRINGS_BLOOM_FILTER=False)
+    def test_lookup_chunks_queries(self):
+        """Test that large lookups are split into several IN queries."""
+        values = ["racecar", "hello world", "noon", "x", "y"]
+        with self.assertNumQueries(3):
+            response = self.client.post('/strings/lookup', {'values': values}, format='json')
+        
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['missing'], ['x', 'y'])
+    
+    def test_lookup_validation(self):
+        """Test rejected request bodies."""
+        cases = [
+            ({}, status.HTTP_400_BAD_REQUEST),
+            ({'values': ['a'], 'ids': ['b']}, status.HTTP_400_BAD_REQUEST),
+            ({'values': 'noon'}, status.HTTP_422_UNPROCESSABLE_ENTITY),
+            ({'ids': [1, 2]}, status.HTTP_422_UNPROCESSABLE_ENTITY),
+        ]
+        for body, expected in cases:
+            response = self.client.post('/strings/lookup', body, format='json')
+            self.assertEqual(response.status_code, expected, body)
+            self.assertIn('error', response.data)
+        
+        with override_settings(STRINGS_MAX_LOOKUP_SIZE=2):
+            response = self.client.post('/strings/lookup', {'values': ['a', 'b', 'c']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_string_named_lookup(self):
+        """Test that the value "lookup" can still be fetched and deleted."""
+        StringAnalysis.objects.create(value="lookup")
+        
+        response = self.client.get('/strings/lookup')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['value'], 'lookup')
+        
+        response = self.client.delete('/strings/lookup')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class BloomFilterTestCase(TestCase):
+    """Test the Bloom filter of stored ids and HEAD /strings/<value>."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.string_analysis = StringAnalysis.objects.create(value="hello world")
+    
+    def test_membership_and_false_positive_rate(self):
+        """Test that added digests are always found and others rarely are."""
+        bloom_filter = bloom.BloomFilter(1000, 0.01)
+        added = [compute_sha256(str(i)) for i in range(1000)]
+        for digest in added:
+            bloom_filter.add(digest)
+        
+        self.assertTrue(all(digest in bloom_filter for digest in added))
+        false_positives = sum(compute_sha256(f"other {i}") in bloom_filter for i in range(10000))
+        self.assertLess(false_positives, 300)
+        # Digests that collide with earlier ones are not counted
+        self.assertGreater(bloom_filter.count, 980)
+    
+    def test_missing_value_answered_without_query(self):
+        """Test that GET, HEAD and DELETE of never-stored values skip the database."""
+        with self.assertNumQueries(0):
+            get = self.client.get('/strings/never stored')
+            head = self.client.head('/strings/never stored')
+            delete = self.client.delete('/strings/never stored')
+        
+        self.assertEqual(get.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(get.data, {"error": "String not found."})
+        self.assertEqual(head.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(delete.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_head_existing_string(self):
+        """Test that HEAD reports a stored string with an existence check only."""
+        with self.assertNumQueries(1):
+            response = self.client.head('/strings/hello world')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], f'"{self.string_analysis.id}"')
+        self.assertEqual(response.content, b'')
+    
+    def test_create_skips_existence_check(self):
+        """Test that creating a new value does not query for duplicates first."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/strings', {'value': 'brand new'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT 1 AS')])
+        self.assertTrue(bloom.might_exist(compute_sha256('brand new')))
+    
+    def test_duplicate_create_still_conflicts(self):
+        """Test that stored values are still reported as conflicts."""
+        response = self.client.post('/strings', {'value': 'hello world'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+    
+    def test_sync_picks_up_rows_stored_elsewhere(self):
+        """Test that rows inserted by another process are found after a sync."""
+        # Generations are rolled back between tests: start from this one's
+        bloom.stored_ids.invalidate()
+        bloom.might_exist('0' * 64)
+        with mock.patch.object(bloom, 'record_created'):
+            # created_at is assigned on construction, possibly long before commit
+            other = StringAnalysis.objects.create(
+                value="from another worker", created_at=timezone.now() - timedelta(days=1)
+            )
+        
+        self.assertFalse(bloom.might_exist(other.pk))
+        with override_settings(STRINGS_SYNC_INTERVAL=0):
+            response = self.client.get('/strings/from another worker')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_rebuild_drops_deleted_ids(self):
+        """Test that deleted ids leave the filter when it is rebuilt."""
+        StringAnalysis.objects.filter(pk=self.string_analysis.pk).delete()
+        self.assertTrue(bloom.might_exist(self.string_analysis.pk))
+        
+        with override_settings(STRINGS_BLOOM_REBUILD_INTERVAL=0):
+            self.assertFalse(bloom.might_exist(self.string_analysis.pk))
+    
+    @override_settings(STRINGS_BLOOM_FILTER=False)
+    def test_disabled(self):
+        """Test that every id may exist when the filter is turned off."""
+        self.assertTrue(bloom.might_exist('0' * 64))
+
+
 class DeleteStringByValueAPITestCase(TestCase):
     """Test DELETE /strings/<string_value> endpoint."""
     
@@ -16,7 +16,19 @@ urlpatterns = [
     path('strings/', views.strings_collection, name='strings_collection_slash'),
     path('strings', views.strings_collection, name='strings_collection'),
     
+    # POST /strings/lookup - Fetch many strings at once (must come before /<string_value>)
+    path('strings/lookup', views.string_lookup, name='string_lookup'),
+    
     # GET /strings/<string_value> - Get string by value
     # DELETE /strings/<string_value> - Delete string by value
     path('strings/<path:string_value>', views.string_detail, name='string_detail'),
+    
+    # GET /jobs/<job_id> - Status of an asynchronous analysis job
+    path('jobs/<uuid:job_id>', views.job_detail, name='job_detail'),
+    
+    # GET /corpus/stats - Corpus-wide statistics
+    path('corpus/stats', views.corpus_stats, name='corpus_stats'),
+    
+    # GET /cache/stats - Response cache sizes and hit rates of this process
+    path('cache/stats', views.cache_stats, name='cache_stats'),
 ]
@@ -2,15 +2,18 @@
 Utility functions for string analysis.
 """
 import hashlib
-from typing import Dict, Any
+import zlib
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
 
-def analyze_string(value: str) -> Dict[str, Any]:
+def analyze_string(value: str, sha256_hash: Optional[str] = None) -> Dict[str, Any]:
     """
     Analyze a string and compute all its properties.
     
     Args:
         value: The string to analyze
+        sha256_hash: The value's SHA-256, if already known (e.g. computed
+            from the raw request bytes); computed when omitted
         
     Returns:
         Dictionary containing all computed properties:
@@ -35,7 +38,8 @@ def analyze_string(value: str) -> Dict[str, Any]:
     word_count = len(value.split())
     
     # SHA-256 hash
-    sha256_hash = hashlib.sha256(value.encode()).hexdigest()
+    if sha256_hash is None:
+        sha256_hash = hashlib.sha256(value.encode()).hexdigest()
     
     # Character frequency map (includes ALL characters: letters, spaces, punctuation)
     character_frequency_map = {}
@@ -63,3 +67,82 @@ def compute_sha256(value: str) -> str:
         The SHA-256 hash as a hexadecimal string
     """
     return hashlib.sha256(value.encode()).hexdigest()
+
+
+def compress_value(value: str, threshold: int, prefix_length: int) -> Tuple[str, Optional[bytes]]:
+    """
+    Split a string into its stored representation.
+    
+    Args:
+        value: The string to store
+        threshold: Size in UTF-8 bytes above which the value is compressed
+        prefix_length: Number of characters kept inline for compressed values
+        
+    Returns:
+        (inline, compressed): the full value and None for values up to the
+        threshold, otherwise a prefix of the value and the zlib-compressed
+        UTF-8 encoding of the whole value
+    """
+    # A UTF-8 character is at most 4 bytes, so short strings skip encoding
+    if len(value) * 4 <= threshold:
+        return value, None
+    
+    encoded = value.encode()
+    if len(encoded) <= threshold:
+        return value, None
+    
+    return value[:prefix_length], zlib.compress(encoded)
+
+
+def decompress_value(compressed: bytes) -> str:
+    """
+    Restore a string compressed by compress_value().
+    
+    Args:
+        compressed: The zlib-compressed UTF-8 bytes (bytes or memoryview)
+        
+    Returns:
+        The original string
+    """
+    return zlib.decompress(compressed).decode()
+
+
+def pack_counts(counts: Iterable[int]) -> bytes:
+    """
+    Encode non-negative integers as consecutive unsigned LEB128 varints.
+    
+    Args:
+        counts: The integers to encode
+        
+    Returns:
+        The packed bytes; counts below 128 take a single byte each
+    """
+    out = bytearray()
+    for count in counts:
+        while count >= 0x80:
+            out.append((count & 0x7F) | 0x80)
+            count >>= 7
+        out.append(count)
+    return bytes(out)
+
+
+def unpack_counts(packed: bytes) -> List[int]:
+    """
+    Decode integers packed by pack_counts().
+    
+    Args:
+        packed: The packed bytes (bytes or memoryview)
+        
+    Returns:
+        The list of integers, in order
+    """
+    counts = []
+    count = shift = 0
+    for byte in bytes(packed):
+        if byte < 0x80:
+            counts.append(count | (byte << shift))
+            count = shift = 0
+        else:
+            count |= (byte & 0x7F) << shift
+            shift += 7
+    return counts
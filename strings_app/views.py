@@ -6,24 +6,113 @@ from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 from urllib.parse import unquote
+import json
 import re
 
-from .models import StringAnalysis
+from . import bloom, cache, columnar, facets, jobs, pagination, precompiled, snapshot, stats
+from .filters import filter_queryset
+from .models import AnalysisJob, StringAnalysis
+from .parsers import RawStringBody
+from .renderers import FastJSONRenderer, PrerenderedJSONResponse
+from .singleflight import SingleFlight
+from .utils import compute_sha256
 from .serializers import (
+    FAST_FIELDS,
+    fast_representer,
+    fast_serialize,
+    AnalysisJobSerializer,
     StringAnalysisSerializer,
     StringListSerializer,
     NaturalLanguageQuerySerializer
 )
 
 
+# Concurrent creates of the same value share one analysis and insert
+_create_flight = SingleFlight()
+
+# A string's analysis never changes: its id is the SHA-256 of the value
+DETAIL_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# List responses change with every insert and delete, so they are revalidated
+LIST_CACHE_CONTROL = 'no-cache'
+
+
+def _matching_etag(request, etags):
+    """
+    Return the first of `etags` named by the request's If-None-Match header,
+    or None. Uses the weak comparison If-None-Match calls for.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return None
+    candidates = parse_etags(header)
+    if candidates == ['*']:
+        return etags[0]
+    candidates = {tag.removeprefix('W/') for tag in candidates}
+    for etag in etags:
+        if etag.removeprefix('W/') in candidates:
+            return etag
+    return None
+
+
+def _conflict_response():
+    return Response(
+        {"error": "String already exists in the database."},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+def _read_only_response():
+    """Return the 405 sent for writes while serving a snapshot."""
+    return Response(
+        {"error": "This server is serving a read-only snapshot."},
+        status=status.HTTP_405_METHOD_NOT_ALLOWED
+    )
+
+
+def _perform_create(serializer):
+    """
+    Validate and save a serializer and return (status_code, data).
+
+    Runs at most once per value at a time; see _create_string_logic().
+    """
+    try:
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+    except ValidationError as e:
+        # Check for conflict (string already exists) - 409
+        error_detail = str(e.detail)
+        if 'conflict' in error_detail.lower() or 'already exists' in error_detail.lower():
+            return status.HTTP_409_CONFLICT, None
+        
+        # Any other validation error - 400
+        return status.HTTP_400_BAD_REQUEST, {"error": str(e.detail)}
+    
+    return status.HTTP_201_CREATED, serializer.data
+
+
 def _create_string_logic(request):
     """
     Internal logic for creating a string.
     Used by both create_string() and strings_collection().
+    
+    Identical values posted concurrently are coalesced: the first request
+    performs the analysis and insert and gets 201, requests that arrived
+    while it was in flight get 409 without repeating any work.
     """
+    if snapshot.get_snapshot() is not None:
+        return _read_only_response()
+    
+    if isinstance(request.data, RawStringBody):
+        return _create_from_raw_body(request, request.data)
+    
     # Validate that value exists
     if 'value' not in request.data:
         return Response(
@@ -46,32 +135,112 @@ def _create_string_logic(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    if request.query_params.get('async', '').lower() in ('1', 'true'):
+        return _enqueue_analysis(value)
+    
     serializer = StringAnalysisSerializer(data=request.data)
     
     try:
-        if serializer.is_valid(raise_exception=True):
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-    except ValidationError as e:
-        # Check for conflict (string already exists) - 409
-        error_detail = str(e.detail)
-        if 'conflict' in error_detail.lower() or 'already exists' in error_detail.lower():
-            return Response(
-                {"error": "String already exists in the database."},
-                status=status.HTTP_409_CONFLICT
+        (response_status, response_data), shared = _create_flight.do(
+            compute_sha256(value), lambda: _perform_create(serializer)
+        )
+    except Exception as e:
+        # Unexpected errors - 400
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Only the caller that performed the insert reports 201
+    if response_status == status.HTTP_409_CONFLICT or (
+        shared and response_status == status.HTTP_201_CREATED
+    ):
+        return _conflict_response()
+    
+    return Response(response_data, status=response_status)
+
+
+def _perform_raw_create(body):
+    """
+    Store a value taken verbatim from the request body and return (status_code, data).
+    
+    Bypasses the serializer's input handling so the value is neither copied
+    nor trimmed, and reuses the hash computed from the raw bytes.
+    """
+    if bloom.might_exist(body.sha256_hash) and StringAnalysis.objects.filter(pk=body.sha256_hash).exists():
+        return status.HTTP_409_CONFLICT, None
+    
+    try:
+        with transaction.atomic():
+            instance = StringAnalysis.objects.create(
+                value=body.value, sha256_hash=body.sha256_hash
             )
-        
-        # Any other validation error - 400
+    except IntegrityError:
+        return status.HTTP_409_CONFLICT, None
+    
+    return status.HTTP_201_CREATED, StringAnalysisSerializer(instance).data
+
+
+def _create_from_raw_body(request, body):
+    """
+    Create a string from a text/plain or application/octet-stream body.
+    """
+    if body.value.strip() == '':
         return Response(
-            {"error": str(e.detail)},
+            {"error": "Value cannot be empty."},
             status=status.HTTP_400_BAD_REQUEST
         )
+    
+    if request.query_params.get('async', '').lower() in ('1', 'true'):
+        return _enqueue_analysis(body.value, body.sha256_hash, raw=True)
+    
+    try:
+        (response_status, response_data), shared = _create_flight.do(
+            body.sha256_hash, lambda: _perform_raw_create(body)
+        )
     except Exception as e:
         # Unexpected errors - 400
         return Response(
             {"error": str(e)},
             status=status.HTTP_400_BAD_REQUEST
         )
+    
+    if response_status == status.HTTP_409_CONFLICT or shared:
+        return _conflict_response()
+    
+    return Response(response_data, status=response_status)
+
+
+def _enqueue_analysis(value, value_hash=None, raw=False):
+    """
+    Store an analysis job for `value` and return 202 Accepted.
+    
+    With `raw`, the job stores the value verbatim like _perform_raw_create().
+    Retries of a value whose job has not finished yet get the existing job
+    back instead of queueing the same work again. A job presumed abandoned
+    (see jobs.is_abandoned) is queued again.
+    """
+    if value_hash is None:
+        value_hash = compute_sha256(value)
+    
+    if bloom.might_exist(value_hash) and StringAnalysis.objects.filter(pk=value_hash).exists():
+        return _conflict_response()
+    
+    job = AnalysisJob.objects.filter(
+        value_hash=value_hash,
+        status__in=[AnalysisJob.STATUS_PENDING, AnalysisJob.STATUS_RUNNING]
+    ).first()
+    if job is None:
+        job = AnalysisJob.objects.create(value=value, value_hash=value_hash, raw=raw)
+        jobs.enqueue(job)
+    elif jobs.is_abandoned(job):
+        jobs.enqueue(job)
+    
+    return Response(
+        AnalysisJobSerializer(job).data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': f'/jobs/{job.id}'}
+    )
 
 
 @api_view(['POST'])
@@ -86,8 +255,15 @@ def create_string(request):
             "value": "string to analyze"
         }
     
+        or the value itself, sent as text/plain or application/octet-stream
+        (UTF-8 unless a charset is given). Raw bodies are stored verbatim.
+    
+    Query Parameters:
+        async: "1" or "true" to analyze in the background (see job_detail)
+    
     Responses:
         201 Created: String created successfully
+        202 Accepted: Analysis job queued (async mode)
         400 Bad Request: Missing 'value' field or empty value
         409 Conflict: String already exists
         422 Unprocessable Entity: Invalid value type (not a string)
@@ -95,10 +271,11 @@ def create_string(request):
     return _create_string_logic(request)
 
 
-@api_view(['GET', 'DELETE'])
+@api_view(['GET', 'HEAD', 'DELETE'])
 def string_detail(request, string_value):
     """
     GET /strings/<string:string_value> - Retrieve a string analysis
+    HEAD /strings/<string:string_value> - Check whether a string is stored
     DELETE /strings/<string:string_value> - Delete a string analysis
     
     Retrieve or delete a string analysis by its actual string value (not hash).
@@ -108,36 +285,388 @@ def string_detail(request, string_value):
         GET:
             200 OK: String found
             404 Not Found: String not found
+        HEAD:
+            200 OK: String found (empty body)
+            404 Not Found: String not found (empty body)
         DELETE:
             204 No Content: String deleted successfully (empty body)
             404 Not Found: String not found
     """
+    return _string_detail_logic(request, string_value)
+
+
+def _string_detail_logic(request, string_value):
+    """
+    Internal logic for retrieving or deleting a string analysis.
+    Used by string_detail() and string_lookup().
+    """
     # URL decode the string value
     decoded_value = unquote(string_value)
+    value_hash = compute_sha256(decoded_value)
     
-    if request.method == 'GET':
-        # Retrieve the string analysis or return 404
-        try:
-            string_analysis = StringAnalysis.objects.get(value=decoded_value)
-            serializer = StringAnalysisSerializer(string_analysis)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except StringAnalysis.DoesNotExist:
-            return Response(
-                {"error": "String not found."},
-                status=status.HTTP_404_NOT_FOUND
-            )
+    current = snapshot.get_snapshot()
+    if current is not None:
+        return _snapshot_detail(request, current, value_hash)
+    
+    # Values that were never stored are answered without a query
+    if not bloom.might_exist(value_hash):
+        return _string_not_found(request)
+    
+    # Hot strings are answered from this process's cache without a query
+    cached = cache.get_detail(value_hash) if request.method in ('GET', 'HEAD') else None
+    
+    if request.method == 'HEAD':
+        if cached is not None or StringAnalysis.objects.filter(pk=value_hash).exists():
+            return Response(status=status.HTTP_200_OK, headers={
+                'ETag': f'"{value_hash}"',
+                'Cache-Control': DETAIL_CACHE_CONTROL,
+            })
+        return _string_not_found(request)
+    
+    elif request.method == 'GET':
+        # The id is the SHA-256 of the value, so the ETag is known without
+        # reading the row; only its existence needs checking
+        etag = _matching_etag(request, (f'"{value_hash}"', f'"{value_hash}-gzip"'))
+        if etag and (cached is not None or StringAnalysis.objects.filter(pk=value_hash).exists()):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={
+                'ETag': etag,
+                'Cache-Control': DETAIL_CACHE_CONTROL,
+                'Vary': 'Accept-Encoding',
+            })
+        
+        if cached is not None:
+            detail_json, detail_gzip = cached
+        else:
+            # Render the body from the row, or return 404
+            try:
+                string_analysis = StringAnalysis.objects.get(pk=value_hash)
+            except StringAnalysis.DoesNotExist:
+                return _string_not_found(request)
+            
+            detail_json, detail_gzip = string_analysis.render_detail()
+            # Bodies large enough to be gzipped are cached in that form only,
+            # and decompressed for clients that do not accept gzip
+            cache.set_detail(value_hash, None if detail_gzip is not None else detail_json, detail_gzip)
+        
+        return PrerenderedJSONResponse(
+            detail_json, detail_gzip, status=status.HTTP_200_OK,
+            headers={'X-Cache': 'MISS' if cached is None else 'HIT'},
+            etag=value_hash, cache_control=DETAIL_CACHE_CONTROL,
+        )
     
     elif request.method == 'DELETE':
         # Try to find and delete the string analysis
         try:
-            string_analysis = StringAnalysis.objects.get(value=decoded_value)
+            string_analysis = StringAnalysis.objects.get(pk=value_hash)
             string_analysis.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         except StringAnalysis.DoesNotExist:
+            return _string_not_found(request)
+
+
+def _snapshot_detail(request, current, value_hash):
+    """_string_detail_logic() for a server serving a snapshot."""
+    if request.method == 'DELETE':
+        return _read_only_response()
+    
+    row = current.find(value_hash)
+    if row is None:
+        return _string_not_found(request)
+    
+    headers = {'ETag': f'"{value_hash}"', 'Cache-Control': DETAIL_CACHE_CONTROL}
+    if request.method == 'HEAD':
+        return Response(status=status.HTTP_200_OK, headers=headers)
+    
+    etag = _matching_etag(request, (f'"{value_hash}"', f'"{value_hash}-gzip"'))
+    if etag:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={**headers, 'ETag': etag})
+    body, gzipped = current.stored_body(row)
+    return PrerenderedJSONResponse(
+        None if gzipped else body, body if gzipped else None, status=status.HTTP_200_OK,
+        etag=value_hash, cache_control=DETAIL_CACHE_CONTROL,
+    )
+
+
+def _string_not_found(request):
+    """Return 404 Not Found, without a body for HEAD requests."""
+    if request.method == 'HEAD':
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    return Response(
+        {"error": "String not found."},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+def _stream_list(queryset, extra):
+    """
+    Return the list envelope for a whole queryset as a StreamingHttpResponse.
+    
+    Rows are read with .iterator() (server-side cursors on PostgreSQL) and
+    rendered in chunks, so memory stays flat however large the result is.
+    The bytes are identical to the non-streamed response.
+    """
+    renderer = FastJSONRenderer()
+    chunk_size = settings.STRINGS_STREAM_CHUNK_SIZE
+    
+    def generate():
+        yield b'{"data":['
+        represent = fast_representer()
+        count = 0
+        rows = []
+        for row in queryset.values_list(*FAST_FIELDS).iterator(chunk_size=chunk_size):
+            rows.append(represent(row))
+            if len(rows) >= chunk_size:
+                yield (b',' if count else b'') + renderer.render(rows)[1:-1]
+                count += len(rows)
+                rows = []
+        if rows:
+            yield (b',' if count else b'') + renderer.render(rows)[1:-1]
+            count += len(rows)
+        trailer = b'],"count":%d' % count
+        extra_json = renderer.render(extra)
+        if extra_json != b'{}':
+            trailer += b',' + extra_json[1:-1]
+        yield trailer + b'}'
+    
+    return StreamingHttpResponse(generate(), content_type='application/json')
+
+
+def _fast_ordering_key(ordering):
+    """
+    Return a function mapping a FAST_FIELDS row to its values of the
+    columns of `ordering`, for keyset cursors.
+    """
+    indexes = [FAST_FIELDS.index(name.lstrip('-')) for name in ordering]
+    return lambda row: [row[index] for index in indexes]
+
+
+_ID = FAST_FIELDS.index('id')
+
+
+def _list_response(request, filters, extra, endpoint, ordering=None, limit=None):
+    """
+    Serialize the strings matching a normalized filter dict into the list
+    envelope.
+    
+    Results are ordered by the `ordering` query parameter (newest first by
+    default). With a `limit` or `cursor` query parameter only one keyset
+    page is returned, together with opaque `next` / `previous` cursors and a
+    total count computed according to `count` (exact, estimate or none);
+    `stream=1` streams the whole result; otherwise the whole result is
+    returned as before. The `ordering` and `limit` arguments, when given,
+    replace the defaults of those parameters (the natural language filter's
+    "longest 5"). With `facets`, the counts of the matching strings per
+    value of the named facets are added (see facets.py).
+    
+    Rendered bodies are cached per process, keyed by the normalized
+    `filters`, the pagination parameters and the corpus generation; both
+    list endpoints share entries, and `endpoint` labels the hit rate stats.
+    The endpoint-specific `extra` fields are appended to the cached body.
+    Facet counts are cached separately, so every page of a result shares
+    them.
+    """
+    current = snapshot.get_snapshot()
+    if current is not None:
+        generation, etag = None, current.etag
+    else:
+        # Read before the rows, so a concurrent write can only make the ETag
+        # (and cache key) stale
+        generation = stats.generation()
+        etag = f'W/"{generation}"'
+    cache_headers = {'ETag': etag, 'Cache-Control': LIST_CACHE_CONTROL}
+    if _matching_etag(request, (etag,)):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+    
+    try:
+        ordering = pagination.parse_ordering(request.query_params, ordering or '-created_at')
+    except pagination.PaginationError as e:
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        facet_names = facets.parse_facets(request.query_params)
+    except facets.FacetError as e:
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if request.query_params.get('stream', '').lower() in ('1', 'true'):
+        if pagination.is_paginated(request.query_params):
             return Response(
-                {"error": "String not found."},
-                status=status.HTTP_404_NOT_FOUND
+                {"error": "stream cannot be combined with limit or cursor."},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        if facet_names:
+            return Response(
+                {"error": "stream cannot be combined with facets."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if current is not None:
+            # Snapshot bodies are assembled from the mapped file as they are
+            return _snapshot_list_response(current, filters, extra, cache_headers, ordering)
+        queryset, _ = _resolve_filters(filters, generation)
+        response = _stream_list(queryset.order_by(*ordering), extra)
+        for header, value in cache_headers.items():
+            response[header] = value
+        return response
+    
+    paginated = pagination.is_paginated(request.query_params) or limit is not None
+    if paginated:
+        count_mode = request.query_params.get('count', 'exact')
+        if count_mode not in ('exact', 'estimate', 'none'):
+            return Response(
+                {"error": "count must be 'exact', 'estimate' or 'none'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = pagination.parse_limit(request.query_params, limit)
+        except pagination.PaginationError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        cursor = request.query_params.get('cursor')
+    
+    if current is not None:
+        if not paginated:
+            return _snapshot_list_response(
+                current, filters, extra, cache_headers, ordering, facet_names=facet_names
+            )
+        return _snapshot_list_response(
+            current, filters, extra, cache_headers, ordering, limit, cursor, count_mode,
+            facet_names,
+        )
+    
+    response_cache = cache.get_cache('list')
+    cache_key = (
+        generation,
+        json.dumps(filters, sort_keys=True),
+        ordering,
+        (limit, cursor, count_mode) if paginated else None,
+    )
+    body = response_cache.get(cache_key, endpoint) if response_cache else None
+    cache_status = 'HIT'
+    
+    if body is None:
+        cache_status = 'MISS'
+        queryset, compiled = _resolve_filters(filters, generation, ordering)
+        response_data = {}
+        if paginated:
+            key = _fast_ordering_key(ordering)
+            try:
+                if compiled:
+                    page = compiled.page(filters, limit, cursor, key=key)
+                else:
+                    page = pagination.KeysetPaginator(ordering).paginate(
+                        queryset.values_list(*FAST_FIELDS), limit, cursor, key=key
+                    )
+            except pagination.PaginationError as e:
+                return Response(
+                    {"error": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            response_data['data'] = list(map(fast_representer(), page.rows))
+            if compiled:
+                response_data['count'] = compiled.count(filters, count_mode)
+            else:
+                response_data['count'] = stats.count_queryset(queryset, count_mode)
+            response_data['next'] = page.next_cursor
+            response_data['previous'] = page.previous_cursor
+        else:
+            # The full result is already in hand; no second COUNT query needed
+            if compiled:
+                response_data['data'] = list(map(fast_representer(), compiled.rows(filters)))
+            else:
+                response_data['data'] = fast_serialize(queryset.order_by(*ordering))
+            response_data['count'] = len(response_data['data'])
+        body = FastJSONRenderer().render(response_data)
+        if response_cache:
+            response_cache.set(cache_key, body)
+    
+    if facet_names:
+        extra = {
+            'facets': _facet_counts(
+                generation, filters, facet_names,
+                lambda: facets.count_queryset(_resolve_filters(filters, generation)[0], facet_names),
+            ),
+            **extra,
+        }
+    if extra:
+        body = body[:-1] + b',' + FastJSONRenderer().render(extra)[1:]
+    return PrerenderedJSONResponse(
+        body, status=status.HTTP_200_OK,
+        headers={**cache_headers, 'X-Cache': cache_status},
+    )
+
+
+def _snapshot_list_response(current, filters, extra, headers, ordering, limit=None,
+                            cursor=None, count_mode='exact', facet_names=()):
+    """
+    _list_response() for a server serving a snapshot: the whole result, or
+    one page of it when a `limit` is given.
+    """
+    positions = current.match(filters)
+    rest = {}
+    if limit is None:
+        rows = current.sort(positions, ordering)
+        rest['count'] = len(positions)
+    else:
+        try:
+            page = current.paginate(positions, limit, cursor, ordering)
+        except pagination.PaginationError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = page.rows
+        rest['count'] = None if count_mode == 'none' else len(positions)
+        rest['next'] = page.next_cursor
+        rest['previous'] = page.previous_cursor
+    if facet_names:
+        rest['facets'] = _facet_counts(
+            current.etag, filters, facet_names,
+            lambda: current.count_facets(positions, facet_names),
+        )
+    return PrerenderedJSONResponse(
+        current.render_list(rows, {**rest, **extra}), status=status.HTTP_200_OK,
+        headers=headers,
+    )
+
+
+def _facet_counts(version, filters, names, count):
+    """
+    Return the `facets` field for `filters`, from the list cache or from the
+    counts returned by `count()`. `version` identifies the corpus the counts
+    were taken from: its generation, or the snapshot's ETag.
+    """
+    response_cache = cache.get_cache('list')
+    cache_key = ('facets', version, json.dumps(filters, sort_keys=True), names)
+    counts = response_cache.get(cache_key, 'facets') if response_cache else None
+    if counts is None:
+        counts = facets.render(count())
+        if response_cache:
+            response_cache.set(cache_key, counts, size=len(FastJSONRenderer().render(counts)))
+    return counts
+
+
+def _resolve_filters(filters, generation, ordering=pagination.DEFAULT_ORDERING):
+    """
+    Return the queryset of the rows matching `filters`, and their
+    precompiled queries (see precompiled.py) in `ordering` to run in its
+    place, if any.
+
+    When the columnar index can evaluate the filters in memory, the queryset
+    is the equivalent primary key lookup and there are no precompiled queries.
+    """
+    matches = columnar.match(filters, generation)
+    if matches is None:
+        return filter_queryset(filters), precompiled.get(filters, ordering)
+    if not matches:
+        return StringAnalysis.objects.none(), None
+    return StringAnalysis.objects.filter(pk__in=matches), None
 
 
 def _list_strings_logic(request):
@@ -145,7 +674,6 @@ def _list_strings_logic(request):
     Internal logic for listing strings with filters.
     Used by both list_strings() and strings_collection().
     """
-    queryset = StringAnalysis.objects.all()
     filters_applied = {}
     
     # Parse and apply filters
@@ -159,14 +687,12 @@ def _list_strings_logic(request):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             is_palindrome = is_palindrome_str == 'true'
-            queryset = queryset.filter(is_palindrome=is_palindrome)
             filters_applied['is_palindrome'] = is_palindrome
         
         # min_length filter
         if 'min_length' in request.query_params:
             try:
                 min_length = int(request.query_params.get('min_length'))
-                queryset = queryset.filter(length__gte=min_length)
                 filters_applied['min_length'] = min_length
             except ValueError:
                 return Response(
@@ -178,7 +704,6 @@ def _list_strings_logic(request):
         if 'max_length' in request.query_params:
             try:
                 max_length = int(request.query_params.get('max_length'))
-                queryset = queryset.filter(length__lte=max_length)
                 filters_applied['max_length'] = max_length
             except ValueError:
                 return Response(
@@ -190,7 +715,6 @@ def _list_strings_logic(request):
         if 'word_count' in request.query_params:
             try:
                 word_count = int(request.query_params.get('word_count'))
-                queryset = queryset.filter(word_count=word_count)
                 filters_applied['word_count'] = word_count
             except ValueError:
                 return Response(
@@ -198,16 +722,75 @@ def _list_strings_logic(request):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        # contains_character filter
+        # word_count__in filter: comma-separated integers
+        if 'word_count__in' in request.query_params:
+            try:
+                word_counts = sorted({
+                    int(value) for value in request.query_params.get('word_count__in').split(',')
+                })
+            except ValueError:
+                return Response(
+                    {"error": "word_count__in must be a comma-separated list of integers."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if len(word_counts) > settings.STRINGS_MAX_FILTER_VALUES:
+                return Response(
+                    {"error": f"word_count__in accepts at most {settings.STRINGS_MAX_FILTER_VALUES} values."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            filters_applied['word_count__in'] = word_counts
+        
+        # length_buckets filter: comma-separated inclusive ranges, either
+        # bound optional ("1-5,10-20,50-")
+        if 'length_buckets' in request.query_params:
+            buckets = set()
+            try:
+                for bucket in request.query_params.get('length_buckets').split(','):
+                    low, separator, high = bucket.partition('-')
+                    if not separator or not (low or high):
+                        raise ValueError
+                    buckets.add((int(low) if low else None, int(high) if high else None))
+            except ValueError:
+                return Response(
+                    {"error": "length_buckets must be a comma-separated list of ranges such as 1-5, 10-20 or 50-."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if len(buckets) > settings.STRINGS_MAX_FILTER_VALUES:
+                return Response(
+                    {"error": f"length_buckets accepts at most {settings.STRINGS_MAX_FILTER_VALUES} ranges."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            filters_applied['length_buckets'] = [
+                list(bucket) for bucket in sorted(buckets, key=lambda b: (
+                    b[0] is not None, b[0] or 0, b[1] is None, b[1] or 0
+                ))
+            ]
+        
+        # contains_character filter; repeat it to require several characters
+        # (contains_character_match=all, the default) or any of them
         if 'contains_character' in request.query_params:
-            contains_char = request.query_params.get('contains_character')
-            if len(contains_char) != 1:
+            characters = request.query_params.getlist('contains_character')
+            if any(len(contains_char) != 1 for contains_char in characters):
                 return Response(
                     {"error": "contains_character must be a single character."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            queryset = queryset.filter(value__contains=contains_char)
-            filters_applied['contains_character'] = contains_char
+            match = request.query_params.get('contains_character_match', 'all')
+            if match not in ('all', 'any'):
+                return Response(
+                    {"error": "contains_character_match must be 'all' or 'any'."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            characters = sorted(set(characters))
+            if len(characters) > settings.STRINGS_MAX_FILTER_VALUES:
+                return Response(
+                    {"error": f"contains_character accepts at most {settings.STRINGS_MAX_FILTER_VALUES} values."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if len(characters) == 1:
+                filters_applied['contains_character'] = characters[0]
+            else:
+                filters_applied[f'contains_{match}'] = characters
         
     except Exception as e:
         return Response(
@@ -216,14 +799,7 @@ def _list_strings_logic(request):
         )
     
     # Serialize and return results
-    serializer = StringAnalysisSerializer(queryset, many=True)
-    response_data = {
-        'data': serializer.data,
-        'count': queryset.count(),
-        'filters_applied': filters_applied
-    }
-    
-    return Response(response_data, status=status.HTTP_200_OK)
+    return _list_response(request, filters_applied, {'filters_applied': filters_applied}, 'list')
 
 
 @api_view(['GET'])
@@ -236,12 +812,34 @@ def list_strings(request):
     - min_length: integer (filter length >= min_length)
     - max_length: integer (filter length <= max_length)
     - word_count: integer (exact match)
-    - contains_character: single character (check if char in value)
+    - word_count__in: comma-separated integers (any of them)
+    - length_buckets: comma-separated ranges like "1-5,10-20,50-" (length in any)
+    - contains_character: single character (check if char in value); may be
+      repeated, with contains_character_match "all" (default) or "any"
+    
+    Ordering (optional):
+    - ordering: created_at, length, word_count or unique_characters, prefixed
+      with "-" for descending (default "-created_at")
+    
+    Pagination (optional):
+    - limit: page size (default REST_FRAMEWORK['PAGE_SIZE'])
+    - cursor: opaque `next` / `previous` value from a previous page
+    - count: "exact" (default), "estimate" or "none" for the total count
+    
+    Streaming (optional):
+    - stream: "1" or "true" to stream the full result with flat memory use
+    
+    Facets (optional):
+    - facets: comma-separated word_count, length_bucket and/or is_palindrome;
+      adds the counts of the matching strings per value of each
     
     Returns:
         {
             "data": [array of objects],
             "count": int,
+            "next": cursor or null (paginated requests only),
+            "previous": cursor or null (paginated requests only),
+            "facets": {} (with the facets parameter only),
             "filters_applied": {}
         }
     
@@ -302,12 +900,61 @@ def parse_natural_language_query(query_string):
     return filters
 
 
+# Phrases of a natural language query that order the results
+_NATURAL_LANGUAGE_ORDERINGS = {
+    'longest': '-length',
+    'shortest': 'length',
+    'most': '-unique_characters',
+    'fewest': 'unique_characters',
+}
+
+
+def parse_natural_language_ordering(query_string):
+    """
+    Parse the ordering and result count of a natural language query.
+    
+    Supports:
+    - "longest N" / "N longest" → ordering=-length, limit=N
+    - "shortest N" / "N shortest" → ordering=length, limit=N
+    - "most unique characters" → ordering=-unique_characters
+    - "fewest unique characters" → ordering=unique_characters
+    - "top N" → limit=N
+    
+    Returns:
+        (ordering, limit), either of which may be None
+    """
+    query_lower = query_string.lower()
+    ordering = limit = None
+    
+    # Check for "longest N" / "N shortest"
+    extreme_match = re.search(r'(?:\b(\d+)\s+)?\b(longest|shortest)\b(?:\s+(\d+)\b)?', query_lower)
+    if extreme_match:
+        ordering = _NATURAL_LANGUAGE_ORDERINGS[extreme_match.group(2)]
+        limit = extreme_match.group(1) or extreme_match.group(3)
+    
+    # Check for "most unique characters" / "fewest unique characters"
+    unique_match = re.search(r'\b(most|fewest)\s+(?:unique|distinct)\s+characters', query_lower)
+    if unique_match and ordering is None:
+        ordering = _NATURAL_LANGUAGE_ORDERINGS[unique_match.group(1)]
+    
+    # Check for "top N"
+    top_match = re.search(r'\btop\s+(\d+)\b', query_lower)
+    if top_match and limit is None:
+        limit = top_match.group(1)
+    
+    if limit is not None:
+        limit = min(int(limit), settings.STRINGS_MAX_PAGE_SIZE) or None
+    return ordering, limit
+
+
 @api_view(['GET'])
 def filter_by_natural_language(request):
     """
     GET /strings/filter-by-natural-language
     
     Query parameter: query (the natural language string)
+    Optional `limit` / `cursor` / `ordering` parameters paginate and order
+    like GET /strings; "longest 5" and the like set their defaults.
     
     Parse natural language to extract filters and return matching strings.
     
@@ -337,6 +984,7 @@ def filter_by_natural_language(request):
     # Parse the natural language query
     try:
         parsed_filters = parse_natural_language_query(query_string)
+        ordering, limit = parse_natural_language_ordering(query_string)
     except Exception as e:
         return Response(
             {"error": f"Unable to parse query: {str(e)}"},
@@ -354,36 +1002,20 @@ def filter_by_natural_language(request):
                 status=status.HTTP_422_UNPROCESSABLE_ENTITY
             )
     
-    # Apply filters to queryset
-    queryset = StringAnalysis.objects.all()
-    
-    if 'is_palindrome' in parsed_filters:
-        queryset = queryset.filter(is_palindrome=parsed_filters['is_palindrome'])
-    
-    if 'min_length' in parsed_filters:
-        queryset = queryset.filter(length__gte=parsed_filters['min_length'])
-    
-    if 'max_length' in parsed_filters:
-        queryset = queryset.filter(length__lte=parsed_filters['max_length'])
-    
-    if 'word_count' in parsed_filters:
-        queryset = queryset.filter(word_count=parsed_filters['word_count'])
-    
-    if 'contains_character' in parsed_filters:
-        queryset = queryset.filter(value__contains=parsed_filters['contains_character'])
-    
-    # Serialize and return results
-    serializer = StringAnalysisSerializer(queryset, many=True)
-    response_data = {
-        'data': serializer.data,
-        'count': queryset.count(),
-        'interpreted_query': {
-            'original_query': query_string,
-            'parsed_filters': parsed_filters
-        }
+    interpreted_query = {
+        'original_query': query_string,
+        'parsed_filters': parsed_filters
     }
+    if ordering:
+        interpreted_query['ordering'] = ordering
+    if limit:
+        interpreted_query['limit'] = limit
     
-    return Response(response_data, status=status.HTTP_200_OK)
+    # Serialize and return results
+    return _list_response(
+        request, parsed_filters, {'interpreted_query': interpreted_query}, 'natural_language',
+        ordering, limit,
+    )
 
 
 @api_view(['GET', 'POST'])
@@ -399,3 +1031,179 @@ def strings_collection(request):
         return _list_strings_logic(request)
     elif request.method == 'POST':
         return _create_string_logic(request)
+
+
+# Ids per `id IN (...)` query, well below SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+_SHA256_HEX = re.compile(r'[0-9a-f]{64}')
+
+
+@api_view(['GET', 'HEAD', 'DELETE', 'POST'])
+def string_lookup(request):
+    """
+    POST /strings/lookup - Fetch many string analyses in one request
+    
+    Request body: {"values": [...]} or {"ids": [...]}, at most
+    STRINGS_MAX_LOOKUP_SIZE items. Values are hashed to ids, and all rows
+    are read with chunked `id IN (...)` queries.
+    
+    Returns:
+    {
+        "data": [StringAnalysis objects found, in request order],
+        "missing": [requested values or ids not found, in request order],
+        "count": int
+    }
+    Repeated items are reported once.
+    
+    GET, HEAD and DELETE act on the stored string "lookup", as for any other value.
+    
+    Responses:
+        200 OK: Lookup performed
+        400 Bad Request: Neither or both of values and ids, or too many items
+        422 Unprocessable Entity: Items are not a list of strings
+    """
+    if request.method != 'POST':
+        return _string_detail_logic(request, 'lookup')
+    
+    keys = [key for key in ('values', 'ids') if isinstance(request.data, dict) and key in request.data]
+    if len(keys) != 1:
+        return Response(
+            {"error": "Provide exactly one of 'values' or 'ids'."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    key = keys[0]
+    items = request.data[key]
+    
+    if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+        return Response(
+            {"error": f"'{key}' must be a list of strings."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if len(items) > settings.STRINGS_MAX_LOOKUP_SIZE:
+        return Response(
+            {"error": f"At most {settings.STRINGS_MAX_LOOKUP_SIZE} {key} can be looked up at once."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    items = list(dict.fromkeys(items))
+    ids = [compute_sha256(item) for item in items] if key == 'values' else items
+    
+    current = snapshot.get_snapshot()
+    if current is not None:
+        rows, missing = [], []
+        for item, pk in zip(items, ids):
+            row = current.find(pk)
+            if row is not None:
+                rows.append(row)
+            else:
+                missing.append(item)
+        return PrerenderedJSONResponse(
+            current.render_list(rows, {'missing': missing, 'count': len(rows)}),
+            status=status.HTTP_200_OK,
+        )
+    
+    # Ids the Bloom filter rules out are not queried; ids supplied by the
+    # client may not be digests, so those are always queried
+    candidates = [
+        pk for pk in ids
+        if not _SHA256_HEX.fullmatch(pk) or bloom.might_exist(pk)
+    ]
+    
+    rows = {}
+    for start in range(0, len(candidates), LOOKUP_CHUNK_SIZE):
+        chunk = StringAnalysis.objects.filter(
+            pk__in=candidates[start:start + LOOKUP_CHUNK_SIZE]
+        ).order_by().values_list(*FAST_FIELDS)
+        rows.update((row[_ID], row) for row in chunk)
+    
+    represent = fast_representer()
+    data, missing = [], []
+    for item, pk in zip(items, ids):
+        if pk in rows:
+            data.append(represent(rows[pk]))
+        else:
+            missing.append(item)
+    
+    return Response({
+        'data': data,
+        'missing': missing,
+        'count': len(data),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def corpus_stats(request):
+    """
+    GET /corpus/stats
+    
+    Report corpus-wide statistics from the maintained rollup (see stats.py),
+    in a fixed number of queries whatever the size of the corpus. Responses
+    carry the corpus generation as ETag, like the list endpoints. A server
+    serving a snapshot reports the statistics of the snapshot, computed when
+    it was exported, with the snapshot's ETag.
+    
+    Returns:
+        {
+            "count": int,
+            "generation": int,
+            "palindrome_count": int,
+            "palindrome_ratio": float or null,
+            "average_length": float or null,
+            "average_word_count": float or null,
+            "length_histogram": {"<bucket>": int},
+            "characters": {"<character>": {"occurrences": int, "strings": int}}
+        }
+    """
+    current = snapshot.get_snapshot()
+    if current is not None:
+        headers = {'ETag': current.etag, 'Cache-Control': LIST_CACHE_CONTROL}
+        if _matching_etag(request, (headers['ETag'],)):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(current.corpus_stats(), status=status.HTTP_200_OK, headers=headers)
+    # Read before the rollup, so a concurrent write can only make the ETag stale
+    generation = stats.generation()
+    headers = {'ETag': f'W/"{generation}"', 'Cache-Control': LIST_CACHE_CONTROL}
+    if _matching_etag(request, (headers['ETag'],)):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(stats.corpus_stats(), status=status.HTTP_200_OK, headers=headers)
+
+
+@api_view(['GET'])
+def cache_stats(request):
+    """
+    GET /cache/stats
+    
+    Report the size and per-endpoint hit rates of this process's response
+    caches. Each server process has its own caches.
+    
+    Returns:
+        {"<cache name>": {...} or null when the cache is disabled}
+    """
+    return Response({
+        name: response_cache.stats() if (response_cache := cache.get_cache(name)) else None
+        for name in cache.CACHE_NAMES
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def job_detail(request, job_id):
+    """
+    GET /jobs/<uuid:job_id>
+    
+    Report the status of an asynchronous analysis job.
+    Once the job has completed, `string_id` holds the id of the stored string.
+    
+    Responses:
+        200 OK: Job found
+        404 Not Found: Job not found
+    """
+    try:
+        job = AnalysisJob.objects.get(pk=job_id)
+    except AnalysisJob.DoesNotExist:
+        return Response(
+            {"error": "Job not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response(AnalysisJobSerializer(job).data, status=status.HTTP_200_OK)